@@ -0,0 +1,71 @@
+import argparse
+import os
+
+from merge_stream import scan_results
+from regen_manifest import Manifest
+from report_parser import ParseQuality
+from report_schemas import INTEGRATION_SCHEMA, UNIT_SCHEMA
+
+# Configuration
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+# Report -> (schema, results directory, recursive, generator manifest)
+RESULT_SETS = {
+    "unit": (UNIT_SCHEMA, os.path.join(PROJECT_ROOT, "tests/results-openai"), False, "unit-tests"),
+    "integration": (INTEGRATION_SCHEMA, os.path.join(PROJECT_ROOT, "tests/results"), True, "integration-tests"),
+}
+
+
+def check_file(schema, path: str) -> ParseQuality:
+    """Parse quality of one generated result file."""
+    quality = ParseQuality(schema.fields)
+    for record in schema.parser.parse(path, quality=True):
+        quality.update(record["quality"])
+    return quality
+
+
+def check_results(name: str, queue: bool = False, verbose: bool = False):
+    schema, input_dir, recursive, manifest_name = RESULT_SETS[name]
+    if not os.path.exists(input_dir):
+        print(f"Error: Directory '{input_dir}' not found.")
+        return
+
+    malformed = []
+    checked = fuzzy_files = 0
+    for rel_path in scan_results(input_dir, recursive, suffix=".txt"):
+        path = os.path.join(input_dir, rel_path)
+        try:
+            quality = check_file(schema, path)
+        except (OSError, UnicodeDecodeError) as e:
+            print(f"Error reading {rel_path}: {e}")
+            continue
+        checked += 1
+        fuzzy_files += quality.fuzzy > 0
+        if quality.malformed:
+            malformed.append(path)
+            print(f"MALFORMED {rel_path}: {quality.test_cases} test cases; {'; '.join(quality.problems())}")
+        elif verbose:
+            print(f"ok        {rel_path}: {quality.test_cases} test cases, {quality.fuzzy} non-standard headings")
+
+    print(f"\n{name}: {checked} files checked, {len(malformed)} malformed, "
+          f"{fuzzy_files} parsed only thanks to tolerant headings")
+
+    if queue and malformed:
+        # Only these outputs are regenerated (bypassing the response cache) on the next generator run
+        manifest = Manifest(manifest_name, None)
+        unknown = [path for path in malformed if not manifest.flag(path)]
+        manifest.save()
+        print(f"Queued {len(malformed) - len(unknown)} files for regeneration in '{manifest.path}'")
+        for path in unknown:
+            print(f"Not in the manifest (delete it to regenerate): {path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report parse quality of generated test results.")
+    parser.add_argument("reports", nargs="*", choices=list(RESULT_SETS), default=list(RESULT_SETS),
+                        help="Result sets to check (default: all)")
+    parser.add_argument("--queue", action="store_true",
+                        help="Flag malformed outputs in the generator manifest for regeneration")
+    parser.add_argument("--verbose", action="store_true", help="Also list well-formed files")
+    args = parser.parse_args()
+    for name in args.reports:
+        check_results(name, queue=args.queue, verbose=args.verbose)
@@ -1,14 +1,17 @@
+import argparse
+import fnmatch
 import os
+import re
 import shutil
 
-# Folder paths
-SOURCE_DIR = "../tests/Unit-Testing"
-DEST_DIR = "../tests/filtered"
+# Folder paths (relative to the project root, so the script runs from anywhere)
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SOURCE_DIR = os.path.join(PROJECT_ROOT, "tests/Unit-Testing")
+DEST_DIR = os.path.join(PROJECT_ROOT, "tests/filtered")
+MODES = ("dry-run", "copy", "link", "move")
+DEFAULT_MODE = "move"
 
-# Create destination folder if not exists
-os.makedirs(DEST_DIR, exist_ok=True)
-
-# List of filenames you provided
+# Default selection: name prefixes (any extension)
 files_to_move = [
     "Address-Test",
     "AppServiceProvider-Test",
@@ -164,15 +167,116 @@ files_to_move = [
     "UsersController-Test"
 ]
 
-# Move matching files (any extension)
-count = 0
-for name in files_to_move:
-    for file in os.listdir(SOURCE_DIR):
-        if file.startswith(name):
-            src = os.path.join(SOURCE_DIR, file)
-            dest = os.path.join(DEST_DIR, file)
-            shutil.move(src, dest)
-            count += 1
-            print(f"Moved: {file}")
-
-print(f"\nTotal moved: {count} files.")
+
+class PrefixTrie:
+    """Character trie of name prefixes; match() walks a filename once, whatever the number of prefixes."""
+
+    END = ""  # Key marking the end of a prefix
+
+    def __init__(self, prefixes=()):
+        self.root = {}
+        for prefix in prefixes:
+            self.add(prefix)
+
+    def add(self, prefix: str):
+        node = self.root
+        for char in prefix:
+            node = node.setdefault(char, {})
+        node[self.END] = prefix
+
+    def match(self, name: str) -> list:
+        """Every selected prefix that `name` starts with, shortest first."""
+        found = []
+        node = self.root
+        for char in name:
+            if self.END in node:
+                found.append(node[self.END])
+            node = node.get(char)
+            if node is None:
+                return found
+        if self.END in node:
+            found.append(node[self.END])
+        return found
+
+
+def read_names(path: str) -> list:
+    """Selection list file: one name prefix per line; blank lines and # comments are ignored."""
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+
+
+def select_files(files, prefixes=(), globs=(), regexes=()):
+    """
+    Match a single directory listing against every rule. Returns
+    ([(filename, rule)], unmatched rules): a file is selected by the first rule
+    that matches it (name prefix, then glob, then regex), and every rule that
+    matches it counts as matched ('Invoice' and 'InvoiceItem' both do).
+    """
+    trie = PrefixTrie(prefixes)
+    patterns = [(rule, re.compile(fnmatch.translate(rule))) for rule in globs]
+    patterns += [(rule, re.compile(rule)) for rule in regexes]
+
+    selected, used = [], set()
+    for name in files:
+        matched = trie.match(name) + [rule for rule, pattern in patterns if pattern.match(name)]
+        if matched:
+            selected.append((name, matched[0]))
+            used.update(matched)
+    rules = list(prefixes) + list(globs) + list(regexes)
+    return selected, [rule for rule in rules if rule not in used]
+
+
+def transfer(src: str, dest: str, mode: str):
+    """Copy, hard-link or move one file; an existing destination is replaced."""
+    if mode == "copy":
+        shutil.copy2(src, dest)
+    elif mode == "link":
+        if os.path.lexists(dest):
+            os.remove(dest)
+        os.link(src, dest)
+    else:
+        shutil.move(src, dest)
+
+
+def filter_files(source_dir: str, dest_dir: str, prefixes=(), globs=(), regexes=(), mode: str = DEFAULT_MODE):
+    # One listing of the source; every rule is matched against this snapshot
+    with os.scandir(source_dir) as entries:
+        files = sorted(entry.name for entry in entries if entry.is_file())
+    selected, unmatched = select_files(files, prefixes, globs, regexes)
+
+    if mode != "dry-run":
+        os.makedirs(dest_dir, exist_ok=True)
+    verb = {"dry-run": "Would move", "copy": "Copied", "link": "Linked", "move": "Moved"}[mode]
+    count = 0
+    for name, rule in selected:
+        if mode != "dry-run":
+            try:
+                transfer(os.path.join(source_dir, name), os.path.join(dest_dir, name), mode)
+            except OSError as e:
+                print(f"Error: {name}: {e}")
+                continue
+        count += 1
+        print(f"{verb}: {name}")
+
+    for rule in unmatched:
+        print(f"No match: {rule}")
+    print(f"\nTotal {verb.lower()}: {count} of {len(files)} files ({len(unmatched)} rules without a match).")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Select test files by name prefix, glob or regex and copy/link/move them.")
+    parser.add_argument("--source", default=SOURCE_DIR, help="Directory to select from")
+    parser.add_argument("--dest", default=DEST_DIR, help="Destination directory")
+    parser.add_argument("--list", dest="list_file", help="File of name prefixes, one per line (default: files_to_move)")
+    parser.add_argument("--glob", action="append", default=[], help="Filename glob, e.g. 'Invoice*-Test.php' (repeatable)")
+    parser.add_argument("--regex", action="append", default=[], help="Filename regex (repeatable)")
+    parser.add_argument("--mode", choices=MODES, default=DEFAULT_MODE)
+    args = parser.parse_args()
+
+    if args.list_file:
+        prefixes = read_names(args.list_file)
+    elif args.glob or args.regex:
+        prefixes = []
+    else:
+        prefixes = files_to_move
+    filter_files(args.source, args.dest, prefixes, args.glob, args.regex, args.mode)
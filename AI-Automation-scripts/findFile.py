@@ -1,18 +1,216 @@
+import argparse
+import bisect
+import difflib
+import fnmatch
+import json
 import os
-import glob
+import re
 import sys
 
-def find_and_show_file(basename):
-    # Search recursively in 'app' folder
-    search_path = os.path.join("../app", "**", basename)
-    matched_files = glob.glob(search_path, recursive=True)
+# Configuration
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+APP_DIR = os.path.join(PROJECT_ROOT, "app")
+INDEX_PATH = os.path.join(PROJECT_ROOT, ".llm-cache", "app-symbols.json")
+INDEX_VERSION = 1   # Bump when the stored symbols change shape
+FUZZY_MATCHES = 5   # Suggestions shown by --fuzzy (and when nothing matches)
+GLOB_CHARS = "*?["  # A name containing any of these is a glob, as with the old glob.glob lookup
+
+NAMESPACE_PATTERN = re.compile(r"^\s*namespace\s+([\w\\]+)\s*;", re.MULTILINE)
+CLASS_PATTERN = re.compile(
+    r"^\s*(?:(?:abstract|final|readonly)\s+)*(?:class|interface|trait|enum)\s+(\w+)", re.MULTILINE)
+
+
+def scan_symbols(path: str) -> dict:
+    """Namespace and declared class/interface/trait/enum names of one PHP file."""
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            code = f.read()
+    except OSError:
+        return {"namespace": None, "classes": []}
+    namespace = NAMESPACE_PATTERN.search(code)
+    return {"namespace": namespace.group(1) if namespace else None, "classes": CLASS_PATTERN.findall(code)}
+
+
+class SymbolIndex:
+    """
+    Persistent index of the PHP files under `root`: path, basename, declared
+    class names and namespace of each file, stored at `path`.
+
+    refresh() only re-reads directories whose mtime changed (a file was
+    added, removed or renamed in them); only the new files of those
+    directories are scanned for symbols. Lookups are dictionary hits, and
+    prefix queries bisect a sorted key list.
+
+    refresh(check_files=True) also stats every file, to pick up in-place
+    edits (one stat per file; used once per generation run).
+    """
+
+    def __init__(self, root: str = APP_DIR, path: str = INDEX_PATH):
+        self.root = root
+        self.path = path
+        self.dirs = {}   # rel dir -> {"mtime_ns", "dirs", "files"}
+        self.files = {}  # rel path -> {"mtime_ns", "namespace", "classes"}
+        self.changed = False
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == INDEX_VERSION and data.get("root") == root:
+                self.dirs, self.files = data["dirs"], data["files"]
+        except (OSError, ValueError, KeyError):
+            pass
+        self._lookup = None
+
+    def refresh(self, check_files: bool = False):
+        """Bring the index up to date with the tree; saves it when anything changed."""
+        seen_dirs, seen_files = set(), set()
+        self._refresh_dir("", seen_dirs, seen_files, check_files)
+        # Entries of deleted directories and files
+        for table, seen in ((self.dirs, seen_dirs), (self.files, seen_files)):
+            for key in [k for k in table if k not in seen]:
+                del table[key]
+                self.changed = True
+        if self.changed:
+            self._lookup = None
+            self.save()
+        return self
+
+    def rebuild(self):
+        """Forget everything and rescan (e.g. after editing class names in place)."""
+        self.dirs, self.files, self.changed = {}, {}, True
+        return self.refresh()
+
+    def _refresh_dir(self, rel_dir: str, seen_dirs: set, seen_files: set, check_files: bool = False):
+        directory = os.path.join(self.root, rel_dir)
+        try:
+            mtime_ns = os.stat(directory).st_mtime_ns
+        except OSError:
+            return
+
+        entry = self.dirs.get(rel_dir)
+        if entry is None or entry["mtime_ns"] != mtime_ns:
+            entry = {"mtime_ns": mtime_ns, "dirs": [], "files": []}
+            with os.scandir(directory) as entries:
+                for item in entries:
+                    rel_path = f"{rel_dir}/{item.name}" if rel_dir else item.name
+                    if item.is_dir(follow_symlinks=False):
+                        entry["dirs"].append(rel_path)
+                    elif item.is_file() and item.name.endswith(".php"):
+                        entry["files"].append(rel_path)
+                        self._refresh_file(rel_path, item.stat().st_mtime_ns)
+            self.dirs[rel_dir] = entry
+            self.changed = True
+        elif check_files:
+            for rel_path in entry["files"]:
+                try:
+                    self._refresh_file(rel_path, os.stat(self.abspath(rel_path)).st_mtime_ns)
+                except OSError:
+                    pass
+
+        seen_dirs.add(rel_dir)
+        seen_files.update(entry["files"])
+        for sub_dir in entry["dirs"]:
+            self._refresh_dir(sub_dir, seen_dirs, seen_files, check_files)
+
+    def _refresh_file(self, rel_path: str, mtime_ns: int):
+        known = self.files.get(rel_path)
+        if known is None or known["mtime_ns"] != mtime_ns:
+            self.files[rel_path] = dict(scan_symbols(self.abspath(rel_path)), mtime_ns=mtime_ns)
+            self.changed = True
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": INDEX_VERSION, "root": self.root, "dirs": self.dirs, "files": self.files}, f)
+        os.replace(tmp_path, self.path)
+        self.changed = False
+
+    # ------------------ LOOKUPS ------------------
+    def _tables(self):
+        """name (basename, basename without .php, class, FQCN, lowercased) -> [rel paths], plus sorted keys."""
+        if self._lookup is None:
+            names = {}
+            for rel_path, symbols in sorted(self.files.items()):
+                basename = os.path.basename(rel_path)
+                keys = {basename, basename[:-len(".php")]}
+                for cls in symbols["classes"]:
+                    keys.add(cls)
+                    if symbols["namespace"]:
+                        keys.add(f"{symbols['namespace']}\\{cls}")
+                for key in keys | {key.lower() for key in keys}:
+                    names.setdefault(key, []).append(rel_path)
+            namespaces = {}
+            for rel_path, symbols in sorted(self.files.items()):
+                if symbols["namespace"]:
+                    namespaces.setdefault(symbols["namespace"], []).append(rel_path)
+            self._lookup = (names, sorted(names), namespaces)
+        return self._lookup
+
+    def abspath(self, rel_path: str) -> str:
+        return os.path.join(self.root, rel_path)
+
+    def find(self, name: str) -> list:
+        """Files whose basename (with or without .php), class name or FQCN is `name` (case-insensitive fallback)."""
+        if any(char in name for char in GLOB_CHARS):
+            return self.find_glob(name)
+        names = self._tables()[0]
+        name = name.lstrip("\\")
+        return names.get(name) or names.get(name.lower(), [])
+
+    def find_glob(self, pattern: str) -> list:
+        """
+        Files matching a glob such as `Invoice*.php`, like the old `app/**/<name>`
+        glob: each `/`-separated part of the pattern matches one trailing part of
+        the path under app/ (`Http/*Controller.php`). Case-insensitive fallback.
+        A pattern of only `**` matches every file.
+        """
+        if os.sep == "\\":
+            pattern = pattern.replace("\\", "/")
+        parts = [part for part in pattern.split("/") if part and part != "**"]
+
+        def matches(rel_path, parts):
+            # Index keys always use "/" (see _refresh_dir), on Windows too
+            tail = rel_path.split("/")[-len(parts):] if parts else []
+            return len(tail) == len(parts) and all(map(fnmatch.fnmatchcase, tail, parts))
+
+        paths = sorted(self.files)
+        return ([path for path in paths if matches(path, parts)]
+                or [path for path in paths if matches(path.lower(), [part.lower() for part in parts])])
+
+    def find_prefix(self, prefix: str) -> list:
+        names, keys, _ = self._tables()
+        start = bisect.bisect_left(keys, prefix)
+        found = []
+        for key in keys[start:]:
+            if not key.startswith(prefix):
+                break
+            found.extend(path for path in names[key] if path not in found)
+        return found
+
+    def find_fuzzy(self, name: str, n: int = FUZZY_MATCHES) -> list:
+        names, keys, _ = self._tables()
+        found = []
+        for key in difflib.get_close_matches(name, keys, n=n * 2, cutoff=0.6):
+            found.extend(path for path in names[key] if path not in found)
+        return found[:n]
+
+    def in_namespace(self, namespace: str) -> list:
+        return self._tables()[2].get(namespace.strip("\\"), [])
+
+
+def find_and_show_file(basename, index: SymbolIndex = None):
+    index = index or SymbolIndex().refresh()
+    matched_files = index.find(basename)
 
     if not matched_files:
         print(f"No file found with basename '{basename}' in app/")
+        suggestions = index.find_fuzzy(basename)
+        if suggestions:
+            print("Did you mean: " + ", ".join(suggestions))
         return
 
     # Take the first match
-    file_path = matched_files[0]
+    file_path = index.abspath(matched_files[0])
     print(f"Found file: {file_path}\n")
     print("-" * 50)
 
@@ -21,10 +219,43 @@ def find_and_show_file(basename):
         content = f.read()
         print(content)
 
+
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: python show_file.py <basename>")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description="Locate PHP files in app/ by basename, class name or namespace.")
+    parser.add_argument("name", nargs="?",
+                        help="Basename, class name, fully qualified class name, or a glob such as 'Invoice*.php'")
+    parser.add_argument("--batch", action="store_true",
+                        help="Read names from stdin, print '<name>\\t<path>' per match (no file contents)")
+    parser.add_argument("--prefix", action="store_true", help="List files whose name starts with NAME")
+    parser.add_argument("--fuzzy", action="store_true", help="List the closest names to NAME")
+    parser.add_argument("--namespace", action="store_true", help="List the files declaring namespace NAME")
+    parser.add_argument("--rebuild", action="store_true", help="Rescan app/ from scratch")
+    args = parser.parse_args()
+
+    index = SymbolIndex()
+    if args.rebuild:
+        index.rebuild()
+    else:
+        index.refresh()
 
-    basename = sys.argv[1]
-    find_and_show_file(basename)
+    if args.batch:
+        for line in sys.stdin:
+            name = line.strip()
+            if name:
+                for rel_path in index.find(name) or [""]:
+                    print(f"{name}\t{index.abspath(rel_path) if rel_path else ''}")
+    elif args.name is None:
+        if not args.rebuild:
+            parser.print_usage()
+            sys.exit(1)
+    elif args.prefix or args.fuzzy or args.namespace:
+        if args.prefix:
+            matches = index.find_prefix(args.name)
+        elif args.fuzzy:
+            matches = index.find_fuzzy(args.name)
+        else:
+            matches = index.in_namespace(args.name)
+        for rel_path in matches:
+            print(index.abspath(rel_path))
+    else:
+        find_and_show_file(args.name, index)
@@ -1,36 +1,58 @@
 import os
-import glob
 import aiofiles
 import asyncio
 from dotenv import load_dotenv
-from google import genai 
+from llm_client import GeminiClient
+from php_context import ImportGraph
+from prompt_budget import count_tokens
+from rate_limiter import RateLimiter
+from regen_manifest import Manifest, scan_files
+from response_cache import ResponseCache
 
 MODEL_NAME = "gemini-2.5-flash"
-RATE_LIMIT_SECONDS = 6   # 10 requests per minute
-
-load_dotenv()
+REQUESTS_PER_MINUTE = 10   # Provider RPM budget
+TOKENS_PER_MINUTE = 250000 # Provider TPM budget (estimated prompt tokens)
+REQUEST_BURST = 1          # Requests allowed back-to-back before pacing kicks in
+PROMPT_TEMPLATE_VERSION = "2" # Bump when the prompt changes to regenerate every test
+CONTEXT_TOKENS = 3000      # Budget for the signatures of the classes a file references
+# Paths are resolved relative to project root (1 level up)
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+INPUT_DIR = os.path.join(PROJECT_ROOT, "app")
+OUTPUT_DIR = os.path.join(PROJECT_ROOT, "tests/Unit-Testing")
+
+load_dotenv(os.path.join(PROJECT_ROOT, '.env'))
 API_KEY = os.getenv("UZAIR_GOOGLE_GEMINI_API_KEY_2")
 
-client = genai.Client(api_key=API_KEY) if API_KEY else None
+client = GeminiClient(MODEL_NAME, API_KEY) if API_KEY else None
 
-async def generate_test(prompt: str, output_path: str):
-    if not client:
-        print(f"Error: Gemini client not initialized (API Key missing).")
-        return
+# Paces API calls by the provider's real limits instead of a fixed sleep per file
+rate_limiter = RateLimiter(REQUESTS_PER_MINUTE, TOKENS_PER_MINUTE, REQUEST_BURST)
 
-    print(f"Generating test for {output_path} using {MODEL_NAME}...")
+# Responses keyed by (model, system message, prompt); Gemini calls here have no system message
+response_cache = ResponseCache()
 
-    try:
-        response = await asyncio.to_thread(
-            lambda: client.models.generate_content(
-                model=MODEL_NAME,
-                contents=prompt,
-            )
-        )
+# Input hash / template version / output path of every generated test
+manifest = Manifest("app-unit-tests", PROMPT_TEMPLATE_VERSION)
 
-        test_code = response.text.strip()
-        if not test_code:
-            raise ValueError("Model returned empty content.")
+
+async def generate_test(prompt: str, output_path: str) -> bool:
+    try:
+        # Cached prompts are served even without an API key
+        test_code = response_cache.get(MODEL_NAME, None, prompt)
+        if test_code is not None:
+            print(f"💾 Cache hit for {output_path}, skipping API call.")
+        elif not client:
+            print(f"Error: Gemini client not initialized (API Key missing), {output_path} is not cached.")
+            return False
+        else:
+            await rate_limiter.acquire(tokens=count_tokens(prompt))
+            print(f"Generating test for {output_path} using {MODEL_NAME}...")
+
+            test_code = await client.complete(prompt)
+            if not test_code:
+                raise ValueError("Model returned empty content.")
+
+            response_cache.put(MODEL_NAME, None, prompt, test_code)
 
         os.makedirs(os.path.dirname(output_path), exist_ok=True)
 
@@ -38,24 +60,26 @@ async def generate_test(prompt: str, output_path: str):
             await f.write(test_code)
 
         print(f"✅ Generated: {output_path}")
+        return True
 
     except Exception as e:
         print(f"❌ Error generating {output_path}: {e}")
+        return False
 
 
-async def main():
-    php_files = glob.glob("../app/**/*.php", recursive=True)
-    if not php_files:
-        print("⚠️ No PHP files found in ../app/")
-        return
+async def generate_tests():
+    found = 0
+    # app/ import graph: which classes each file uses, and their signatures
+    context = ImportGraph().build()
 
-    for file in php_files:
+    for file, stat in scan_files(INPUT_DIR):
+        found += 1
         basename = os.path.basename(file).replace(".php", "")
-        output_path = os.path.join("../Unit-Testing", f"{basename}-Test.php")
+        output_path = os.path.join(OUTPUT_DIR, f"{basename}-Test.php")
 
-        # Skip if test already exists
-        if os.path.exists(output_path):
-            print(f"⏭️ Skipping {file}: Test already exists at {output_path}")
+        # Skip unless the source or prompt template changed since the test was
+        # generated (or the test went missing); unchanged files cost one stat
+        if manifest.is_current(file, output_path, stat):
             continue
 
         print(f"🔍 Found file: {file}")
@@ -71,6 +95,9 @@ async def main():
             print(f"⏭️ Skipping empty file: {file}")
             continue
 
+        # Real signatures of the app/ classes this file uses, so mocks match them
+        dependencies = context.pack(file, CONTEXT_TOKENS)
+
         prompt = f"""
 You are an expert Laravel/PHP developer and tester specializing in white-box unit testing. Your task is to generate comprehensive Pest PHP unit tests for the functions and methods in the provided file.
 
@@ -81,24 +108,44 @@ Requirements:
 - Include comprehensive branch, condition, and logic coverage.
 - Include success, failure, and edge case tests for input parameters and internal state changes.
 - Use mocks (e.g., Mockery) and stubs extensively to isolate the class under test from its dependencies.
+- When mocking or calling the application classes listed under DEPENDENCY SIGNATURES, use only the methods, properties and constants shown there; do not invent others.
 - Return ONLY the clean, runnable PHP Pest test code block (no markdown code fences, no explanations, no extra text, and no imports or opening/closing PHP tags unless necessary for Pest).
 
+DEPENDENCY SIGNATURES (application classes this file references; bodies omitted):
+{dependencies or "(none)"}
+
 FILE CONTENT:
 {code}
 """
 
         # Run generation
-        await generate_test(prompt, output_path)
+        if await generate_test(prompt, output_path):
+            manifest.record(file, output_path)
 
-        # 🔥 RATE LIMIT: 10 RPM (wait 6 seconds)
-        print(f"⏳ Waiting {RATE_LIMIT_SECONDS}s for rate-limiting...")
-        await asyncio.sleep(RATE_LIMIT_SECONDS)
+    if not found:
+        print(f"⚠️ No PHP files found in {INPUT_DIR}")
+        return
+
+    # Tests whose app/ source was deleted or renamed are stale
+    for stale_path in manifest.prune():
+        print(f"🗑️ Removed stale test: {stale_path}")
+    manifest.save()
 
     print("\nAll test generation completed.")
 
 
+async def main():
+    try:
+        await generate_tests()
+    finally:
+        # Completed tests stay recorded even if the run is interrupted or fails
+        manifest.save()
+
+
 if __name__ == "__main__":
     if not API_KEY:
-        print("FATAL ERROR: GOOGLE_GEMINI_API_KEY is not set.")
-    else:
+        print("⚠️ GOOGLE_GEMINI_API_KEY is not set: only cached responses are used.")
         asyncio.run(main())
+    else:
+        # The pooled HTTP session is closed once main() is done
+        asyncio.run(client.run(main()))
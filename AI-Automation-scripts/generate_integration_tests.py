@@ -1,22 +1,38 @@
+import argparse
 import os
-import glob
 import aiofiles
 import asyncio
 import re
 from dotenv import load_dotenv
-from azure.ai.inference import ChatCompletionsClient
-from azure.ai.inference.models import SystemMessage, UserMessage
-from azure.core.credentials import AzureKeyCredential
+from llm_client import AzureInferenceClient
+from pest_blocks import pack_chunks, renumber_test_ids
+from prompt_batch import BATCH_INSTRUCTIONS, file_header, plan_jobs, split_batch
+from prompt_budget import Section, TESTS, build_prompt, count_tokens
+from rate_limiter import RateLimiter
+from regen_manifest import Manifest, scan_files
+from report_schemas import INTEGRATION_SCHEMA
+from response_cache import ResponseCache
+from result_store import jsonl_path_for, records_from_text, write_jsonl
 
 # ------------------ CONFIG ------------------
 MODEL_NAME = "openai/gpt-4.1"
-RATE_LIMIT_SECONDS = 6        # ~10 requests per minute
+REQUESTS_PER_MINUTE = 10      # Provider RPM budget
+TOKENS_PER_MINUTE = 60000     # Provider TPM budget (estimated prompt tokens)
+REQUEST_BURST = 1             # Requests allowed back-to-back before pacing kicks in
 # Adjust paths to be relative to project root (1 level up)
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 INPUT_DIR = os.path.join(PROJECT_ROOT, "tests/Integration-Testing")
 OUTPUT_DIR = os.path.join(PROJECT_ROOT, "tests/results")
 MAX_TOKENS_ALLOWED = 8000     # Hard limit before trimming
 TRIMMED_TARGET = 7800         # Target tokens after trimming
+CHUNK_NOTE_TOKENS = 50        # Room left in each chunk for the "part N of M" note
+MAX_CONCURRENT_REQUESTS = 4   # API calls in flight (chunks of one large file run concurrently)
+SYSTEM_MESSAGE = "You are a QA automation expert specializing in Integration Testing documentation."
+BATCH_SMALL_FILES = False     # Document small files several per request (also --batch)
+BATCH_MAX_FILE_TOKENS = 1500  # Files up to this size are batched
+BATCH_MAX_FILES = 6           # Files per batch request
+BATCH_TOKENS = 5000           # Code tokens per batch request (leaves room for the longer answer)
+PROMPT_TEMPLATE_VERSION = "1" # Bump when the prompt changes to regenerate every output
 
 # Ensure output folder exists
 os.makedirs(OUTPUT_DIR, exist_ok=True)
@@ -28,64 +44,26 @@ API_KEY = os.getenv("TOKEN_2")
 ENDPOINT = "https://models.github.ai/inference"
 
 # Initialize OpenAI client
-client = ChatCompletionsClient(
-    endpoint=ENDPOINT,
-    credential=AzureKeyCredential(API_KEY),
-) if API_KEY else None
+client = AzureInferenceClient(ENDPOINT, MODEL_NAME, API_KEY, MAX_CONCURRENT_REQUESTS) if API_KEY else None
 
+# Paces API calls by the provider's real limits instead of a fixed sleep per file
+rate_limiter = RateLimiter(REQUESTS_PER_MINUTE, TOKENS_PER_MINUTE, REQUEST_BURST)
 
-# ------------------ TOKEN COUNTER ------------------
-def estimate_tokens(text: str) -> int:
-    """Rough token estimator."""
-    return int(len(text) / 3.5)
+# Caps API calls in flight across the chunks of a large file
+api_slots = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
 
+# Responses keyed by (model, system message, prompt); identical prompts are never paid twice
+response_cache = ResponseCache()
 
-def trim_prompt_to_limit(prompt: str) -> str:
-    """Trim prompt to ~7800 tokens and append notice."""
-    tokens = estimate_tokens(prompt)
-    if tokens <= MAX_TOKENS_ALLOWED:
-        return prompt  # no trimming needed
+# Input hash / template version / output path of every generated file
+manifest = Manifest("integration-tests", PROMPT_TEMPLATE_VERSION)
 
-    print(f"⚠️ Prompt too long ({tokens} tokens). Trimming to {TRIMMED_TARGET} tokens...")
 
-    # Approximate character cutoff to reach target tokens
-    target_chars = int(TRIMMED_TARGET * 3.5)
-
-    trimmed = prompt[:target_chars].rstrip()
-
-    trimmed += "\n\n[PROMPT TOO LONG — TRIMMED, ANALYZE WHAT YOU CAN]\n"
-
-    return trimmed
-
-
-# ------------------ FUNCTIONS ------------------
-def extract_initials(filename: str) -> str:
-    """
-    Extract capital letters from filename to create test case prefix.
-    Example: 'CustomerController-Test.php' -> 'CCT'
-    """
-    # Remove .php extension and split by dash/underscore
-    base = filename.replace('.php', '').replace('-Test', '')
-    
-    # Extract capital letters
-    capitals = ''.join([c for c in base if c.isupper()])
-    
-    # If no capitals found, we might want to just uppercase the first 3 chars
-    if not capitals:
-        capitals = base[:3].upper()
-    
-    return capitals
-
-
-async def generate_integration_test_cases(file_path: str, code: str, test_prefix: str, output_path: str) -> bool:
-    """Generate Integration test cases using OpenAI API."""
-    if not client:
-        print("❌ OpenAI client not initialized.")
-        return False
-
-    # Note: Structure of ID is TC-{test_prefix}-001
-    # test_prefix passed in will already contain "Adm-UT" or "Cust-PT" or just "AT"
-    prompt = f"""
+# ------------------ PROMPT ------------------
+# Every prompt starts with the same INSTRUCTIONS (no per-file values in them),
+# so the provider can serve that prefix from its prompt cache; the file name,
+# ID prefix and code follow it.
+INSTRUCTIONS = """
 Analyze the following PHP Integration Test file and generate detailed integration-test documentation for each test case. Follow the IEEE-829-2008 (Software Test Documentation Standard) concepts, but use the merged integration-testing format defined below.
 
 You must infer meaningful scenario names and the real business behavior validated by each test (not just the test function name). If the test contains mocks or stubs, the documentation should still describe the expected integrated behavior at the system level.
@@ -94,7 +72,7 @@ For EACH test() or it() function in the file, generate the following output bloc
 
 Integration-Testing:
 Test ID
-TC-{test_prefix}-001 (increment sequentially per test case)
+TC-<PREFIX>-001 (<PREFIX> is the test case ID prefix given with the file; increment sequentially per test case)
 Title
 [Brief title describing what the test verifies]
 Objective
@@ -151,131 +129,283 @@ IMPORTANT RULES:
 
 10. Use Severity to indicate the importance of the test (e.g., High for login, Medium for optional APIs, Low for minor endpoints).
 
-FILE TO ANALYZE:
-{code}
-    """
+"""
+CLOSING = "\n    "
+
+
+def file_intro(filename: str, test_prefix: str, note: str = "") -> str:
+    return f"FILE TO ANALYZE: {filename}\nTest case ID prefix: {test_prefix}{note}\n\n"
 
-    # Estimate tokens before trimming
-    initial_tokens = estimate_tokens(prompt)
+
+# ------------------ FUNCTIONS ------------------
+def extract_initials(filename: str) -> str:
+    """
+    Extract capital letters from filename to create test case prefix.
+    Example: 'CustomerController-Test.php' -> 'CCT'
+    """
+    # Remove .php extension and split by dash/underscore
+    base = filename.replace('.php', '').replace('-Test', '')
+    
+    # Extract capital letters
+    capitals = ''.join([c for c in base if c.isupper()])
+    
+    # If no capitals found, we might want to just uppercase the first 3 chars
+    if not capitals:
+        capitals = base[:3].upper()
     
-    # Trim if needed
-    prompt = trim_prompt_to_limit(prompt)
+    return capitals
 
-    print(f"🔧 Sending {os.path.basename(file_path)} to OpenAI...")
 
-    try:
-        response = await asyncio.to_thread(
-            lambda: client.complete(
-                messages=[
-                    SystemMessage("You are a QA automation expert specializing in Integration Testing documentation."),
-                    UserMessage(prompt)
-                ],
-                model=MODEL_NAME
-            )
-        )
-    except Exception as e:
-        print(f"❌ OpenAI API Error: {e}")
-        return False
+async def request_documentation(label: str, prompt: str, refresh: bool = False) -> str:
+    """
+    Send one prompt (or serve it from the cache). Returns the response text or None.
+    With `refresh`, the cached response is ignored and replaced (it parsed badly).
+    """
+    test_cases = None if refresh else response_cache.get(MODEL_NAME, SYSTEM_MESSAGE, prompt)
+    if test_cases is not None:
+        print(f"💾 Cache hit for {label}, skipping API call.")
+        return test_cases
+    if not client:
+        print(f"❌ OpenAI client not initialized, {label} is not cached.")
+        return None
 
-    try:
-        test_cases = response.choices[0].message.content.strip()
-    except:
-        print("⚠️ Empty response from API.")
-        return False
+    async with api_slots:
+        await rate_limiter.acquire(tokens=count_tokens(prompt))
+        print(f"🔧 Sending {label} to OpenAI...")
+
+        try:
+            test_cases = await client.complete(prompt, system=SYSTEM_MESSAGE)
+        except Exception as e:
+            print(f"❌ OpenAI API Error: {e}")
+            return None
 
     if not test_cases:
         print("⚠️ Model returned empty content.")
+        return None
+
+    response_cache.put(MODEL_NAME, SYSTEM_MESSAGE, prompt, test_cases)
+    return test_cases
+
+
+async def generate_integration_test_cases(file_path: str, code: str, test_prefix: str, output_path: str,
+                                          refresh: bool = False) -> bool:
+    """Generate Integration test cases using OpenAI API (`refresh`: bypass cached responses)."""
+    filename = os.path.basename(file_path)
+
+    # Files over the limit are split into chunks of whole tests, documented
+    # concurrently and stitched back together, instead of being truncated
+    fixed_tokens = count_tokens(INSTRUCTIONS) + count_tokens(file_intro(filename, test_prefix)) + count_tokens(CLOSING)
+    if fixed_tokens + count_tokens(code) <= MAX_TOKENS_ALLOWED:
+        chunks = [(code, 0)]
+    else:
+        chunks = pack_chunks(code, TRIMMED_TARGET - fixed_tokens - CHUNK_NOTE_TOKENS, count_tokens)
+
+    requests = []
+    for part, (chunk_code, first_test) in enumerate(chunks, start=1):
+        if len(chunks) == 1:
+            label, note = filename, ""
+        else:
+            label = f"{filename} [part {part}/{len(chunks)}]"
+            note = (f"\n(This is part {part} of {len(chunks)} of the file. "
+                    f"Number its test cases starting from TC-{test_prefix}-{first_test + 1:03d}.)")
+        # Instructions are never cut; the code is cut at whole-test boundaries
+        prompt = build_prompt([
+            Section(INSTRUCTIONS),
+            Section(file_intro(filename, test_prefix, note)),
+            Section(chunk_code, TESTS),
+            Section(CLOSING),
+        ], MAX_TOKENS_ALLOWED, TRIMMED_TARGET)
+        requests.append(request_documentation(label, prompt, refresh))
+
+    if len(chunks) > 1:
+        print(f"🧩 {filename} split into {len(chunks)} chunks")
+    results = await asyncio.gather(*requests)
+
+    # A missing part would silently drop tests; finished parts stay cached
+    if any(result is None for result in results):
         return False
 
-    # Save to output folder (path passed in)
+    test_cases = "\n\n".join(results)
+    if len(chunks) > 1:
+        test_cases = renumber_test_ids(test_cases, id_pattern_for(test_prefix))
+    await save_documentation(file_path, test_cases, output_path)
+    return True
+
+
+def id_pattern_for(test_prefix: str):
+    return re.compile(r"^(\s*TC-" + re.escape(test_prefix) + r"-)(\d+)", re.MULTILINE)
+
+
+async def save_documentation(file_path: str, test_cases: str, output_path: str):
+    """Write the documentation of one file, plus its structured JSONL copy."""
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
     async with aiofiles.open(output_path, "w", encoding="utf-8") as f:
         await f.write(test_cases)
+    # Structured copy (one JSON line per test case) for the merge/report stage
+    source = os.path.relpath(file_path, PROJECT_ROOT).replace("\\", "/")
+    write_jsonl(jsonl_path_for(output_path), records_from_text(INTEGRATION_SCHEMA, test_cases), source=source)
 
     print(f"✅ Test cases saved: {output_path}")
-    return True
 
 
-async def main():
-    # Recursively find all PHP files
-    php_test_files = glob.glob(f"{INPUT_DIR}/**/*.php", recursive=True)
+async def document_batch(files: list) -> list:
+    """
+    Document several small files, given as (file_path, code), with one
+    request. Returns the files that were not written (the request failed, or
+    their section of the response is missing or does not parse); the caller
+    documents those one by one.
+    """
+    # Headers carry the path below INPUT_DIR: Admin/ and Customer/ reuse basenames
+    names = {file_path: rel_name(file_path) for file_path, _ in files}
+    body = "".join(f"\n{file_header(names[file_path])}\nTest case ID prefix: {test_prefix_for(file_path)}\n\n"
+                   f"{code.rstrip()}\n" for file_path, code in files)
+    # Same INSTRUCTIONS prefix as the single-file prompts; only the file list varies
+    prompt = INSTRUCTIONS + BATCH_INSTRUCTIONS + "\nFILES TO ANALYZE:\n" + body + CLOSING
+    label = f"batch of {len(files)} ({', '.join(names.values())})"
+    refresh = any(manifest.is_flagged(file_path) for file_path, _ in files)
+
+    response = await request_documentation(label, prompt, refresh)
+    if response is None:
+        return [file_path for file_path, _ in files]
+
+    sections = split_batch(response, list(names.values()))
+    left = []
+    for file_path, _ in files:
+        test_cases = sections.get(names[file_path])
+        if test_cases:
+            test_cases = renumber_test_ids(test_cases, id_pattern_for(test_prefix_for(file_path)))
+        if not test_cases or not records_from_text(INTEGRATION_SCHEMA, test_cases):
+            left.append(file_path)
+            continue
+        await save_documentation(file_path, test_cases, output_path_for(file_path))
+        manifest.record(file_path, output_path_for(file_path))
+    if left:
+        print(f"↩️ {len(left)} of {len(files)} files missing from the batch response, documenting them one by one")
+    return left
 
-    if not php_test_files:
-        print(f"⚠️ No PHP test files found in {INPUT_DIR}")
-        return
 
-    print(f"📁 Found {len(php_test_files)} test files in {INPUT_DIR}")
-    processed = 0
-    skipped = 0
+def rel_name(file_path: str) -> str:
+    # e.g., tests/Integration-Testing/Admin/UserTest.php -> Admin/UserTest.php
+    return os.path.relpath(file_path, INPUT_DIR).replace('\\', '/')
 
-    for file_path in php_test_files:
-        # Determine relative path and directory structure
-        # e.g., tests/Integration-Testing/Admin/UserTest.php -> Admin/UserTest.php
-        rel_path = os.path.relpath(file_path, INPUT_DIR)
-        dir_name = os.path.dirname(rel_path) # "Admin" or "Customer" or ""
-        filename = os.path.basename(file_path)
-
-        # 1. Output Directory Logic -> Mirror Structure
-        target_dir = os.path.join(OUTPUT_DIR, dir_name)
-        os.makedirs(target_dir, exist_ok=True)
-        
-        # Output filename
-        base_name = filename.replace('.php', '.txt')
-        output_path = os.path.join(target_dir, base_name)
-        
-        # 2. Skip Logic -> check if output file exists in the MIRRORED location
-        if os.path.exists(output_path):
-            print(f"⏭️ Skipping {rel_path}: already processed")
-            skipped += 1
-            continue
 
-        print(f"\n🔍 Processing: {file_path}")
-        
-        # 3. Prefix Logic
-        initials = extract_initials(filename)
-        
-        # Normalize for checking "Admin" or "Customer"
-        # dir_name might be "Admin" or "Admin\Subfolder" on windows
-        normalized_dir = dir_name.replace('\\', '/')
-        
-        if "Admin" in normalized_dir:
-            test_prefix = f"Adm-{initials}"
-        elif "Customer" in normalized_dir:
-            test_prefix = f"Cust-{initials}"
-        else:
-            # Root file or other folder -> No extra prefix, just initials
-            test_prefix = initials
+def output_path_for(file_path: str) -> str:
+    """Output location mirrors the input structure: Admin/UserTest.php -> results/Admin/UserTest.txt"""
+    rel_path = os.path.relpath(file_path, INPUT_DIR)
+    return os.path.join(OUTPUT_DIR, rel_path[:-len('.php')] + '.txt')
 
-        print(f"   Structure: {dir_name if dir_name else '(Root)'}")
-        print(f"   Test Prefix: {test_prefix}")
 
-        # Read PHP test file
-        try:
-            async with aiofiles.open(file_path, "r", encoding="utf-8") as f:
-                code = await f.read()
-        except Exception as e:
-            print(f"❌ Cannot read file: {e}")
-            continue
+def test_prefix_for(file_path: str) -> str:
+    """Test ID prefix: initials, with "Adm-" / "Cust-" for the Admin and Customer folders."""
+    initials = extract_initials(os.path.basename(file_path))
 
-        if not code.strip():
-            print(f"⏭️ Empty file, skipping.")
-            continue
+    # "Admin", "Customer" or e.g. "Admin/Subfolder" (rel_name normalizes Windows separators)
+    normalized_dir = os.path.dirname(rel_name(file_path))
 
-        # Generate Test Cases
-        try:
-            # We pass the calculated test_prefix and the specific output_path
-            success = await generate_integration_test_cases(file_path, code, test_prefix, output_path)
-            if success:
-                processed += 1
-        except asyncio.TimeoutError:
-            print(f"⛔ API call timed out, skipping this file.")
-            continue
-        except Exception as e:
-            print(f"❌ Error processing file: {e}")
+    if "Admin" in normalized_dir:
+        return f"Adm-{initials}"
+    elif "Customer" in normalized_dir:
+        return f"Cust-{initials}"
+    # Root file or other folder -> No extra prefix, just initials
+    return initials
+
+
+async def process_file(file_path: str) -> bool:
+    """Read one integration test file and document it. Returns True when output was written."""
+    print(f"\n🔍 Processing: {file_path}")
+
+    dir_name = os.path.dirname(rel_name(file_path))
+    test_prefix = test_prefix_for(file_path)
+    print(f"   Structure: {dir_name if dir_name else '(Root)'}")
+    print(f"   Test Prefix: {test_prefix}")
+
+    # Read PHP test file
+    try:
+        async with aiofiles.open(file_path, "r", encoding="utf-8") as f:
+            code = await f.read()
+    except Exception as e:
+        print(f"❌ Cannot read file: {e}")
+        return False
+
+    if not code.strip():
+        print(f"⏭️ Empty file, skipping.")
+        return False
+
+    # Generate Test Cases
+    try:
+        # Outputs flagged as malformed by check_results.py must not come back from the cache
+        output_path = output_path_for(file_path)
+        success = await generate_integration_test_cases(file_path, code, test_prefix, output_path,
+                                                        refresh=manifest.is_flagged(file_path))
+        if success:
+            manifest.record(file_path, output_path)
+        return success
+    except asyncio.TimeoutError:
+        print(f"⛔ API call timed out, skipping this file.")
+    except Exception as e:
+        print(f"❌ Error processing file: {e}")
+    return False
+
+
+async def process_batch(files: list) -> int:
+    """Document a batch of (file_path, code); files the batch missed get their own request."""
+    print(f"\n📦 Batch: {', '.join(rel_name(file_path) for file_path, _ in files)}")
+    try:
+        left = await document_batch(files)
+    except Exception as e:
+        print(f"❌ Error processing batch: {e}")
+        left = [file_path for file_path, _ in files]
+    processed = len(files) - len(left)
+    for file_path in left:
+        processed += await process_file(file_path)
+    return processed
+
+
+async def main(batch: bool = BATCH_SMALL_FILES):
+    print(f"📁 Scanning {INPUT_DIR}")
+    found = 0
+    processed = 0
+    skipped = 0
+    pending = []
+
+    # Recursively find all PHP files
+    for file_path, stat in scan_files(INPUT_DIR):
+        found += 1
+        # Skip Logic -> the manifest knows whether the output in the MIRRORED
+        # location is still valid (same source hash and prompt template version).
+        if manifest.is_current(file_path, output_path_for(file_path), stat):
+            skipped += 1
             continue
+        pending.append(file_path)
 
-        # Rate limiting
-        print(f"⏳ Waiting {RATE_LIMIT_SECONDS}s for rate limit...")
-        await asyncio.sleep(RATE_LIMIT_SECONDS)
+    if not found:
+        print(f"⚠️ No PHP test files found in {INPUT_DIR}")
+        return
+
+    if batch:
+        jobs = plan_jobs(pending, count_tokens, BATCH_MAX_FILE_TOKENS, BATCH_TOKENS, BATCH_MAX_FILES)
+        print(f"📦 {sum(len(job) for job in jobs if len(job) > 1)} small files in "
+              f"{sum(1 for job in jobs if len(job) > 1)} batch requests, "
+              f"{sum(1 for job in jobs if len(job) == 1)} files on their own")
+    else:
+        jobs = [[(file_path, None)] for file_path in pending]
+
+    try:
+        for job in jobs:
+            if len(job) == 1:
+                processed += await process_file(job[0][0])
+            else:
+                processed += await process_batch(job)
+    finally:
+        # Completed files stay recorded even if the run is interrupted
+        manifest.save()
+
+    # Outputs whose source test was deleted or renamed are stale
+    for stale_path in manifest.prune():
+        print(f"🗑️ Removed stale output: {stale_path}")
+        if os.path.exists(jsonl_path_for(stale_path)):
+            os.remove(jsonl_path_for(stale_path))
+    manifest.save()
 
     print(f"\n🎉 Processing complete!")
     print(f"   ✅ Processed: {processed} files")
@@ -285,8 +415,16 @@ async def main():
 
 # ------------------ ENTRY POINT ------------------
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate integration test documentation for the Pest integration tests.")
+    parser.add_argument("--batch", action="store_true",
+                        help=f"Document files of up to {BATCH_MAX_FILE_TOKENS} tokens several per request")
+    args = parser.parse_args()
+
+    batch = args.batch or BATCH_SMALL_FILES
     if not API_KEY:
-        print("FATAL: NEWER_TOKEN is missing.")
-        print("Please set NEWER_TOKEN in your .env file")
+        print("⚠️ NEWER_TOKEN is missing: only cached responses are used.")
+        print("Please set NEWER_TOKEN in your .env file to document uncached files")
+        asyncio.run(main(batch=batch))
     else:
-        asyncio.run(main())
+        # The pooled HTTP session is closed once main() is done
+        asyncio.run(client.run(main(batch=batch)))
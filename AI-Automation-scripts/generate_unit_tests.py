@@ -1,22 +1,38 @@
+import argparse
 import os
-import glob
 import aiofiles
 import asyncio
 import re
 from dotenv import load_dotenv
-from azure.ai.inference import ChatCompletionsClient
-from azure.ai.inference.models import SystemMessage, UserMessage
-from azure.core.credentials import AzureKeyCredential
+from llm_client import AzureInferenceClient
+from pest_blocks import pack_chunks, renumber_test_ids
+from prompt_batch import BATCH_INSTRUCTIONS, file_header, plan_jobs, split_batch
+from prompt_budget import Section, TESTS, build_prompt, count_tokens
+from rate_limiter import RateLimiter
+from regen_manifest import Manifest, scan_files
+from report_schemas import UNIT_SCHEMA
+from response_cache import ResponseCache
+from result_store import jsonl_path_for, records_from_text, write_jsonl
 
 # ------------------ CONFIG ------------------
 MODEL_NAME = "openai/gpt-4.1"
-RATE_LIMIT_SECONDS = 6        # ~10 requests per minute
+REQUESTS_PER_MINUTE = 10      # Provider RPM budget shared by all workers
+TOKENS_PER_MINUTE = 60000     # Provider TPM budget (estimated prompt tokens)
+REQUEST_BURST = 1             # Requests allowed back-to-back before pacing kicks in
+MAX_CONCURRENT_REQUESTS = 4   # Number of in-flight API calls (worker pool size)
 # Adjust paths to be relative to project root (1 level up)
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 INPUT_DIR = os.path.join(PROJECT_ROOT, "tests/Unit-Testing")
 OUTPUT_DIR = os.path.join(PROJECT_ROOT, "tests/results-openai")
 MAX_TOKENS_ALLOWED = 8000     # Hard limit before trimming
 TRIMMED_TARGET = 7800         # Target tokens after trimming
+CHUNK_NOTE_TOKENS = 50        # Room left in each chunk for the "part N of M" note
+SYSTEM_MESSAGE = "You are a software testing expert specializing in IEEE 829-2008 test case documentation."
+PROMPT_TEMPLATE_VERSION = "1" # Bump when the prompt changes to regenerate every output
+BATCH_SMALL_FILES = False     # Document small files several per request (also --batch)
+BATCH_MAX_FILE_TOKENS = 1500  # Files up to this size are batched
+BATCH_MAX_FILES = 6           # Files per batch request
+BATCH_TOKENS = 5000           # Code tokens per batch request (leaves room for the longer answer)
 
 # Ensure output folder exists
 os.makedirs(OUTPUT_DIR, exist_ok=True)
@@ -28,68 +44,32 @@ API_KEY = os.getenv("TOKEN_2")
 ENDPOINT = "https://models.github.ai/inference"
 
 # Initialize OpenAI client
-client = ChatCompletionsClient(
-    endpoint=ENDPOINT,
-    credential=AzureKeyCredential(API_KEY),
-) if API_KEY else None
+client = AzureInferenceClient(ENDPOINT, MODEL_NAME, API_KEY, MAX_CONCURRENT_REQUESTS) if API_KEY else None
 
+# Shared by every worker so the pool as a whole respects the provider limits
+rate_limiter = RateLimiter(REQUESTS_PER_MINUTE, TOKENS_PER_MINUTE, REQUEST_BURST)
 
-# ------------------ TOKEN COUNTER ------------------
-def estimate_tokens(text: str) -> int:
-    """Rough token estimator."""
-    return int(len(text) / 3.5)
+# Caps API calls in flight, including the chunks of one large file
+api_slots = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
 
+# Responses keyed by (model, system message, prompt); identical prompts are never paid twice
+response_cache = ResponseCache()
 
-def trim_prompt_to_limit(prompt: str) -> str:
-    """Trim prompt to ~7800 tokens and append notice."""
-    tokens = estimate_tokens(prompt)
-    if tokens <= MAX_TOKENS_ALLOWED:
-        return prompt  # no trimming needed
+# Input hash / template version / output path of every generated file
+manifest = Manifest("unit-tests", PROMPT_TEMPLATE_VERSION)
 
-    print(f"⚠️ Prompt too long ({tokens} tokens). Trimming to {TRIMMED_TARGET} tokens...")
 
-    # Approximate character cutoff to reach target tokens
-    target_chars = int(TRIMMED_TARGET * 3.5)
-
-    trimmed = prompt[:target_chars].rstrip()
-
-    trimmed += "\n\n[PROMPT TOO LONG — TRIMMED, ANALYZE WHAT YOU CAN]\n"
-
-    return trimmed
-
-
-# ------------------ FUNCTIONS ------------------
-def extract_initials(filename: str) -> str:
-    """
-    Extract capital letters from filename to create test case prefix.
-    Example: 'CustomerController-Test.php' -> 'CCT'
-    """
-    # Remove .php extension and split by dash/underscore
-    base = filename.replace('.php', '').replace('-Test', '')
-    
-    # Extract capital letters
-    capitals = ''.join([c for c in base if c.isupper()])
-    
-    # If no capitals found, use first 3 chars
-    if not capitals:
-        capitals = base[:3].upper()
-    
-    return capitals
-
-
-async def generate_ieee_test_cases(file_path: str, code: str, test_prefix: str) -> bool:
-    """Generate IEEE-format test cases using OpenAI API."""
-    if not client:
-        print("❌ OpenAI client not initialized.")
-        return False
-
-    prompt = f"""
+# ------------------ PROMPT ------------------
+# Every prompt starts with the same INSTRUCTIONS (no per-file values in them),
+# so the provider can serve that prefix from its prompt cache; the file name,
+# ID prefix and code follow it.
+INSTRUCTIONS = """
 Analyze the following PHP Pest test file and generate IEEE 829-2008 standard test case documentation.
 
 For EACH test case in the file, generate the following format:
 
 ================================================================================
-Test Case ID: {test_prefix}-001
+Test Case ID: <PREFIX>-001
 Title: [Brief title of what the test does]
 Objective: [What this test verifies]
 Preconditions:
@@ -123,7 +103,7 @@ High / Medium / Low
 IMPORTANT RULES:
 1. Generate ONE test case block for EACH test() or it() function in the code
 2. Increment the test case number (001, 002, 003, etc.) for each test
-3. Use the prefix "{test_prefix}" for all test case IDs
+3. Use the test case ID prefix given with the file (<PREFIX> above) for all test case IDs
 4. Be specific and detailed in test steps
 5. Extract actual test data from the code
 6. Determine severity based on what's being tested (auth/payment = High, UI = Medium, etc.)
@@ -133,114 +113,290 @@ IMPORTANT RULES:
 10. If a test has multiple assertions, list them as separate expected results
 
 Note: All test cases pass actually, so the Actual Result should match Expected Result.make something up that fits.
-FILE TO ANALYZE:
-{code}
-
-Generate the IEEE test case documentation now:
 """
+CLOSING = "\n\nGenerate the IEEE test case documentation now:\n"
 
-    # Estimate tokens before trimming
-    initial_tokens = estimate_tokens(prompt)
-    print(f"🔢 Estimated prompt tokens: {initial_tokens}")
 
-    # Trim if needed
-    prompt = trim_prompt_to_limit(prompt)
+def file_intro(filename: str, test_prefix: str, note: str = "") -> str:
+    return f"FILE TO ANALYZE: {filename}\nTest case ID prefix: {test_prefix}{note}\n\n"
 
-    trimmed_tokens = estimate_tokens(prompt)
-    print(f"✂️ Tokens AFTER trimming: {trimmed_tokens}")
 
-    print(f"🔧 Sending {os.path.basename(file_path)} to OpenAI...")
+# ------------------ FUNCTIONS ------------------
+def extract_initials(filename: str) -> str:
+    """
+    Extract capital letters from filename to create test case prefix.
+    Example: 'CustomerController-Test.php' -> 'CCT'
+    """
+    # Remove .php extension and split by dash/underscore
+    base = filename.replace('.php', '').replace('-Test', '')
+    
+    # Extract capital letters
+    capitals = ''.join([c for c in base if c.isupper()])
+    
+    # If no capitals found, use first 3 chars
+    if not capitals:
+        capitals = base[:3].upper()
+    
+    return capitals
 
-    try:
-        response = await asyncio.to_thread(
-            lambda: client.complete(
-                messages=[
-                    SystemMessage("You are a software testing expert specializing in IEEE 829-2008 test case documentation."),
-                    UserMessage(prompt)
-                ],
-                model=MODEL_NAME
-            )
-        )
-    except Exception as e:
-        print(f"❌ OpenAI API Error: {e}")
-        return False
 
-    try:
-        test_cases = response.choices[0].message.content.strip()
-    except:
-        print("⚠️ Empty response from API.")
-        return False
+async def request_documentation(label: str, prompt: str, refresh: bool = False) -> str:
+    """
+    Send one prompt (or serve it from the cache). Returns the response text or None.
+    With `refresh`, the cached response is ignored and replaced (it parsed badly).
+    """
+    test_cases = None if refresh else response_cache.get(MODEL_NAME, SYSTEM_MESSAGE, prompt)
+    if test_cases is not None:
+        print(f"💾 Cache hit for {label}, skipping API call.")
+        return test_cases
+    if not client:
+        print(f"❌ OpenAI client not initialized, {label} is not cached.")
+        return None
+
+    prompt_tokens = count_tokens(prompt)
+    print(f"✂️ Tokens AFTER trimming: {prompt_tokens}")
+
+    async with api_slots:
+        await rate_limiter.acquire(tokens=prompt_tokens)
+        print(f"🔧 Sending {label} to OpenAI...")
+
+        try:
+            test_cases = await client.complete(prompt, system=SYSTEM_MESSAGE)
+        except Exception as e:
+            print(f"❌ OpenAI API Error: {e}")
+            return None
 
     if not test_cases:
         print("⚠️ Model returned empty content.")
+        return None
+
+    response_cache.put(MODEL_NAME, SYSTEM_MESSAGE, prompt, test_cases)
+    return test_cases
+
+
+async def generate_ieee_test_cases(file_path: str, code: str, test_prefix: str, refresh: bool = False) -> bool:
+    """Generate IEEE-format test cases using OpenAI API."""
+    filename = os.path.basename(file_path)
+
+    # Count tokens before trimming
+    fixed_tokens = count_tokens(INSTRUCTIONS) + count_tokens(file_intro(filename, test_prefix)) + count_tokens(CLOSING)
+    initial_tokens = fixed_tokens + count_tokens(code)
+    print(f"🔢 Estimated prompt tokens: {initial_tokens}")
+
+    # Files over the limit are split into chunks of whole tests, documented
+    # concurrently and stitched back together, instead of being truncated
+    if initial_tokens <= MAX_TOKENS_ALLOWED:
+        chunks = [(code, 0)]
+    else:
+        chunks = pack_chunks(code, TRIMMED_TARGET - fixed_tokens - CHUNK_NOTE_TOKENS, count_tokens)
+
+    requests = []
+    for part, (chunk_code, first_test) in enumerate(chunks, start=1):
+        if len(chunks) == 1:
+            label, note = filename, ""
+        else:
+            label = f"{filename} [part {part}/{len(chunks)}]"
+            note = (f"\n(This is part {part} of {len(chunks)} of the file. "
+                    f"Number its test cases starting from {test_prefix}-{first_test + 1:03d}.)")
+        # Instructions are never cut; the code is cut at whole-test boundaries
+        prompt = build_prompt([
+            Section(INSTRUCTIONS),
+            Section(file_intro(filename, test_prefix, note)),
+            Section(chunk_code, TESTS),
+            Section(CLOSING),
+        ], MAX_TOKENS_ALLOWED, TRIMMED_TARGET)
+        requests.append(request_documentation(label, prompt, refresh))
+
+    if len(chunks) > 1:
+        print(f"🧩 {filename} split into {len(chunks)} chunks")
+    results = await asyncio.gather(*requests)
+
+    # A missing part would silently drop tests; finished parts stay cached
+    if any(result is None for result in results):
         return False
 
-    # Save to output folder
-    base_name = os.path.basename(file_path).replace('.php', '.txt')
-    output_path = os.path.join(OUTPUT_DIR, base_name)
-    
+    test_cases = "\n\n".join(results)
+    if len(chunks) > 1:
+        test_cases = renumber_test_ids(test_cases, id_pattern_for(test_prefix))
+    await save_documentation(file_path, test_cases)
+    return True
+
+
+def id_pattern_for(test_prefix: str):
+    return re.compile(r"^(Test Case ID:\s*" + re.escape(test_prefix) + r"-)(\d+)", re.MULTILINE)
+
+
+async def save_documentation(file_path: str, test_cases: str):
+    """Write the documentation of one file, plus its structured JSONL copy."""
+    output_path = output_path_for(file_path)
+
     async with aiofiles.open(output_path, "w", encoding="utf-8") as f:
         await f.write(test_cases)
+    # Structured copy (one JSON line per test case) for the merge/report stage
+    source = os.path.relpath(file_path, PROJECT_ROOT).replace("\\", "/")
+    write_jsonl(jsonl_path_for(output_path), records_from_text(UNIT_SCHEMA, test_cases), source=source)
 
     print(f"✅ Test cases saved: {output_path}")
-    return True
 
 
-async def main():
-    php_test_files = glob.glob(f"{INPUT_DIR}/**/*.php", recursive=True)
+async def document_batch(files: list) -> list:
+    """
+    Document several small files, given as (file_path, code), with one
+    request. Returns the files that were not written (the request failed, or
+    their section of the response is missing or does not parse); the caller
+    documents those one by one.
+    """
+    prefixes = {file_path: extract_initials(os.path.basename(file_path)) for file_path, _ in files}
+    body = "".join(f"\n{file_header(os.path.basename(file_path))}\nTest case ID prefix: {prefixes[file_path]}\n\n"
+                   f"{code.rstrip()}\n" for file_path, code in files)
+    # Same INSTRUCTIONS prefix as the single-file prompts; only the file list varies
+    prompt = INSTRUCTIONS + BATCH_INSTRUCTIONS + "\nFILES TO ANALYZE:\n" + body + CLOSING
+    label = f"batch of {len(files)} ({', '.join(os.path.basename(file_path) for file_path, _ in files)})"
+    refresh = any(manifest.is_flagged(file_path) for file_path, _ in files)
+
+    response = await request_documentation(label, prompt, refresh)
+    if response is None:
+        return [file_path for file_path, _ in files]
+
+    sections = split_batch(response, [os.path.basename(file_path) for file_path, _ in files])
+    left = []
+    for file_path, _ in files:
+        test_cases = sections.get(os.path.basename(file_path))
+        if test_cases:
+            test_cases = renumber_test_ids(test_cases, id_pattern_for(prefixes[file_path]))
+        if not test_cases or not records_from_text(UNIT_SCHEMA, test_cases):
+            left.append(file_path)
+            continue
+        await save_documentation(file_path, test_cases)
+        manifest.record(file_path, output_path_for(file_path))
+    if left:
+        print(f"↩️ {len(left)} of {len(files)} files missing from the batch response, documenting them one by one")
+    return left
 
-    if not php_test_files:
-        print(f"⚠️ No PHP test files found in {INPUT_DIR}")
-        return
 
-    print(f"📁 Found {len(php_test_files)} test files")
-    processed = 0
-    skipped = 0
+def output_path_for(file_path: str) -> str:
+    base_name = os.path.basename(file_path).replace('.php', '.txt')
+    return os.path.join(OUTPUT_DIR, base_name)
 
-    for file_path in php_test_files:
-        # --- SKIP LOGIC: Skip if output file already exists ---
-        base_name = os.path.basename(file_path).replace('.php', '.txt')
-        output_path = os.path.join(OUTPUT_DIR, base_name)
-        
-        if os.path.exists(output_path):
-            print(f"⏭️ Skipping {file_path}: already processed")
-            skipped += 1
-            continue
 
-        print(f"\n🔍 Processing: {file_path}")
+async def process_file(file_path: str) -> bool:
+    """Read one Pest file and document it. Returns True when output was written."""
+    print(f"\n🔍 Processing: {file_path}")
 
-        # Extract test case prefix from filename
-        filename = os.path.basename(file_path)
-        test_prefix = extract_initials(filename)
-        print(f"   Test Prefix: {test_prefix}")
+    # Extract test case prefix from filename
+    filename = os.path.basename(file_path)
+    test_prefix = extract_initials(filename)
+    print(f"   Test Prefix: {test_prefix}")
 
-        # Read PHP test file
-        try:
-            async with aiofiles.open(file_path, "r", encoding="utf-8") as f:
-                code = await f.read()
-        except Exception as e:
-            print(f"❌ Cannot read file: {e}")
-            continue
+    # Read PHP test file
+    try:
+        async with aiofiles.open(file_path, "r", encoding="utf-8") as f:
+            code = await f.read()
+    except Exception as e:
+        print(f"❌ Cannot read file: {e}")
+        return False
 
-        if not code.strip():
-            print(f"⏭️ Empty file, skipping.")
-            continue
+    if not code.strip():
+        print(f"⏭️ Empty file, skipping.")
+        return False
 
-        # Generate IEEE test cases
+    # Generate IEEE test cases
+    try:
+        # Outputs flagged as malformed by check_results.py must not come back from the cache
+        success = await generate_ieee_test_cases(file_path, code, test_prefix, refresh=manifest.is_flagged(file_path))
+        if success:
+            manifest.record(file_path, output_path_for(file_path))
+        return success
+    except asyncio.TimeoutError:
+        print(f"⛔ API call timed out, skipping this file.")
+    except Exception as e:
+        print(f"❌ Error processing file: {e}")
+    return False
+
+
+async def process_batch(files: list) -> list:
+    """Document a batch of (file_path, code); files the batch missed get their own request."""
+    print(f"\n📦 Batch: {', '.join(os.path.basename(file_path) for file_path, _ in files)}")
+    try:
+        left = await document_batch(files)
+    except Exception as e:
+        print(f"❌ Error processing batch: {e}")
+        left = [file_path for file_path, _ in files]
+    results = [True] * (len(files) - len(left))
+    for file_path in left:
+        results.append(await process_file(file_path))
+    return results
+
+
+async def worker(queue: asyncio.Queue, results: list):
+    """Pull jobs (one file, or a batch of small files) off the shared queue until it is drained."""
+    while True:
         try:
-            success = await generate_ieee_test_cases(file_path, code, test_prefix)
-            if success:
-                processed += 1
-        except asyncio.TimeoutError:
-            print(f"⛔ API call timed out, skipping this file.")
-            continue
-        except Exception as e:
-            print(f"❌ Error processing file: {e}")
+            job = queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+        try:
+            if len(job) == 1:
+                results.append(await process_file(job[0][0]))
+            else:
+                results.extend(await process_batch(job))
+        finally:
+            queue.task_done()
+
+
+async def main(batch: bool = BATCH_SMALL_FILES):
+    print(f"📁 Scanning {INPUT_DIR}")
+    found = 0
+    skipped = 0
+    pending = []
+
+    for file_path, stat in scan_files(INPUT_DIR):
+        found += 1
+        # --- SKIP LOGIC: the manifest knows which outputs are still valid ---
+        # Only sources whose content or prompt template changed (or whose
+        # output went missing) are queued; everything else is one stat call.
+        if manifest.is_current(file_path, output_path_for(file_path), stat):
+            skipped += 1
             continue
 
-        # Rate limiting
-        print(f"⏳ Waiting {RATE_LIMIT_SECONDS}s for rate limit...")
-        await asyncio.sleep(RATE_LIMIT_SECONDS)
+        pending.append(file_path)
+
+    if not found:
+        print(f"⚠️ No PHP test files found in {INPUT_DIR}")
+        return
+
+    print(f"📁 Found {found} test files, {len(pending)} need (re)generation")
+
+    queue = asyncio.Queue()
+    if batch:
+        jobs = plan_jobs(pending, count_tokens, BATCH_MAX_FILE_TOKENS, BATCH_TOKENS, BATCH_MAX_FILES)
+    else:
+        jobs = [[(file_path, None)] for file_path in pending]
+    for job in jobs:
+        queue.put_nowait(job)
+    if batch:
+        batched = sum(len(job) for job in jobs if len(job) > 1)
+        print(f"📦 {batched} small files in {sum(1 for job in jobs if len(job) > 1)} batch requests, "
+              f"{sum(1 for job in jobs if len(job) == 1)} files on their own")
+
+    # Worker pool: at most MAX_CONCURRENT_REQUESTS calls in flight,
+    # request starts paced by the shared RPM limiter.
+    results = []
+    workers = min(MAX_CONCURRENT_REQUESTS, queue.qsize())
+    print(f"🚀 Starting {workers} workers ({REQUESTS_PER_MINUTE} RPM budget)")
+    try:
+        await asyncio.gather(*(worker(queue, results) for _ in range(workers)))
+    finally:
+        # Completed files stay recorded even if the run is interrupted or a worker raises
+        manifest.save()
+    processed = sum(1 for success in results if success)
+
+    # Outputs whose source test was deleted or renamed are stale
+    for stale_path in manifest.prune():
+        print(f"🗑️ Removed stale output: {stale_path}")
+        if os.path.exists(jsonl_path_for(stale_path)):
+            os.remove(jsonl_path_for(stale_path))
+    manifest.save()
 
     print(f"\n🎉 Processing complete!")
     print(f"   ✅ Processed: {processed} files")
@@ -250,8 +406,16 @@ async def main():
 
 # ------------------ ENTRY POINT ------------------
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate IEEE 829 documentation for the Pest unit tests.")
+    parser.add_argument("--batch", action="store_true",
+                        help=f"Document files of up to {BATCH_MAX_FILE_TOKENS} tokens several per request")
+    args = parser.parse_args()
+
+    batch = args.batch or BATCH_SMALL_FILES
     if not API_KEY:
-        print("FATAL: UZAIR_OPEN_AI_API_KEY_5 is missing.")
-        print("Please set UZAIR_OPEN_AI_API_KEY_5 in your .env file")
+        print("⚠️ UZAIR_OPEN_AI_API_KEY_5 is missing: only cached responses are used.")
+        print("Please set UZAIR_OPEN_AI_API_KEY_5 in your .env file to document uncached files")
+        asyncio.run(main(batch=batch))
     else:
-        asyncio.run(main())
+        # The pooled HTTP session is closed once main() is done
+        asyncio.run(client.run(main(batch=batch)))
@@ -0,0 +1,150 @@
+import asyncio
+import random
+from abc import ABC, abstractmethod
+
+import aiohttp
+
+# ------------------ CONFIG ------------------
+MAX_CONNECTIONS = 16          # Pooled keep-alive connections per client
+KEEPALIVE_SECONDS = 60        # Idle pooled connections are closed after this
+REQUEST_TIMEOUT = 300         # Seconds per HTTP request (the model may write a long answer)
+MAX_RETRIES = 3               # Retries on 429 / 5xx / connection errors / truncated bodies
+RETRY_BASE_DELAY = 2.0        # Backoff: 2s, 4s, 8s (+ jitter) unless the server sends Retry-After
+RETRY_STATUSES = frozenset({408, 429, 500, 502, 503, 504})
+
+AZURE_API_VERSION = "2024-05-01-preview"
+GEMINI_ENDPOINT = "https://generativelanguage.googleapis.com/v1beta"
+
+
+class LLMError(Exception):
+    """A request that failed for good (after retries), or a response without text."""
+
+    def __init__(self, message: str, status: int = None):
+        super().__init__(f"HTTP {status}: {message}" if status else message)
+        self.status = status
+
+
+class LLMClient(ABC):
+    """
+    Native async chat client. Every request goes through one aiohttp session,
+    so connections are pooled and kept alive between calls, and no executor
+    thread is held while waiting on the model. At most `max_concurrency`
+    requests are in flight; the session is created on first use inside the
+    running event loop and closed by close() (or run()).
+
+    Subclasses build the provider's URL, headers and body and read the text
+    out of its response.
+    """
+
+    def __init__(self, model: str, api_key: str, max_concurrency: int = MAX_CONNECTIONS):
+        self.model = model
+        self.api_key = api_key
+        self.slots = asyncio.Semaphore(max_concurrency)
+        self.max_connections = max(max_concurrency, 1)
+        self.session = None
+
+    def _session(self) -> aiohttp.ClientSession:
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_connections, keepalive_timeout=KEEPALIVE_SECONDS)
+            self.session = aiohttp.ClientSession(connector=connector,
+                                                 timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT))
+        return self.session
+
+    async def complete(self, prompt: str, system: str = None) -> str:
+        """Send one prompt (with an optional system message) and return the response text."""
+        url, headers, body = self._request(prompt, system)
+        async with self.slots:
+            data = await self._post(url, headers, body)
+        return self._text(data)
+
+    async def _post(self, url: str, headers: dict, body: dict) -> dict:
+        for attempt in range(MAX_RETRIES + 1):
+            delay = RETRY_BASE_DELAY * 2 ** attempt + random.uniform(0, 1)
+            try:
+                async with self._session().post(url, headers=headers, json=body) as response:
+                    if response.status < 400:
+                        try:
+                            return await response.json(content_type=None)
+                        except ValueError:
+                            # Same error type as an HTTP failure, e.g. an HTML error page sent with 200
+                            text = (await response.text(errors="replace"))[:500]
+                            raise LLMError(f"Response is not JSON: {text}", response.status)
+                    message = (await response.text())[:500]
+                    if response.status not in RETRY_STATUSES or attempt == MAX_RETRIES:
+                        raise LLMError(message, response.status)
+                    retry_after = response.headers.get("Retry-After", "")
+                    if retry_after.isdigit():
+                        delay = float(retry_after)
+            except (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError) as e:
+                # Connection dropped, body cut short or no answer in time: retried
+                if attempt == MAX_RETRIES:
+                    raise LLMError(f"{type(e).__name__}: {e}") from e
+            await asyncio.sleep(delay)
+
+    async def close(self):
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+
+    async def run(self, coro):
+        """Await `coro`, then close the pooled session; e.g. asyncio.run(client.run(main()))."""
+        try:
+            return await coro
+        finally:
+            await self.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    @abstractmethod
+    def _request(self, prompt: str, system: str = None):
+        """(url, headers, JSON body) of the provider request for `prompt`."""
+
+    @abstractmethod
+    def _text(self, data: dict) -> str:
+        """The response text in the provider's decoded JSON `data`; LLMError if there is none."""
+
+
+class AzureInferenceClient(LLMClient):
+    """Azure AI inference chat completions API (e.g. the GitHub Models endpoint)."""
+
+    def __init__(self, endpoint: str, model: str, api_key: str, max_concurrency: int = MAX_CONNECTIONS):
+        super().__init__(model, api_key, max_concurrency)
+        self.url = endpoint.rstrip("/") + "/chat/completions?api-version=" + AZURE_API_VERSION
+
+    def _request(self, prompt: str, system: str = None):
+        messages = [{"role": "system", "content": system}] if system else []
+        messages.append({"role": "user", "content": prompt})
+        headers = {"Authorization": f"Bearer {self.api_key}"}
+        return self.url, headers, {"model": self.model, "messages": messages}
+
+    def _text(self, data: dict) -> str:
+        try:
+            return (data["choices"][0]["message"]["content"] or "").strip()
+        except (KeyError, IndexError, TypeError):
+            raise LLMError(f"No message in response: {str(data)[:500]}")
+
+
+class GeminiClient(LLMClient):
+    """Gemini generateContent REST API."""
+
+    def __init__(self, model: str, api_key: str, max_concurrency: int = MAX_CONNECTIONS,
+                 endpoint: str = GEMINI_ENDPOINT):
+        super().__init__(model, api_key, max_concurrency)
+        self.url = f"{endpoint.rstrip('/')}/models/{model}:generateContent"
+
+    def _request(self, prompt: str, system: str = None):
+        body = {"contents": [{"role": "user", "parts": [{"text": prompt}]}]}
+        if system:
+            body["systemInstruction"] = {"parts": [{"text": system}]}
+        return self.url, {"x-goog-api-key": self.api_key}, body
+
+    def _text(self, data: dict) -> str:
+        try:
+            parts = data["candidates"][0]["content"]["parts"]
+        except (KeyError, IndexError, TypeError):
+            reason = data.get("promptFeedback", {}).get("blockReason") if isinstance(data, dict) else None
+            raise LLMError(f"No candidates in response{f' (blocked: {reason})' if reason else ''}: {str(data)[:500]}")
+        return "".join(part.get("text", "") for part in parts if not part.get("thought")).strip()
@@ -1,9 +1,13 @@
 import os
+from merge_stream import index_path_for, merge_stream, scan_results
+from report_schemas import INTEGRATION_SCHEMA
+from result_store import build_store
 
 # Configuration
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 INPUT_DIR = os.path.join(PROJECT_ROOT, "tests/results")
 OUTPUT_FILE = os.path.join(PROJECT_ROOT, "combined_integration_test_results.txt")
+INCREMENTAL = True  # Reuse unchanged sections of the previous combined file (by source size + mtime)
 
 def merge_files():
     # Check if input directory exists
@@ -11,49 +15,22 @@ def merge_files():
         print(f"Error: Directory '{INPUT_DIR}' not found.")
         return
 
-    # Gather files recursively
-    file_list = []
+    # Gather .txt files recursively (relative paths, used as section names)
     try:
-        for root, dirs, files in os.walk(INPUT_DIR):
-            for file in files:
-                if file.endswith(".txt"):
-                    # Store relative path for sorting and display
-                    full_path = os.path.join(root, file)
-                    rel_path = os.path.relpath(full_path, INPUT_DIR)
-                    file_list.append(rel_path)
-        
-        file_list.sort() # Sort alphabetically for consistent output
+        file_list = scan_results(INPUT_DIR, recursive=True, suffix=".txt")
     except Exception as e:
         print(f"Error walking directory: {e}")
         return
 
-    count = 0
-    with open(OUTPUT_FILE, 'w', encoding='utf-8') as outfile:
-        for rel_path in file_list:
-            file_path = os.path.join(INPUT_DIR, rel_path)
-            try:
-                with open(file_path, 'r', encoding='utf-8') as infile:
-                    content = infile.read()
-                    
-                    # Write header with relative filename and newlines
-                    outfile.write("\n" * 3) 
-                    outfile.write("=" * 50 + "\n")
-                    outfile.write(f"FILE: {rel_path}\n")
-                    outfile.write("=" * 50 + "\n")
-                    outfile.write("\n")
-                    
-                    # Write content
-                    outfile.write(content)
-                    
-                    # Trailing newline to separate from next header if needed
-                    outfile.write("\n")
-                    
-                    print(f"Processed: {rel_path}")
-                    count += 1
-            except Exception as e:
-                print(f"Error reading {rel_path}: {e}")
+    # Streamed in fixed-size buffers; byte ranges of each FILE: section go to the sidecar index
+    count, reused = merge_stream(INPUT_DIR, OUTPUT_FILE, file_list, incremental=INCREMENTAL)
 
-    print(f"\nSuccessfully merged {count} files into '{OUTPUT_FILE}'")
+    print(f"\nSuccessfully merged {count} files into '{OUTPUT_FILE}' ({count - reused} new or changed, {reused} unchanged)")
+    print(f"Section index written to '{index_path_for(OUTPUT_FILE)}'")
+
+    # Structured store read by the report stage (JSONL sidecars, or parsed text for older results)
+    stored = build_store(INTEGRATION_SCHEMA, INPUT_DIR, file_list)
+    print(f"Stored {stored} test cases in '{INTEGRATION_SCHEMA.store_file}'")
 
 if __name__ == "__main__":
     merge_files()
@@ -0,0 +1,197 @@
+import json
+import os
+
+SEPARATOR = "=" * 50
+COPY_BUFFER_SIZE = 1024 * 1024   # Bytes per read/write when copying a result file
+INDEX_VERSION = 2                # Bump when the combined file's layout changes (2: newlines normalized)
+
+
+def index_path_for(output_file: str) -> str:
+    """Sidecar index written next to a combined results file."""
+    return output_file + ".index.json"
+
+
+def scan_results(input_dir: str, recursive: bool, suffix: str = None):
+    """List result files under `input_dir` with os.scandir, as sorted relative paths."""
+    found = []
+
+    def walk(directory: str, prefix: str):
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                rel_path = os.path.join(prefix, entry.name) if prefix else entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    if recursive:
+                        walk(entry.path, rel_path)
+                elif entry.is_file() and (suffix is None or entry.name.endswith(suffix)):
+                    found.append(rel_path)
+
+    walk(input_dir, "")
+    found.sort()  # Sort alphabetically for consistent output
+    return found
+
+
+def section_header(name: str) -> bytes:
+    return ("\n" * 3 + SEPARATOR + "\n" + f"FILE: {name}\n" + SEPARATOR + "\n" + "\n").encode("utf-8")
+
+
+def copy_text(infile, outfile):
+    """
+    Copy binary `infile` to `outfile` in COPY_BUFFER_SIZE blocks with CRLF and
+    lone CR newlines turned into LF, as the old text-mode merge read them.
+    """
+    pending_cr = False
+    while True:
+        block = infile.read(COPY_BUFFER_SIZE)
+        if not block:
+            break
+        if pending_cr:
+            block = b"\r" + block
+        # A CR at the end of a block may be the first half of a CRLF
+        pending_cr = block.endswith(b"\r")
+        if pending_cr:
+            block = block[:-1]
+        outfile.write(block.replace(b"\r\n", b"\n").replace(b"\r", b"\n"))
+    if pending_cr:
+        outfile.write(b"\n")
+
+
+def write_section(outfile, input_dir: str, rel_path: str) -> dict:
+    """
+    Stream one result file into `outfile` (opened in binary mode) and return its
+    index entry: byte offset/length of the whole section and of its content.
+    """
+    source_path = os.path.join(input_dir, rel_path)
+    stat = os.stat(source_path)
+    with open(source_path, "rb") as infile:
+        offset = outfile.tell()
+        outfile.write(section_header(rel_path))
+        content_offset = outfile.tell()
+        copy_text(infile, outfile)
+    content_length = outfile.tell() - content_offset
+    # Trailing newline to separate from next header
+    outfile.write(b"\n")
+    return {
+        "file": rel_path,
+        "offset": offset,
+        "length": outfile.tell() - offset,
+        "content_offset": content_offset,
+        "content_length": content_length,
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+    }
+
+
+def write_index(output_file: str, sections: list):
+    tmp_path = index_path_for(output_file) + ".tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": INDEX_VERSION, "output": os.path.basename(output_file), "sections": sections},
+                      f, indent=1)
+    except BaseException:
+        _remove(tmp_path)
+        raise
+    os.replace(tmp_path, index_path_for(output_file))
+
+
+def _remove(path: str):
+    """Delete a partial temp file; a missing one is fine."""
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _copy_range(infile, outfile, offset: int, length: int):
+    infile.seek(offset)
+    while length > 0:
+        block = infile.read(min(COPY_BUFFER_SIZE, length))
+        if not block:
+            raise OSError(f"unexpected end of file at offset {infile.tell()}")
+        outfile.write(block)
+        length -= len(block)
+
+
+def _load_reusable(output_file: str) -> dict:
+    """Index entries of an existing combined file, or {} if it cannot be trusted."""
+    try:
+        with open(index_path_for(output_file), "r", encoding="utf-8") as f:
+            index = json.load(f)
+        if index.get("version") != INDEX_VERSION:
+            return {}  # Written by an older merge; rebuild in the current layout
+        sections = {section["file"]: section for section in index["sections"]}
+        expected = max((e["offset"] + e["length"] for e in sections.values()), default=0)
+        if os.path.getsize(output_file) != expected:
+            return {}  # Edited or truncated since the index was written
+        return sections
+    except (OSError, ValueError, KeyError):
+        return {}
+
+
+def merge_stream(input_dir: str, output_file: str, rel_paths: list, incremental: bool = False):
+    """
+    Concatenate `rel_paths` into `output_file` with FILE: headers, copying in
+    fixed-size buffers, and write the sidecar offset index.
+
+    With `incremental`, sections whose source size and mtime match the previous
+    index are copied byte-for-byte from the old combined file instead of being
+    re-read; only new and changed files are read from `input_dir`. The new file
+    is written to a temp file and renamed over the old one, so readers never see
+    a partial merge. Returns (files merged, sections reused).
+    """
+    previous = _load_reusable(output_file) if incremental else {}
+    plan = []
+    for rel_path in rel_paths:
+        old = previous.get(rel_path)
+        try:
+            stat = os.stat(os.path.join(input_dir, rel_path))
+        except OSError as e:
+            print(f"Error reading {rel_path}: {e}")
+            continue
+        reuse = old is not None and old["size"] == stat.st_size and old["mtime_ns"] == stat.st_mtime_ns
+        plan.append((rel_path, old if reuse else None))
+
+    reused = sum(1 for _, old in plan if old)
+    if incremental and reused == len(plan) == len(previous) and \
+            [name for name, _ in plan] == list(previous):
+        return len(plan), reused  # Nothing added, changed or removed
+
+    sections = []
+    tmp_path = output_file + ".tmp"
+    try:
+        with open(tmp_path, "wb") as outfile, \
+                (open(output_file, "rb") if reused else open(os.devnull, "rb")) as oldfile:
+            for rel_path, old in plan:
+                offset = outfile.tell()
+                if old:
+                    _copy_range(oldfile, outfile, old["offset"], old["length"])
+                    shift = offset - old["offset"]
+                    sections.append(dict(old, offset=offset, content_offset=old["content_offset"] + shift))
+                    continue
+                try:
+                    sections.append(write_section(outfile, input_dir, rel_path))
+                except OSError as e:
+                    print(f"Error reading {rel_path}: {e}")
+                    # Drop whatever part of the section was written
+                    outfile.seek(offset)
+                    outfile.truncate()
+    except BaseException:
+        # A failed or interrupted merge leaves the old combined file and no <output>.tmp
+        _remove(tmp_path)
+        raise
+    os.replace(tmp_path, output_file)
+    write_index(output_file, sections)
+    return len(sections), reused
+
+
+def load_index(output_file: str) -> dict:
+    """Map of file name -> index entry for a combined results file."""
+    with open(index_path_for(output_file), "r", encoding="utf-8") as f:
+        return {section["file"]: section for section in json.load(f)["sections"]}
+
+
+def read_section(output_file: str, name: str, index: dict = None) -> str:
+    """Read one file's content from a combined results file by seeking to it."""
+    entry = (index or load_index(output_file))[name]
+    with open(output_file, "rb") as f:
+        f.seek(entry["content_offset"])
+        return f.read(entry["content_length"]).decode("utf-8")
@@ -1,9 +1,13 @@
 import os
+from merge_stream import index_path_for, merge_stream, scan_results
+from report_schemas import UNIT_SCHEMA
+from result_store import build_store
 
 # Configuration
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 INPUT_DIR = os.path.join(PROJECT_ROOT, "tests/results-openai")
 OUTPUT_FILE = os.path.join(PROJECT_ROOT, "combined_unit_test_results.txt")
+INCREMENTAL = True  # Reuse unchanged sections of the previous combined file (by source size + mtime)
 
 def merge_files():
     # Check if input directory exists
@@ -11,41 +15,22 @@ def merge_files():
         print(f"Error: Directory '{INPUT_DIR}' not found.")
         return
 
-    # Get list of files
+    # Get list of result files (top level only; .jsonl sidecars go to the store)
     try:
-        files = [f for f in os.listdir(INPUT_DIR) if os.path.isfile(os.path.join(INPUT_DIR, f))]
-        files.sort() # Sort alphabetically for consistent output
+        files = scan_results(INPUT_DIR, recursive=False, suffix=".txt")
     except Exception as e:
         print(f"Error listing files: {e}")
         return
 
-    count = 0
-    with open(OUTPUT_FILE, 'w', encoding='utf-8') as outfile:
-        for filename in files:
-            file_path = os.path.join(INPUT_DIR, filename)
-            try:
-                with open(file_path, 'r', encoding='utf-8') as infile:
-                    content = infile.read()
-                    
-                    # Write header with filename and newlines
-                    outfile.write("\n" * 3) # Some new lines as requested
-                    outfile.write("=" * 50 + "\n")
-                    outfile.write(f"FILE: {filename}\n")
-                    outfile.write("=" * 50 + "\n")
-                    outfile.write("\n")
-                    
-                    # Write content
-                    outfile.write(content)
-                    
-                    # Trailing newline to separate from next header if needed
-                    outfile.write("\n")
-                    
-                    print(f"Processed: {filename}")
-                    count += 1
-            except Exception as e:
-                print(f"Error reading {filename}: {e}")
+    # Streamed in fixed-size buffers; byte ranges of each FILE: section go to the sidecar index
+    count, reused = merge_stream(INPUT_DIR, OUTPUT_FILE, files, incremental=INCREMENTAL)
 
-    print(f"\nSuccessfully merged {count} files into '{OUTPUT_FILE}'")
+    print(f"\nSuccessfully merged {count} files into '{OUTPUT_FILE}' ({count - reused} new or changed, {reused} unchanged)")
+    print(f"Section index written to '{index_path_for(OUTPUT_FILE)}'")
+
+    # Structured store read by the report stage (JSONL sidecars, or parsed text for older results)
+    stored = build_store(UNIT_SCHEMA, INPUT_DIR, files)
+    print(f"Stored {stored} test cases in '{UNIT_SCHEMA.store_file}'")
 
 if __name__ == "__main__":
     merge_files()
@@ -0,0 +1,67 @@
+import itertools
+import re
+
+# Top-level Pest test blocks start at column 0. Nested it() calls inside a
+# describe() are indented and stay part of their describe block.
+TEST_START = re.compile(r"^(?:test|it|describe)\s*\(", re.MULTILINE)
+TEST_NAME = re.compile(r"""\(\s*(['"])(.*?)(?<!\\)\1""")
+
+
+def split_test_blocks(code: str):
+    """
+    Split a Pest file into (preamble, blocks).
+
+    The preamble is everything before the first top-level test()/it()/describe()
+    (uses(), imports, helpers); each block runs up to the start of the next one.
+    Joining preamble + blocks gives back `code` unchanged.
+    """
+    starts = [m.start() for m in TEST_START.finditer(code)]
+    if not starts:
+        return code, []
+    preamble = code[:starts[0]]
+    bounds = starts + [len(code)]
+    blocks = [code[bounds[i]:bounds[i + 1]] for i in range(len(starts))]
+    return preamble, blocks
+
+
+def test_name(block: str) -> str:
+    """Description string of a test block, e.g. 'it stores an invoice'."""
+    match = TEST_NAME.search(block)
+    return match.group(2) if match else block.split("\n", 1)[0].strip()
+
+
+def pack_chunks(code: str, budget: int, count_tokens):
+    """
+    Pack the test blocks of `code` into chunks of at most ~`budget` tokens.
+
+    Every chunk repeats the preamble so it stays valid Pest on its own. A single
+    block larger than the budget gets a chunk to itself. Returns a list of
+    (chunk_code, index_of_first_test) tuples.
+    """
+    preamble, blocks = split_test_blocks(code)
+    if not blocks:
+        return [(code, 0)]
+
+    preamble_cost = count_tokens(preamble)
+    chunks = []
+    current, used, start = [], preamble_cost, 0
+    for block in blocks:
+        cost = count_tokens(block)
+        if current and used + cost > budget:
+            chunks.append((preamble + "".join(current), start))
+            start += len(current)
+            current, used = [], preamble_cost
+        current.append(block)
+        used += cost
+    chunks.append((preamble + "".join(current), start))
+    return chunks
+
+
+def renumber_test_ids(text: str, id_pattern) -> str:
+    """
+    Renumber test case IDs sequentially (001, 002, ...) in order of appearance.
+    `id_pattern` is a compiled regex with two groups: the ID up to the number,
+    and the number itself.
+    """
+    counter = itertools.count(1)
+    return id_pattern.sub(lambda m: f"{m.group(1)}{next(counter):03d}", text)
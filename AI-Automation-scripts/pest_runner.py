@@ -0,0 +1,88 @@
+import asyncio
+import os
+import re
+import signal
+import subprocess
+
+# Colour codes and timings change on every run without changing the failures.
+# Stripping them keeps fix prompts identical across runs (and cacheable).
+ANSI_ESCAPE = re.compile(r"\x1b\[[0-9;]*[A-Za-z]")
+TIMING = re.compile(r"(?m)(\s+\d+\.\d+s$|^\s*Duration:.*$)")
+
+
+def normalize_output(output: str) -> str:
+    return TIMING.sub("", ANSI_ESCAPE.sub("", output))
+
+
+class PestResult:
+    """Outcome of one Pest run."""
+
+    def __init__(self, output: str, returncode: int = None, timed_out: bool = False):
+        self.output = output
+        self.returncode = returncode
+        self.timed_out = timed_out
+
+    @property
+    def passed(self) -> bool:
+        return self.returncode == 0 and not self.timed_out
+
+
+class PestRunner:
+    """
+    Runs Pest in asyncio subprocesses so PHP test runs never block the event loop.
+
+    At most `max_concurrent` Pest processes run at once. On timeout or task
+    cancellation the whole process tree (php and any children it spawned) is
+    killed before returning.
+    """
+
+    def __init__(self, max_concurrent: int = 2, timeout: float = 60,
+                 memory_limit: str = "2000M", cwd: str = None):
+        self.semaphore = asyncio.Semaphore(max_concurrent)
+        self.timeout = timeout
+        self.memory_limit = memory_limit
+        self.cwd = cwd
+
+    async def run(self, file_path: str) -> PestResult:
+        """Run Pest on a single test file."""
+        async with self.semaphore:
+            try:
+                proc = await asyncio.create_subprocess_exec(
+                    "php", "-d", f"memory_limit={self.memory_limit}", "vendor/bin/pest", file_path,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                    cwd=self.cwd,
+                    # Own process group, so the tree can be killed as a unit
+                    start_new_session=(os.name != "nt"),
+                )
+            except Exception as e:
+                return PestResult(f"ERROR running Pest: {e}")
+
+            try:
+                stdout, _ = await asyncio.wait_for(proc.communicate(), timeout=self.timeout)
+            except asyncio.TimeoutError:
+                await self._kill_tree(proc)
+                print(f"⏭️ Pest exceeded {self.timeout} seconds, skipping.")
+                return PestResult("Pest run timed out.", timed_out=True)
+            except asyncio.CancelledError:
+                await self._kill_tree(proc)
+                raise
+
+            print(f"🛠️ Pest run completed for {file_path} (exit {proc.returncode})")
+            output = normalize_output(stdout.decode("utf-8", errors="replace"))
+            return PestResult(output, proc.returncode)
+
+    @staticmethod
+    async def _kill_tree(proc):
+        if proc.returncode is not None:
+            return
+        try:
+            if os.name == "nt":
+                await asyncio.to_thread(subprocess.run,
+                                        ["taskkill", "/T", "/F", "/PID", str(proc.pid)],
+                                        capture_output=True)
+            else:
+                os.killpg(proc.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+        await proc.wait()
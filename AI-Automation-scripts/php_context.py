@@ -0,0 +1,250 @@
+import json
+import os
+import re
+import sys
+
+from findFile import SymbolIndex
+from prompt_budget import count_tokens
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+CONTEXT_CACHE_PATH = os.path.join(PROJECT_ROOT, ".llm-cache", "php-context.json")
+CACHE_VERSION = 1           # Bump when references or signatures are extracted differently
+MAX_MEMBER_CHARS = 160      # Longer property/constant declarations keep only their name
+
+# Strings and comments are blanked (same length, newlines kept) before scanning
+COMMENT_PATTERN = re.compile(r"//[^\n]*|#(?!\[)[^\n]*|/\*.*?\*/", re.DOTALL)
+STRING_PATTERN = re.compile(r"'(?:\\.|[^'\\])*'|\"(?:\\.|[^\"\\])*\"", re.DOTALL)
+CODE_PATTERN = re.compile(STRING_PATTERN.pattern + "|" + COMMENT_PATTERN.pattern, re.DOTALL)
+
+NAMESPACE_PATTERN = re.compile(r"^\s*namespace\s+([\w\\]+)\s*;", re.MULTILINE)
+USE_PATTERN = re.compile(r"^use\s+(?:function\s+|const\s+)?([^;]+);", re.MULTILINE)
+CLASS_PATTERN = re.compile(
+    r"^[ \t]*(?:(?:abstract|final|readonly)\s+)*(?:class|interface|trait|enum)\s+\w+[^{;]*\{", re.MULTILINE)
+NAME = r"\\?[A-Za-z_][\w\\]*"
+REFERENCE_PATTERNS = [
+    re.compile(rf"\b(?:extends|implements)\s+({NAME}(?:\s*,\s*{NAME})*)"),
+    re.compile(rf"^[ \t]+use\s+({NAME}(?:\s*,\s*{NAME})*)\s*[;{{]", re.MULTILINE),  # Traits
+    re.compile(rf"\b(?:new|instanceof)\s+({NAME})"),
+    re.compile(rf"({NAME})::"),
+    re.compile(rf"[(,]\s*\??({NAME})\s+&?(?:\.\.\.)?\$"),                      # Parameter and catch types
+    re.compile(rf"\)\s*:\s*\??({NAME})"),                                       # Return types
+    re.compile(rf"\b(?:public|protected|private|readonly)\s+\??({NAME})\s+\$"),  # Typed properties
+]
+NOT_CLASSES = frozenset({
+    "self", "static", "parent", "array", "bool", "callable", "false", "float", "int", "iterable",
+    "mixed", "never", "null", "object", "string", "true", "void", "function", "fn", "class",
+})
+
+
+def _blank(match) -> str:
+    return re.sub(r"[^\n]", " ", match.group(0))
+
+
+def strip_comments(code: str) -> str:
+    """`code` with comments blanked out; strings are kept."""
+    return CODE_PATTERN.sub(lambda m: m.group(0) if m.group(0)[0] in "'\"" else _blank(m), code)
+
+
+def mask_php(code: str) -> str:
+    """`code` with string contents and comments blanked, so braces and keywords in them are ignored."""
+    return CODE_PATTERN.sub(lambda m: m.group(0)[0] + _blank(m)[1:-1] + m.group(0)[-1]
+                            if m.group(0)[0] in "'\"" else _blank(m), code)
+
+
+def scan_references(code: str) -> dict:
+    """Namespace, `use` imports ({alias: FQCN}) and referenced class names (in order of appearance)."""
+    masked = mask_php(code)
+    namespace = NAMESPACE_PATTERN.search(masked)
+
+    uses = {}
+    for m in USE_PATTERN.finditer(masked):
+        statement = " ".join(m.group(1).split())
+        prefix, brace, group = statement.partition("{")
+        if not brace:
+            prefix, group = "", statement
+        items = group.rstrip("}").split(",")
+        for item in items:
+            name, _, alias = item.strip().partition(" as ")
+            full_name = (prefix + name.strip()).strip("\\ ")
+            if full_name:
+                uses[alias.strip() or full_name.rsplit("\\", 1)[-1]] = full_name
+
+    found = []
+    for pattern in REFERENCE_PATTERNS:
+        for m in pattern.finditer(masked):
+            for name in m.group(1).split(","):
+                name = name.strip()
+                if name and name.lower() not in NOT_CLASSES:
+                    found.append((m.start(1), name))
+    refs = list(dict.fromkeys(name for _, name in sorted(found)))
+    return {"namespace": namespace.group(1) if namespace else None, "uses": uses, "refs": refs}
+
+
+def _matching_brace(masked: str, start: int) -> int:
+    depth = 0
+    for i in range(start, len(masked)):
+        if masked[i] == "{":
+            depth += 1
+        elif masked[i] == "}":
+            depth -= 1
+            if depth == 0:
+                return i
+    return len(masked)
+
+
+def _member(statement: str):
+    """One class member as it goes into the signature, or None to leave it out."""
+    statement = " ".join(statement.split())
+    declaration = statement.split("(", 1)[0].split("=", 1)[0]
+    if not statement or re.search(r"\bprivate\b", declaration):
+        return None
+    if re.search(r"\bfunction\b", declaration):
+        return statement.rstrip(";") + ";"
+    if len(statement) > MAX_MEMBER_CHARS and "=" in statement:
+        return statement.split("=", 1)[0].rstrip() + " = ...;"
+    return statement
+
+
+def extract_signatures(code: str) -> str:
+    """
+    Skeleton of the classes in `code`: namespace, class headers, constants,
+    non-private properties and method signatures, without method bodies or
+    comments.
+    """
+    masked, plain = mask_php(code), strip_comments(code)
+    namespace = NAMESPACE_PATTERN.search(masked)
+    out = [f"namespace {namespace.group(1)};"] if namespace else []
+
+    for m in CLASS_PATTERN.finditer(masked):
+        members = []
+        i = start = m.end()
+        while i < len(masked):
+            char = masked[i]
+            if char == "{":
+                # Method body (or a member's brace block): keep what precedes it
+                members.append(_member(plain[start:i]))
+                i = start = _matching_brace(masked, i) + 1
+                continue
+            if char == ";":
+                members.append(_member(plain[start:i + 1]))
+                start = i + 1
+            elif char == "}":
+                break
+            i += 1
+        header = " ".join(plain[m.start():m.end() - 1].split())
+        out.append(header + "\n{\n" + "".join(f"    {member}\n" for member in members if member) + "}")
+    return "\n".join(out)
+
+
+class ImportGraph:
+    """
+    Which app/ classes each app/ file references, resolved through its
+    namespace and `use` imports to files of the SymbolIndex (framework and
+    vendor classes drop out). References and signatures of every file are
+    cached in `path` by mtime and size, so the graph is built once and then
+    only touched files are re-read.
+    """
+
+    def __init__(self, index: SymbolIndex = None, path: str = CONTEXT_CACHE_PATH):
+        self.index = index or SymbolIndex()
+        self.path = path
+        self.entries = {}
+        self.changed = False
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == CACHE_VERSION:
+                self.entries = data["entries"]
+        except (OSError, ValueError, KeyError):
+            pass
+        self.classes = {}  # FQCN -> rel path
+
+    def build(self):
+        self.index.refresh(check_files=True)
+        self.classes = {}
+        for rel_path, symbols in self.index.files.items():
+            for cls in symbols["classes"]:
+                name = f"{symbols['namespace']}\\{cls}" if symbols["namespace"] else cls
+                self.classes.setdefault(name, rel_path)
+
+        for rel_path in list(self.entries):
+            if rel_path not in self.index.files:
+                del self.entries[rel_path]
+                self.changed = True
+        for rel_path in self.index.files:
+            self._entry(rel_path)
+        if self.changed:
+            self.save()
+        return self
+
+    def _entry(self, rel_path: str) -> dict:
+        stat = os.stat(self.index.abspath(rel_path))
+        entry = self.entries.get(rel_path)
+        if entry is None or entry["mtime_ns"] != stat.st_mtime_ns or entry["size"] != stat.st_size:
+            with open(self.index.abspath(rel_path), "r", encoding="utf-8", errors="replace") as f:
+                code = f.read()
+            entry = dict(scan_references(code), signatures=extract_signatures(code),
+                         mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+            self.entries[rel_path] = entry
+            self.changed = True
+        return entry
+
+    def _rel_path(self, path: str) -> str:
+        return os.path.relpath(path, self.index.root).replace("\\", "/") if os.path.isabs(path) else path
+
+    def dependencies(self, path: str) -> list:
+        """app/ files directly referenced by `path`, in order of first reference."""
+        rel_path = self._rel_path(path)
+        entry = self._entry(rel_path)
+        found = []
+        for name in entry["refs"]:
+            if name.startswith("\\"):
+                full_name = name[1:]
+            else:
+                first, _, rest = name.partition("\\")
+                if first in entry["uses"]:
+                    full_name = entry["uses"][first] + ("\\" + rest if rest else "")
+                elif entry["namespace"]:
+                    full_name = f"{entry['namespace']}\\{name}"
+                else:
+                    full_name = name
+            target = self.classes.get(full_name)
+            if target and target != rel_path and target not in found:
+                found.append(target)
+        return found
+
+    def pack(self, path: str, budget: int) -> str:
+        """
+        Signatures of the direct dependencies of `path`, whole classes in
+        reference order, until `budget` tokens are used. Dependencies that
+        do not fit are listed by name.
+        """
+        parts, used, omitted = [], 0, []
+        for dep in self.dependencies(path):
+            block = f"// app/{dep}\n{self._entry(dep)['signatures']}\n\n"
+            cost = count_tokens(block)
+            if used + cost > budget:
+                omitted.append(dep)
+                continue
+            parts.append(block)
+            used += cost
+        if omitted:
+            parts.append(f"// [{len(omitted)} more dependencies omitted to fit the prompt: {', '.join(omitted)}]\n")
+        return "".join(parts)
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": CACHE_VERSION, "entries": self.entries}, f)
+        os.replace(tmp_path, self.path)
+        self.changed = False
+
+
+if __name__ == "__main__":
+    # e.g. python php_context.py app/Models/Invoice.php
+    graph = ImportGraph().build()
+    for arg in sys.argv[1:]:
+        path = os.path.abspath(arg)
+        print(f"# {arg}: {', '.join(graph.dependencies(path)) or 'no app/ dependencies'}\n")
+        print(graph.pack(path, 3000))
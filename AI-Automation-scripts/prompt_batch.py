@@ -0,0 +1,100 @@
+import os
+import re
+
+# Several small files documented in one request. Each file is introduced by a
+# header line; the model repeats the header before that file's documentation,
+# which is how the response is split back out per file.
+FILE_HEADER = "##### FILE: {name} #####"
+# Tolerant of the decoration models add around the header (bold, =, extra #)
+FILE_HEADER_PATTERN = re.compile(r"^[#=* \t]*FILE:[ \t]*[*`]*(?P<name>[\w./\\-]+?\.php)[*`]*[ \t]*[#=*]*[ \t]*$",
+                                 re.MULTILINE)
+CLASS_KIND = re.compile(r"[A-Z][a-z]+$")
+
+BATCH_INSTRUCTIONS = """
+BATCH MODE: This request contains several files. Each file starts with a header line like
+##### FILE: ExampleController-Test.php #####
+followed by its test case ID prefix and its code. Document EVERY file, in the same order, following all of the rules above for each file separately. Before the documentation of each file, output its header line exactly as given. Number the test cases of each file from 001.
+"""
+
+
+def file_header(name: str) -> str:
+    return FILE_HEADER.format(name=name)
+
+
+def class_kind(file_path: str) -> str:
+    """Trailing word of the class under test, e.g. 'Resource' for UserResource-Test.php."""
+    stem = os.path.basename(file_path).split(".", 1)[0]
+    stem = stem[:-len("-Test")] if stem.endswith("-Test") else stem[:-len("Test")] if stem.endswith("Test") else stem
+    match = CLASS_KIND.search(stem)
+    return match.group(0) if match else ""
+
+
+def plan_batches(files, costs: dict, max_file_tokens: int, batch_tokens: int, max_files: int):
+    """
+    Group `files` into requests: those of at most `max_file_tokens` are packed,
+    up to `batch_tokens` and `max_files` per batch, after sorting by class kind
+    (Resources with Resources, Requests with Requests) so batch mates look
+    alike. Larger files get a request each.
+
+    Returns the batches (lists of more than one file) first, then the single
+    files, so requests sharing the batch prompt prefix are sent back to back.
+    """
+    small = sorted((f for f in files if costs[f] <= max_file_tokens), key=lambda f: (class_kind(f), f))
+    singles = [[f] for f in files if costs[f] > max_file_tokens]
+
+    batches, current, used = [], [], 0
+    for file_path in small:
+        if current and (used + costs[file_path] > batch_tokens or len(current) >= max_files):
+            batches.append(current)
+            current, used = [], 0
+        current.append(file_path)
+        used += costs[file_path]
+    if current:
+        batches.append(current)
+
+    # A batch of one is just a single request
+    return [b for b in batches if len(b) > 1] + [b for b in batches if len(b) == 1] + singles
+
+
+def plan_jobs(file_paths, count_tokens, max_file_tokens: int, batch_tokens: int, max_files: int):
+    """
+    Read `file_paths` and plan them with plan_batches. Returns jobs as lists
+    of (file_path, code); unreadable and empty files get a job of their own
+    (the single-file path reports them).
+    """
+    codes, costs = {}, {}
+    for file_path in file_paths:
+        try:
+            with open(file_path, "r", encoding="utf-8") as f:
+                codes[file_path] = f.read()
+        except (OSError, UnicodeDecodeError):
+            codes[file_path] = ""
+        costs[file_path] = count_tokens(codes[file_path]) if codes[file_path].strip() else max_file_tokens + 1
+    groups = plan_batches(file_paths, costs, max_file_tokens, batch_tokens, max_files)
+    return [[(file_path, codes[file_path]) for file_path in group] for group in groups]
+
+
+def split_batch(response: str, names) -> dict:
+    """
+    Split a batch response into {name: documentation} at the file headers
+    (`names` as given to file_header; a bare basename also matches when it is
+    unique). Files whose header is missing or whose section is empty are left
+    out, for the caller to retry one by one; text before the first header is
+    dropped.
+    """
+    wanted = {name: name for name in names}
+    basenames = [os.path.basename(name) for name in names]
+    for name, basename in zip(names, basenames):
+        if basenames.count(basename) == 1:
+            wanted.setdefault(basename, name)
+
+    sections = {}
+    matches = list(FILE_HEADER_PATTERN.finditer(response))
+    for i, m in enumerate(matches):
+        found = m.group("name").replace("\\", "/")
+        name = wanted.get(found) or wanted.get(os.path.basename(found))
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(response)
+        text = response[m.end():end].strip()
+        if name and text and name not in sections:
+            sections[name] = text
+    return sections
@@ -0,0 +1,213 @@
+import base64
+import math
+import os
+import re
+
+from pest_blocks import split_test_blocks, test_name
+
+# A tiktoken-format BPE vocabulary ("<base64 token> <rank>" per line), e.g.
+# cl100k_base.tiktoken. Dropped next to this file, it is loaded offline; when
+# absent, a regex approximation of the same pre-tokenizer is used instead.
+DEFAULT_VOCAB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "vocab", "cl100k_base.tiktoken")
+
+# The approximation can undercount; its counts are inflated by this fraction so
+# prompts sized against the scripts' MAX_TOKENS_ALLOWED / budgets still fit
+APPROXIMATE_MARGIN = 0.10
+
+# GPT-style pre-tokenizer (ASCII approximation of the cl100k pattern)
+PRE_TOKENIZER = re.compile(
+    r"""'(?:[sdmt]|ll|ve|re)| ?[A-Za-z]+| ?\d{1,3}| ?[^\sA-Za-z\d]+|\s+(?!\S)|\s+"""
+)
+
+
+class ApproximateTokenizer:
+    """
+    No-vocabulary fallback: splits like the BPE pre-tokenizer and charges long
+    words and symbol runs by length. Much closer than len/3.5 on PHP code,
+    which is dense in short symbols. Counts carry a `margin` (default
+    APPROXIMATE_MARGIN) on top, so budgets leave headroom for its error.
+    """
+
+    def __init__(self, margin: float = APPROXIMATE_MARGIN):
+        self.margin = margin
+
+    def count(self, text: str) -> int:
+        total = 0
+        for piece in PRE_TOKENIZER.findall(text):
+            stripped = piece.strip()
+            if not stripped:
+                total += 1
+            elif stripped.isascii() and stripped.isalpha():
+                total += math.ceil(len(stripped) / 7)
+            else:
+                total += math.ceil(len(piece.encode("utf-8")) / 3)
+        # Rounded rather than ceiled, so per-line counts don't each gain a token
+        return int(total * (1 + self.margin) + 0.5)
+
+
+class BPETokenizer:
+    """Byte-level BPE over a vendored tiktoken-format rank file. Fully offline."""
+
+    def __init__(self, vocab_path: str):
+        self.ranks = {}
+        with open(vocab_path, "rb") as f:
+            for line in f:
+                if line.strip():
+                    token, rank = line.split()
+                    self.ranks[base64.b64decode(token)] = int(rank)
+        self.cache = {}
+
+    def _encode_piece(self, piece: bytes) -> int:
+        if piece in self.ranks:
+            return 1
+        parts = [piece[i:i + 1] for i in range(len(piece))]
+        while len(parts) > 1:
+            best = None
+            for i in range(len(parts) - 1):
+                rank = self.ranks.get(parts[i] + parts[i + 1])
+                if rank is not None and (best is None or rank < best[0]):
+                    best = (rank, i)
+            if best is None:
+                break
+            i = best[1]
+            parts[i:i + 2] = [parts[i] + parts[i + 1]]
+        return len(parts)
+
+    def count(self, text: str) -> int:
+        total = 0
+        for piece in PRE_TOKENIZER.findall(text):
+            if piece not in self.cache:
+                self.cache[piece] = self._encode_piece(piece.encode("utf-8"))
+            total += self.cache[piece]
+        return total
+
+
+_tokenizer = None
+
+
+def get_tokenizer():
+    """The process-wide tokenizer: vendored BPE vocab if present, else the approximation."""
+    global _tokenizer
+    if _tokenizer is None:
+        vocab_path = os.getenv("PROMPT_TOKENIZER_VOCAB", DEFAULT_VOCAB_PATH)
+        if os.path.exists(vocab_path):
+            _tokenizer = BPETokenizer(vocab_path)
+            print(f"🔢 Token counts: BPE vocabulary {vocab_path}")
+        else:
+            _tokenizer = ApproximateTokenizer()
+            print(f"🔢 Token counts: approximate (no vocabulary at {vocab_path}), "
+                  f"+{APPROXIMATE_MARGIN:.0%} safety margin")
+    return _tokenizer
+
+
+def count_tokens(text: str) -> int:
+    return get_tokenizer().count(text)
+
+
+# ------------------ BUDGET ALLOCATOR ------------------
+KEEP = "keep"      # Never trimmed (instructions, headings)
+TESTS = "tests"    # Trimmed at whole test()/it() boundaries, from the end
+MIDDLE = "middle"  # Trimmed from the middle, keeping head and tail (tool output)
+
+
+class Section:
+    def __init__(self, text: str, policy: str = KEEP):
+        self.text = text
+        self.policy = policy
+
+
+def _trim_lines_middle(text: str, budget: int) -> str:
+    lines = text.splitlines(keepends=True)
+    head, tail = [], []
+    used = 0
+    lo, hi = 0, len(lines) - 1
+    # Alternate head/tail so both the first error and the summary survive
+    while lo <= hi:
+        line = lines[lo] if len(head) <= len(tail) else lines[hi]
+        cost = count_tokens(line)
+        if used + cost > budget:
+            break
+        used += cost
+        if len(head) <= len(tail):
+            head.append(line)
+            lo += 1
+        else:
+            tail.insert(0, line)
+            hi -= 1
+    omitted = hi - lo + 1
+    if omitted <= 0:
+        return text
+    return "".join(head) + f"\n[... {omitted} lines omitted ...]\n" + "".join(tail)
+
+
+def _trim_lines_head(text: str, budget: int) -> str:
+    kept, used = [], 0
+    lines = text.splitlines(keepends=True)
+    for line in lines:
+        cost = count_tokens(line)
+        if used + cost > budget:
+            break
+        kept.append(line)
+        used += cost
+    return "".join(kept) + f"\n[... {len(lines) - len(kept)} more lines omitted ...]\n"
+
+
+def _trim_tests(text: str, budget: int) -> str:
+    preamble, blocks = split_test_blocks(text)
+    used = count_tokens(preamble)
+    if not blocks or used > budget:
+        return _trim_lines_head(text, budget)
+    kept = [preamble]
+    for i, block in enumerate(blocks):
+        cost = count_tokens(block)
+        if used + cost > budget:
+            if i == 0:
+                # Not even one whole test fits; fall back to a line boundary
+                return _trim_lines_head(text, budget)
+            dropped = [test_name(b) for b in blocks[i:]]
+            return "".join(kept) + (
+                f"\n// [{len(dropped)} more tests omitted to fit the prompt: "
+                + "; ".join(dropped) + "]\n"
+            )
+        kept.append(block)
+        used += cost
+    return text
+
+
+def fit_sections(sections, budget: int) -> str:
+    """
+    Join `sections` into one prompt of at most ~`budget` tokens.
+
+    KEEP sections are always included in full. The remaining budget is shared
+    between trimmable sections water-filling style: small sections are kept
+    whole, and the rest split what is left evenly.
+    """
+    sizes = [count_tokens(s.text) for s in sections]
+    remaining = budget - sum(size for s, size in zip(sections, sizes) if s.policy == KEEP)
+    trimmable = sorted((size, i) for i, (s, size) in enumerate(zip(sections, sizes)) if s.policy != KEEP)
+
+    allocation = {}
+    for n, (size, i) in enumerate(trimmable):
+        share = max(remaining, 0) // (len(trimmable) - n)
+        allocation[i] = min(size, share)
+        remaining -= allocation[i]
+
+    parts = []
+    for i, section in enumerate(sections):
+        if section.policy == KEEP or allocation[i] >= sizes[i]:
+            parts.append(section.text)
+        elif section.policy == TESTS:
+            parts.append(_trim_tests(section.text, allocation[i]))
+        else:
+            parts.append(_trim_lines_middle(section.text, allocation[i]))
+    return "".join(parts)
+
+
+def build_prompt(sections, max_tokens: int, target_tokens: int) -> str:
+    """Concatenate `sections`; if the result exceeds `max_tokens`, fit it to `target_tokens`."""
+    prompt = "".join(s.text for s in sections)
+    tokens = count_tokens(prompt)
+    if tokens <= max_tokens:
+        return prompt
+    print(f"⚠️ Prompt too long ({tokens} tokens). Trimming sections to {target_tokens} tokens...")
+    return fit_sections(sections, target_tokens)
@@ -0,0 +1,88 @@
+import asyncio
+import time
+
+
+class TokenBucket:
+    """
+    Classic token bucket: refills continuously at `rate_per_minute` and holds
+    at most `capacity` units (the burst size).
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: float = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = float(capacity if capacity is not None else rate_per_minute)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay_for(self, amount: float, now: float) -> float:
+        """Seconds until `amount` units are available (0 if available now)."""
+        self._refill(now)
+        # A single request larger than the bucket can never fit; clamp it so it
+        # waits for a full bucket instead of blocking forever.
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def consume(self, amount: float):
+        self.level -= min(amount, self.capacity)
+
+
+class RateLimiter:
+    """
+    Async limiter combining a requests-per-minute and a tokens-per-minute bucket.
+
+    Optional per-key quotas (e.g. one per model or API key) are enforced on top
+    of the global budget:
+
+        limiter = RateLimiter(requests_per_minute=10, tokens_per_minute=60000)
+        limiter.add_quota("gemini-2.5-flash", requests_per_minute=5)
+        await limiter.acquire(tokens=count_tokens(prompt), key="gemini-2.5-flash")
+    """
+
+    def __init__(self, requests_per_minute: float = None, tokens_per_minute: float = None,
+                 burst: float = None):
+        self.buckets = {None: self._make_buckets(requests_per_minute, tokens_per_minute, burst)}
+        self.lock = asyncio.Lock()
+
+    @staticmethod
+    def _make_buckets(requests_per_minute, tokens_per_minute, burst):
+        return {
+            "requests": TokenBucket(requests_per_minute, burst or 1) if requests_per_minute else None,
+            "tokens": TokenBucket(tokens_per_minute) if tokens_per_minute else None,
+        }
+
+    def add_quota(self, key: str, requests_per_minute: float = None,
+                  tokens_per_minute: float = None, burst: float = None):
+        """Register an additional budget that applies only to `key`."""
+        self.buckets[key] = self._make_buckets(requests_per_minute, tokens_per_minute, burst)
+
+    async def acquire(self, tokens: int = 0, key: str = None):
+        """Wait until one request of `tokens` size fits every applicable budget."""
+        scopes = [self.buckets[None]]
+        if key is not None and key in self.buckets:
+            scopes.append(self.buckets[key])
+
+        # Holding the lock while sleeping keeps callers strictly FIFO.
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                delay = 0.0
+                for scope in scopes:
+                    if scope["requests"]:
+                        delay = max(delay, scope["requests"].delay_for(1, now))
+                    if scope["tokens"] and tokens:
+                        delay = max(delay, scope["tokens"].delay_for(tokens, now))
+                if delay <= 0:
+                    break
+                await asyncio.sleep(delay)
+
+            for scope in scopes:
+                if scope["requests"]:
+                    scope["requests"].consume(1)
+                if scope["tokens"] and tokens:
+                    scope["tokens"].consume(tokens)
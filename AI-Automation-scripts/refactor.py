@@ -2,86 +2,62 @@ import os
 import glob
 import aiofiles
 import asyncio
-import subprocess
+import hashlib
+import json
 import time
 from dotenv import load_dotenv
-from azure.ai.inference import ChatCompletionsClient
-from azure.ai.inference.models import SystemMessage, UserMessage
-from azure.core.credentials import AzureKeyCredential
+from llm_client import AzureInferenceClient
+from pest_runner import PestRunner
+from prompt_budget import MIDDLE, Section, TESTS, build_prompt, count_tokens
+from rate_limiter import RateLimiter
+from response_cache import ResponseCache
 
 # ------------------ CONFIG ------------------
 MODEL_NAME = "openai/gpt-4.1"
-RATE_LIMIT_SECONDS = 6
-OUTPUT_DIR = "../tests/sample"
-OUTPUT_DIR_2 = "../tests/newfolder"
-MAX_ITERATION_TIME = 90           # 1.5 minutes
+REQUESTS_PER_MINUTE = 10          # Provider RPM budget
+TOKENS_PER_MINUTE = 60000         # Provider TPM budget (estimated prompt tokens)
+REQUEST_BURST = 1                 # Requests allowed back-to-back before pacing kicks in
+# Paths are resolved relative to project root (1 level up); Pest runs from there
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+INPUT_DIR = os.path.join(PROJECT_ROOT, "tests/Unit")
+OUTPUT_DIR = os.path.join(PROJECT_ROOT, "tests/sample")
+OUTPUT_DIR_2 = os.path.join(PROJECT_ROOT, "tests/newfolder")
+STATE_DIR = os.path.join(PROJECT_ROOT, "tests/.refactor-state")  # Per-file repair progress
+MAX_ITERATION_TIME = 90           # 1.5 minutes per fix request
+MAX_FIX_ROUNDS = 3                # Fix -> re-run Pest rounds per file
+MAX_FILE_TIME = 600               # Wall-clock budget per file across all rounds
+MAX_CONCURRENT_FILES = 4          # Files in flight (Pest runs overlap API calls)
+PEST_CONCURRENCY = 2              # Concurrent Pest processes
+PEST_TIMEOUT_SECONDS = 60         # Pest run is killed (whole process tree) after this
 MAX_TOKENS_ALLOWED = 8000         # Hard limit before trimming
 TRIMMED_TARGET = 7800             # Target tokens after trimming
+SYSTEM_MESSAGE = "You are an expert Laravel/PHP developer and Pest testing specialist."
 
-# Ensure output folder exists
+# Ensure output folders exist
 os.makedirs(OUTPUT_DIR, exist_ok=True)
+os.makedirs(OUTPUT_DIR_2, exist_ok=True)
+os.makedirs(STATE_DIR, exist_ok=True)
 
 load_dotenv()
 API_KEY = os.getenv("UZAIR_OPEN_AI_API_KEY_5")
 ENDPOINT = "https://models.github.ai/inference"
 
-client = ChatCompletionsClient(
-    endpoint=ENDPOINT,
-    credential=AzureKeyCredential(API_KEY),
-) if API_KEY else None
+client = AzureInferenceClient(ENDPOINT, MODEL_NAME, API_KEY, MAX_CONCURRENT_FILES) if API_KEY else None
 
+# Paces API calls by the provider's real limits instead of a fixed sleep per file
+rate_limiter = RateLimiter(REQUESTS_PER_MINUTE, TOKENS_PER_MINUTE, REQUEST_BURST)
 
-# ------------------ TOKEN COUNTER ------------------
-def estimate_tokens(text: str) -> int:
-    """Rough token estimator."""
-    return int(len(text) / 3.5)
+pest_runner = PestRunner(PEST_CONCURRENCY, PEST_TIMEOUT_SECONDS, cwd=PROJECT_ROOT)
 
+# Responses keyed by (model, system message, prompt); identical prompts are never paid twice
+response_cache = ResponseCache()
 
-# ------------------ TRIMMER ------------------
-def trim_prompt_to_limit(prompt: str) -> str:
-    """Trim prompt to ~7800 tokens and append notice."""
-    tokens = estimate_tokens(prompt)
-    if tokens <= MAX_TOKENS_ALLOWED:
-        return prompt  # no trimming needed
 
-    print(f"⚠️ Prompt too long ({tokens} tokens). Trimming to {TRIMMED_TARGET} tokens...")
-
-    # Approximate character cutoff to reach target tokens
-    target_chars = int(TRIMMED_TARGET * 3.5)
-
-    trimmed = prompt[:target_chars].rstrip()
-
-    trimmed += "\n\n[PROMPT TOO LONG — TRIMMED, FIGURE OUT YOURSELF]\n"
-
-    return trimmed
-
-
-# ------------------ FUNCTIONS ------------------
-async def run_pest(file_path: str) -> str:
-    """Run Pest on file."""
-    try:
-        result = subprocess.run(
-            ["php", "-d", "memory_limit=2000M", "vendor/bin/pest", file_path],
-            capture_output=True,
-            text=True,
-            timeout=60
-        )
-        print(f"🛠️ Pest run completed for {file_path} (exit {result.returncode})")
-        return result.stdout
-    except subprocess.TimeoutExpired:
-        print(f"⏭️ Pest exceeded 60 seconds, skipping.")
-        return "Pest run timed out."
-    except Exception as e:
-        return f"ERROR running Pest: {e}"
-
-
-async def generate_fixed_test(file_path: str, code: str, pest_output: str) -> bool:
-    if not client:
-        print("❌ Client not initialized.")
-        return False
-
-    # Build prompt
-    prompt = f"""
+# ------------------ PROMPT ------------------
+# Identical for every fix request and sent first, so the provider can serve it
+# from its prompt cache; the code and Pest output follow. (No batch mode: every
+# fix is checked by its own Pest run before the next round.)
+FIX_INSTRUCTIONS = """
 You are an expert Laravel/PHP developer and Pest testing specialist. 
 You are given a PHP Pest unit test file and its debug output. Your task is to **fix all failing tests and errors** while preserving passing tests and existing test logic.
 
@@ -103,107 +79,194 @@ Constraints:
 10. Return ONLY the complete PHP file content with fixes; no explanations or extra text.
 
 FILE CONTENT:
-{code}
-
-PEST DEBUG OUTPUT:
-{pest_output}
 """
 
-    # Estimate tokens before trimming
-    initial_tokens = estimate_tokens(prompt)
-    print(f"🔢 Estimated prompt tokens: {initial_tokens}")
 
-    # Trim if needed
-    prompt = trim_prompt_to_limit(prompt)
+# ------------------ FUNCTIONS ------------------
+async def run_pest(file_path: str):
+    """Run Pest on file without blocking the event loop. Returns a PestResult."""
+    return await pest_runner.run(file_path)
 
-    trimmed_tokens = estimate_tokens(prompt)
-    print(f"✂️ Tokens AFTER trimming: {trimmed_tokens}")
 
-    print(f"🔧 Sending {file_path} to OpenAI...")
+# ------------------ REPAIR STATE ------------------
+def state_path_for(file_path: str) -> str:
+    return os.path.join(STATE_DIR, os.path.basename(file_path) + ".json")
 
-    try:
-        response = await asyncio.to_thread(
-            lambda: client.complete(
-                messages=[
-                    SystemMessage("You are an expert Laravel/PHP developer and Pest testing specialist."),
-                    UserMessage(prompt)
-                ],
-                model=MODEL_NAME
-            )
-        )
-    except Exception as e:
-        print(f"❌ OpenAI Error: {e}")
-        return False
 
+def load_state(file_path: str, source_hash: str) -> dict:
+    """Load saved repair progress; progress for an older version of the source is discarded."""
     try:
-        fixed_code = response.choices[0].message.content.strip()
-    except:
-        print("⚠️ Empty response.")
-        return False
+        with open(state_path_for(file_path), "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return state if state.get("source_hash") == source_hash else {}
+
+
+async def save_state(file_path: str, state: dict):
+    """Persist repair progress after every round (temp file + rename)."""
+    path = state_path_for(file_path)
+    async with aiofiles.open(path + ".tmp", "w", encoding="utf-8") as f:
+        await f.write(json.dumps(state, indent=2))
+    os.replace(path + ".tmp", path)
 
-    if not fixed_code:
-        print("⚠️ Model returned empty code.")
-        return False
 
-    # Save output file
+async def save_fixed_code(file_path: str, fixed_code: str) -> str:
     fixed_path = os.path.join(OUTPUT_DIR, os.path.basename(file_path))
     async with aiofiles.open(fixed_path, "w", encoding="utf-8") as f:
         await f.write(fixed_code)
 
-    
     fixed_path_2 = os.path.join(OUTPUT_DIR_2, os.path.basename(file_path))
     async with aiofiles.open(fixed_path_2, "w", encoding="utf-8") as f:
-        await f.write(fixed_code)     
+        await f.write(fixed_code)
 
     print(f"✅ Fixed file saved: {fixed_path}")
-    return True
+    return fixed_path
+
+
+async def generate_fixed_test(file_path: str, code: str, pest_output: str):
+    """Ask the model for a fixed version of `code`. Returns the fixed code or None."""
+    # Instructions are never cut, the code is cut at whole-test boundaries and
+    # the Pest output loses its middle (first failure and summary survive)
+    sections = [
+        Section(FIX_INSTRUCTIONS),
+        Section(code, TESTS),
+        Section("\n\nPEST DEBUG OUTPUT:\n"),
+        Section(pest_output, MIDDLE),
+        Section("\n"),
+    ]
+
+    # Count tokens before trimming
+    initial_tokens = sum(count_tokens(section.text) for section in sections)
+    print(f"🔢 Estimated prompt tokens: {initial_tokens}")
 
+    # Trim if needed
+    prompt = build_prompt(sections, MAX_TOKENS_ALLOWED, TRIMMED_TARGET)
 
-# ------------------ MAIN ------------------
-async def main():
-    php_test_files = glob.glob("tests/Unit/**/*.php", recursive=True)
+    trimmed_tokens = count_tokens(prompt)
+    print(f"✂️ Tokens AFTER trimming: {trimmed_tokens}")
 
-    if not php_test_files:
-        print("⚠️ No PHP test files found.")
-        return
+    fixed_code = response_cache.get(MODEL_NAME, SYSTEM_MESSAGE, prompt)
+    if fixed_code is not None:
+        print(f"💾 Cache hit for {file_path}, skipping API call.")
+        return fixed_code
+    if not client:
+        print(f"❌ Client not initialized, {file_path} is not cached.")
+        return None
 
-    for file_path in php_test_files:
+    await rate_limiter.acquire(tokens=trimmed_tokens)
+    print(f"🔧 Sending {file_path} to OpenAI...")
 
+    try:
+        fixed_code = await client.complete(prompt, system=SYSTEM_MESSAGE)
+    except Exception as e:
+        print(f"❌ OpenAI Error: {e}")
+        return None
 
-        # Skip if already processed
-        sample_path = os.path.join(OUTPUT_DIR, os.path.basename(file_path))
-        if os.path.exists(sample_path):
-            print(f"⏭️ Already processed: {sample_path}")
-            continue
+    if not fixed_code:
+        print("⚠️ Model returned empty code.")
+        return None
 
-        print(f"\n🔍 Processing: {file_path}")
+    response_cache.put(MODEL_NAME, SYSTEM_MESSAGE, prompt, fixed_code)
+    return fixed_code
 
-        # Read source test file
-        try:
-            async with aiofiles.open(file_path, "r", encoding="utf-8") as f:
-                code = await f.read()
-        except Exception as e:
-            print(f"❌ Cannot read file: {e}")
-            continue
 
-        if not code.strip():
-            print(f"⏭️ Empty file, skipping.")
-            continue
+# ------------------ MAIN ------------------
+async def process_file(file_path: str):
+    """Run Pest, fix, re-run Pest on the fix, until green or out of budget."""
+    print(f"\n🔍 Processing: {file_path}")
 
-        pest_output = await run_pest(file_path)
+    # Read source test file
+    try:
+        async with aiofiles.open(file_path, "r", encoding="utf-8") as f:
+            source = await f.read()
+    except Exception as e:
+        print(f"❌ Cannot read file: {e}")
+        return
+
+    if not source.strip():
+        print(f"⏭️ Empty file, skipping.")
+        return
+
+    # Resume from the last cached round, if any
+    source_hash = hashlib.sha256(source.encode("utf-8")).hexdigest()
+    state = load_state(file_path, source_hash) or {"source_hash": source_hash, "round": 0, "passed": False}
+    if state["passed"]:
+        print(f"⏭️ Already green after {state['round']} round(s): {file_path}")
+        return
+
+    if state["round"]:
+        code = state["code"]
+        current_path = os.path.join(OUTPUT_DIR, os.path.basename(file_path))
+        print(f"↩️ Resuming {file_path} at round {state['round']}")
+    else:
+        code = source
+        current_path = file_path
+
+    deadline = time.monotonic() + MAX_FILE_TIME
+    while True:
+        # The latest fix may not be on disk if an earlier run was interrupted
+        if state["round"] and not os.path.exists(current_path):
+            current_path = await save_fixed_code(file_path, code)
+
+        result = await run_pest(current_path)
+        if result.passed:
+            state["passed"] = True
+            await save_state(file_path, state)
+            print(f"🟢 Green after {state['round']} fix round(s): {file_path}")
+            return
+
+        if state["round"] >= MAX_FIX_ROUNDS or time.monotonic() >= deadline:
+            print(f"🔴 Still failing after {state['round']} fix round(s), giving up: {file_path}")
+            return
 
         try:
-            await asyncio.wait_for(
-            generate_fixed_test(file_path, code, pest_output),
-            timeout=MAX_ITERATION_TIME
+            fixed_code = await asyncio.wait_for(
+            generate_fixed_test(file_path, code, result.output),
+            timeout=min(MAX_ITERATION_TIME, max(deadline - time.monotonic(), 1))
             )
         except asyncio.TimeoutError:
-            print(f"⛔ GPT FIX TIMED OUT after {MAX_ITERATION_TIME} minutes. Skipping this file.")
-            continue
+            print(f"⛔ GPT FIX TIMED OUT after {MAX_ITERATION_TIME} seconds. Skipping this file.")
+            return
+
+        if not fixed_code:
+            return
+
+        code = fixed_code
+        current_path = await save_fixed_code(file_path, code)
+        state.update(round=state["round"] + 1, code=code)
+        await save_state(file_path, state)
 
 
-        print(f"⏳ Waiting {RATE_LIMIT_SECONDS}s for rate limit...")
-        await asyncio.sleep(RATE_LIMIT_SECONDS)
+async def worker(queue: asyncio.Queue):
+    """Pull files off the shared queue until it is drained."""
+    while True:
+        try:
+            file_path = queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+        try:
+            await process_file(file_path)
+        finally:
+            queue.task_done()
+
+
+async def main():
+    php_test_files = glob.glob(f"{INPUT_DIR}/**/*.php", recursive=True)
+
+    if not php_test_files:
+        print("⚠️ No PHP test files found.")
+        return
+
+    # Every file is queued; process_file skips the ones whose saved state is
+    # already green and resumes the rest from their last round.
+    queue = asyncio.Queue()
+    for file_path in php_test_files:
+        queue.put_nowait(file_path)
+
+    # While one file waits on Pest, other workers can be waiting on the model
+    workers = min(MAX_CONCURRENT_FILES, queue.qsize())
+    await asyncio.gather(*(worker(queue) for _ in range(workers)))
 
     print("\n🎉 All test files processed.")
 
@@ -211,6 +274,8 @@ async def main():
 # ------------------ ENTRY ------------------
 if __name__ == "__main__":
     if not API_KEY:
-        print("FATAL: UZAIR_OPEN_AI_API_KEY_3 missing.")
-    else:
+        print("⚠️ UZAIR_OPEN_AI_API_KEY_3 missing: only cached fixes are used.")
         asyncio.run(main())
+    else:
+        # The pooled HTTP session is closed once main() is done
+        asyncio.run(client.run(main()))
@@ -2,13 +2,21 @@ import os
 import glob
 import aiofiles
 import asyncio
-import subprocess
 from dotenv import load_dotenv
-from google import genai
+from llm_client import GeminiClient
+from pest_runner import PestRunner
+from prompt_budget import count_tokens
+from rate_limiter import RateLimiter
+from response_cache import ResponseCache
 
 # ------------------ CONFIG ------------------
 MODEL_NAME = "gemini-2.5-flash"
-RATE_LIMIT_SECONDS = 6        # ~10 requests per minute
+REQUESTS_PER_MINUTE = 10      # Provider RPM budget
+TOKENS_PER_MINUTE = 250000    # Provider TPM budget (estimated prompt tokens)
+REQUEST_BURST = 1             # Requests allowed back-to-back before pacing kicks in
+MAX_CONCURRENT_FILES = 4      # Files in flight (Pest runs overlap API calls)
+PEST_CONCURRENCY = 2          # Concurrent Pest processes
+PEST_TIMEOUT_SECONDS = 60     # Pest run is killed (whole process tree) after this
 OUTPUT_DIR = "../tests/sample"
 OUTPUT_DIR_2 = "../tests/newfolder"
 
@@ -21,33 +29,26 @@ load_dotenv()
 API_KEY = os.getenv("UZAIR_GOOGLE_GEMINI_API_KEY_2")
 
 # Initialize Gemini client
-client = genai.Client(api_key=API_KEY) if API_KEY else None
+client = GeminiClient(MODEL_NAME, API_KEY, MAX_CONCURRENT_FILES) if API_KEY else None
+
+# Paces API calls by the provider's real limits instead of a fixed sleep per file
+rate_limiter = RateLimiter(REQUESTS_PER_MINUTE, TOKENS_PER_MINUTE, REQUEST_BURST)
+
+# Pest runs in asyncio subprocesses so they overlap Gemini calls on other files
+pest_runner = PestRunner(PEST_CONCURRENCY, PEST_TIMEOUT_SECONDS)
+
+# Responses keyed by (model, system message, prompt); Gemini calls here have no system message
+response_cache = ResponseCache()
 
 # ------------------ FUNCTIONS ------------------
 async def run_pest(file_path: str) -> str:
-    """Run Pest on a given PHP test file and return stdout."""
-    try:
-        result = subprocess.run(
-            ["php", "-d", "memory_limit=2000M", "vendor/bin/pest", file_path],
-            capture_output=True,
-            text=True,
-            timeout=60
-        )
-        print(f"🛠️ Pest run completed for {file_path} (exit {result.returncode})")
-        return result.stdout
-    except subprocess.TimeoutExpired:
-        print(f"⏭️ Pest exceeded 60 seconds, skipping.")
-        return "Pest run timed out."
-    except Exception as e:
-        return f"ERROR running Pest: {e}"
+    """Run Pest on a given PHP test file without blocking the event loop and return stdout."""
+    result = await pest_runner.run(file_path)
+    return result.output
 
 
 async def generate_fixed_test(file_path: str, code: str, pest_output: str) -> bool:
     """Generate fixed Pest tests using Gemini 2.5 Flash."""
-    if not client:
-        print("❌ Gemini client not initialized.")
-        return False
-
     prompt = f"""
 You are an expert Laravel/PHP developer and Pest testing specialist. 
 You are given a PHP Pest unit test file and its debug output. Your task is to **fix all failing tests and errors** while preserving passing tests and existing test logic.
@@ -76,21 +77,26 @@ PEST DEBUG OUTPUT:
 {pest_output}
 """
 
-    try:
-        response = await asyncio.to_thread(
-            lambda: client.models.generate_content(
-                model=MODEL_NAME,
-                contents=prompt
-            )
-        )
-    except Exception as e:
-        print(f"❌ Gemini API Error: {e}")
+    test_code = response_cache.get(MODEL_NAME, None, prompt)
+    if test_code is not None:
+        print(f"💾 Cache hit for {file_path}, skipping API call.")
+    elif not client:
+        print(f"❌ Gemini client not initialized, {file_path} is not cached.")
         return False
+    else:
+        await rate_limiter.acquire(tokens=count_tokens(prompt))
 
-    test_code = response.text.strip()
-    if not test_code:
-        print("⚠️ Model returned empty content.")
-        return False
+        try:
+            test_code = await client.complete(prompt)
+        except Exception as e:
+            print(f"❌ Gemini API Error: {e}")
+            return False
+
+        if not test_code:
+            print("⚠️ Model returned empty content.")
+            return False
+
+        response_cache.put(MODEL_NAME, None, prompt, test_code)
 
     # Save to first output folder
     fixed_path = os.path.join(OUTPUT_DIR, os.path.basename(file_path))
@@ -108,6 +114,38 @@ PEST DEBUG OUTPUT:
     return True
 
 
+async def process_file(file_path: str):
+    print(f"\n🔍 Processing: {file_path}")
+
+    # Read PHP test file
+    try:
+        async with aiofiles.open(file_path, "r", encoding="utf-8") as f:
+            code = await f.read()
+    except Exception as e:
+        print(f"❌ Cannot read file: {e}")
+        return
+
+    pest_output = await run_pest(file_path)
+
+    try:
+        await generate_fixed_test(file_path, code, pest_output)
+    except asyncio.TimeoutError:
+        print(f"⛔ GPT FIX TIMED OUT, skipping this file.")
+
+
+async def worker(queue: asyncio.Queue):
+    """Pull files off the shared queue until it is drained."""
+    while True:
+        try:
+            file_path = queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+        try:
+            await process_file(file_path)
+        finally:
+            queue.task_done()
+
+
 async def main():
     php_test_files = glob.glob("tests/Unit/**/*.php", recursive=True)
 
@@ -115,6 +153,7 @@ async def main():
         print("⚠️ No PHP test files found.")
         return
 
+    queue = asyncio.Queue()
     for file_path in php_test_files:
 
         # --- SKIP LOGIC: Skip if basename exists in OUTPUT_DIR ---
@@ -123,27 +162,10 @@ async def main():
         if os.path.exists(sample_path):
             print(f"⏭️ Skipping {file_path}: already processed in {OUTPUT_DIR}")
             continue
+        queue.put_nowait(file_path)
 
-        print(f"\n🔍 Processing: {file_path}")
-
-        # Read PHP test file
-        try:
-            async with aiofiles.open(file_path, "r", encoding="utf-8") as f:
-                code = await f.read()
-        except Exception as e:
-            print(f"❌ Cannot read file: {e}")
-            continue
-
-        pest_output = await run_pest(file_path)
-
-        try:
-            await generate_fixed_test(file_path, code, pest_output)
-        except asyncio.TimeoutError:
-            print(f"⛔ GPT FIX TIMED OUT, skipping this file.")
-            continue
-
-        print(f"⏳ Waiting {RATE_LIMIT_SECONDS}s for rate limit...")
-        await asyncio.sleep(RATE_LIMIT_SECONDS)
+    workers = min(MAX_CONCURRENT_FILES, queue.qsize())
+    await asyncio.gather(*(worker(queue) for _ in range(workers)))
 
     print("\n🎉 All test files processed.")
 
@@ -151,6 +173,8 @@ async def main():
 # ------------------ ENTRY POINT ------------------
 if __name__ == "__main__":
     if not API_KEY:
-        print("FATAL: GOOGLE GEMINI API KEY is missing.")
-    else:
+        print("⚠️ GOOGLE GEMINI API KEY is missing: only cached fixes are used.")
         asyncio.run(main())
+    else:
+        # The pooled HTTP session is closed once main() is done
+        asyncio.run(client.run(main()))
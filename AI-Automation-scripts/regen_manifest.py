@@ -0,0 +1,150 @@
+import hashlib
+import json
+import os
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+MANIFEST_DIR = os.path.join(PROJECT_ROOT, ".llm-cache")
+SAVE_EVERY = 10   # record() calls between automatic saves; a killed run loses at most this many
+
+
+def hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def scan_files(root: str, suffix: str = ".php"):
+    """Recursively yield (path, stat) for files ending in `suffix` using os.scandir."""
+    try:
+        entries = list(os.scandir(root))
+    except FileNotFoundError:
+        return
+    for entry in entries:
+        if entry.is_dir(follow_symlinks=False):
+            yield from scan_files(entry.path, suffix)
+        elif entry.is_file() and entry.name.endswith(suffix):
+            yield entry.path, entry.stat()
+
+
+class Manifest:
+    """
+    Records, per input file, the content hash, prompt template version and
+    output path of the last successful generation.
+
+    An input is regenerated only when its content or the template version
+    changed, or its output went missing. Unchanged inputs are recognised from
+    (mtime, size) without reading them; only touched files are re-hashed.
+
+    Every `save_every` records are written to disk right away, so a run that
+    is killed part-way keeps (almost) everything it already paid for.
+    """
+
+    def __init__(self, name: str, template_version: str, path: str = None, save_every: int = SAVE_EVERY):
+        self.template_version = template_version
+        self.path = path or os.path.join(MANIFEST_DIR, f"manifest-{name}.json")
+        self.save_every = save_every
+        self.unsaved = 0
+        self.entries = {}
+        self.seen = set()
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f).get("entries", {})
+        except (OSError, ValueError):
+            pass
+
+    @staticmethod
+    def _key(path: str) -> str:
+        return os.path.relpath(path, PROJECT_ROOT).replace("\\", "/")
+
+    def is_current(self, input_path: str, output_path: str, stat: os.stat_result = None) -> bool:
+        """True when `output_path` is still a valid result for `input_path`."""
+        key = self._key(input_path)
+        self.seen.add(key)
+        entry = self.entries.get(key)
+        stat = stat or os.stat(input_path)
+
+        if entry is None:
+            # Outputs generated before the manifest existed: adopt them if they
+            # are newer than their source instead of paying for them again.
+            try:
+                if os.path.getmtime(output_path) >= stat.st_mtime:
+                    self.record(input_path, output_path, stat)
+                    return True
+            except OSError:
+                pass
+            return False
+
+        if entry.get("flagged") or entry["template"] != self.template_version or entry["output"] != self._key(output_path):
+            return False
+        if not os.path.exists(output_path):
+            return False
+        if entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+            return True
+
+        # Touched but maybe not edited (checkout, copy): compare content
+        if hash_file(input_path) != entry["hash"]:
+            return False
+        entry.update(mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+        return True
+
+    def record(self, input_path: str, output_path: str, stat: os.stat_result = None):
+        """Store a successful generation of `output_path` from `input_path`."""
+        key = self._key(input_path)
+        stat = stat or os.stat(input_path)
+        self.seen.add(key)
+        self.entries[key] = {
+            "hash": hash_file(input_path),
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "template": self.template_version,
+            "output": self._key(output_path),
+        }
+        self.unsaved += 1
+        if self.save_every and self.unsaved >= self.save_every:
+            self.save()
+
+    def flag(self, output_path: str) -> list:
+        """
+        Queue the inputs of `output_path` for regeneration (e.g. a malformed
+        result). The entry is kept, so prune() still owns the output; the next
+        record() clears the flag. Returns the flagged input keys.
+        """
+        output = self._key(output_path)
+        flagged = []
+        for key, entry in self.entries.items():
+            if entry["output"] == output:
+                entry["flagged"] = True
+                flagged.append(key)
+        return flagged
+
+    def is_flagged(self, input_path: str) -> bool:
+        """True when the last output of `input_path` was queued by flag()."""
+        entry = self.entries.get(self._key(input_path))
+        return bool(entry and entry.get("flagged"))
+
+    def prune(self) -> list:
+        """
+        Drop entries whose input was not seen in this run (deleted or renamed
+        sources) and delete their now-stale outputs. Returns removed outputs.
+        """
+        removed = []
+        for key in [k for k in self.entries if k not in self.seen]:
+            output = self.entries.pop(key)["output"]
+            # Several inputs can map to one output name; keep it while one is alive
+            if any(e["output"] == output for e in self.entries.values()):
+                continue
+            output_path = os.path.join(PROJECT_ROOT, output)
+            if os.path.exists(output_path):
+                os.remove(output_path)
+                removed.append(output_path)
+        return removed
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"entries": self.entries}, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+        self.unsaved = 0
@@ -0,0 +1,570 @@
+import argparse
+import hashlib
+import json
+import os
+import tempfile
+from itertools import chain
+from concurrent.futures import ProcessPoolExecutor
+from xml.sax.saxutils import escape
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
+from reportlab.lib.units import inch
+from reportlab.graphics.shapes import Drawing
+from reportlab.graphics.charts.barcharts import HorizontalBarChart
+
+from report_formats import WRITERS, write_report
+from report_grid import GridStyle, TestCaseGrid
+from report_schemas import INTEGRATION_SCHEMA, SCHEMAS, UNIT_SCHEMA, ReportSchema
+from report_summary import ReportSummary
+from result_store import iter_results, store_is_current
+
+try:
+    from pypdf import PdfWriter
+    from pypdf.annotations import Link
+    from pypdf.generic import Fit
+except ImportError:  # Only needed for parallel and incremental rendering
+    PdfWriter = None
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+OUTPUT_FORMAT = "pdf"  # pdf | html | md; --format on the command line
+
+# Parallel rendering
+RENDER_WORKERS = os.cpu_count() or 1  # Processes rendering file sections; 1 = single build
+SECTION_BATCH_SIZE = 25               # Files per separately rendered PDF part
+
+# Incremental rendering: one cached PDF fragment per file section
+INCREMENTAL_REPORTS = True
+FRAGMENT_CACHE_DIR = os.path.join(PROJECT_ROOT, ".llm-cache", "report-fragments")
+FRAGMENT_VERSION = "1"  # Bump when the section layout changes to invalidate all fragments
+
+# Streaming rendering: results are read twice and never held in memory
+STREAMING_REPORTS = False  # Default for build_report(); --stream on the command line
+STREAM_WINDOW = 64         # Flowables queued ahead of the page being laid out
+
+
+class ReportStyles:
+    """Paragraph and table styles shared by every report built in this process."""
+
+    def __init__(self):
+        styles = getSampleStyleSheet()
+        self.title = styles["Title"]
+        self.subtitle = styles["Normal"]
+        self.subtitle.alignment = 1  # Center
+        self.subtitle.fontSize = 12
+
+        self.heading = styles["Heading2"]
+        self.heading.textColor = colors.black
+
+        # Same object as `subtitle`, as in the original scripts
+        self.normal = styles["Normal"]
+        self.normal.fontSize = 10
+
+        # Custom style for table content
+        self.table_cell = ParagraphStyle('TableCell', parent=styles['Normal'], fontSize=9, leading=11)
+        self.table_cell_left = ParagraphStyle('TableCellLeft', parent=self.table_cell, alignment=0)
+        self.table_cell_bold = ParagraphStyle('TableCellBold', parent=self.table_cell_left, fontName='Helvetica-Bold')
+
+        self.index_table = TableStyle([
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('GRID', (0, 0), (-1, -1), 0.25, colors.lightgrey),
+            ('PADDING', (0, 0), (-1, -1), 4),
+        ])
+        self.summary_table = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),  # Header row
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 9),
+            ('ALIGN', (1, 0), (-1, -1), 'RIGHT'),
+            ('GRID', (0, 0), (-1, -1), 0.25, colors.grey),
+        ])
+        # Key | Value grid of each test case (label column shaded)
+        self.test_case_grid = GridStyle(label_width=1.5*inch, value_width=4.5*inch,
+                                        font_size=self.table_cell.fontSize, leading=self.table_cell.leading)
+
+
+_styles = None
+
+
+def get_styles() -> ReportStyles:
+    global _styles
+    if _styles is None:
+        _styles = ReportStyles()
+    return _styles
+
+
+def iter_test_results(schema: ReportSchema, file_path: str = None):
+    """
+    Lazily yield one {"filename", "test_cases"} record per file, from the
+    SQLite store when that is up to date, else by parsing the combined
+    results file of `schema`.
+    """
+    if file_path is None and store_is_current(schema):
+        # Structured store built by the merge script: no text parsing needed
+        return iter_results(schema)
+    file_path = file_path or schema.input_file
+    if not os.path.exists(file_path):
+        print(f"Error: {file_path} not found.")
+        return iter(())
+    return schema.parser.parse(file_path)
+
+
+def parse_test_results(schema: ReportSchema, file_path: str = None, summary: ReportSummary = None):
+    """
+    Parses the combined results of `schema` into a structured dictionary.
+    When `summary` is given, it is filled in the same pass.
+    Returns: List of dictionaries, each representing a file with its test cases.
+    """
+    results = iter_test_results(schema, file_path)
+    return list(summary.track(results) if summary else results)
+
+
+def summarize_results(schema: ReportSchema, file_path: str = None) -> ReportSummary:
+    """Summary of the results of `schema`, from one pass that keeps none of them."""
+    summary = ReportSummary()
+    for _ in summary.track(iter_test_results(schema, file_path)):
+        pass
+    return summary
+
+
+def _count_rows(counter, total: int):
+    return [[name, count, f"{100.0 * count / total:.1f}%" if total else "-"]
+            for name, count in counter.most_common()]
+
+
+def _bar_chart(counter, width=3*inch, max_bars=8) -> Drawing:
+    """Horizontal bar chart of the `max_bars` largest counts (the rest grouped as Other)."""
+    items = counter.most_common()
+    if len(items) > max_bars:
+        items = items[:max_bars - 1] + [("Other", sum(count for _, count in items[max_bars - 1:]))]
+    items.reverse()  # Largest bar on top
+    bar_height = 14
+    drawing = Drawing(width, bar_height * len(items) + 20)
+    chart = HorizontalBarChart()
+    chart.x, chart.y = 70, 10
+    chart.width, chart.height = width - 80, bar_height * len(items)
+    chart.data = [[count for _, count in items]]
+    chart.categoryAxis.categoryNames = [name[:14] for name, _ in items]
+    chart.categoryAxis.labels.fontSize = 7
+    chart.valueAxis.valueMin = 0
+    chart.valueAxis.labels.fontSize = 7
+    chart.bars[0].fillColor = colors.steelblue
+    drawing.add(chart)
+    return drawing
+
+
+def build_summary(summary: ReportSummary, styles: ReportStyles):
+    """Summary dashboard: totals, Status/Severity breakdowns, areas and largest files."""
+    story = [Paragraph("Summary", styles.heading), Spacer(1, 0.1*inch)]
+
+    totals = Table([["Files", "Test cases"], [len(summary.files), summary.total_tests]],
+                   colWidths=[1.5*inch, 1.5*inch], hAlign="LEFT")
+    totals.setStyle(styles.summary_table)
+    story += [totals, Spacer(1, 0.2*inch)]
+
+    for title, counter in (("Status", summary.status), ("Severity", summary.severity)):
+        if not counter:
+            continue
+        table = Table([[title, "Test cases", "Share"]] + _count_rows(counter, summary.total_tests),
+                      colWidths=[1.4*inch, 0.8*inch, 0.7*inch])
+        table.setStyle(styles.summary_table)
+        row = Table([[table, _bar_chart(counter)]], colWidths=[3*inch, 3*inch], hAlign="LEFT")
+        row.setStyle(TableStyle([('VALIGN', (0, 0), (-1, -1), 'TOP')]))
+        story += [row, Spacer(1, 0.2*inch)]
+
+    areas = [[area, summary.area_files[area], summary.area_tests[area]] for area, _ in summary.area_tests.most_common()]
+    if areas:
+        table = Table([["Area", "Files", "Test cases"]] + areas, colWidths=[1.4*inch, 0.8*inch, 0.8*inch], hAlign="LEFT")
+        table.setStyle(styles.summary_table)
+        story += [table, Spacer(1, 0.2*inch)]
+
+    for title, heading, rows in (
+        ("Largest files by test cases", "Test cases", summary.largest_by_tests()),
+        ("Largest files by documentation size", "Characters", summary.largest_by_size()),
+    ):
+        if not rows:
+            continue
+        story.append(Paragraph(title, styles.table_cell_bold))
+        story.append(Spacer(1, 0.05*inch))
+        table = Table([["File", heading]] + [[Paragraph(escape(name), styles.table_cell_left), count] for name, count in rows],
+                      colWidths=[4.8*inch, 1.2*inch], hAlign="LEFT")
+        table.setStyle(styles.summary_table)
+        story += [table, Spacer(1, 0.2*inch)]
+    return story
+
+
+def build_front_matter(schema: ReportSchema, summary: ReportSummary, styles: ReportStyles, link_rects: list = None):
+    """
+    Title page, summary and index. When `link_rects` is given, index entries
+    are drawn without links and append (file_index, page, rect) to it
+    instead, so the links can be added once the rendered parts are merged.
+    """
+    story = []
+
+    # --- Title Page ---
+    story.append(Spacer(1, 2*inch))
+    story.append(Paragraph("SQE Final Project", styles.title))
+    story.append(Spacer(1, 0.5*inch))
+    story.append(Paragraph("<b>Project Title:</b> Comprehensive Quality Engineering for the Open-Source Crater Application", styles.subtitle))
+    story.append(Spacer(1, 0.2*inch))
+    story.append(Paragraph("<b>Testers:</b> Uzair Majeed 23i-3063, Hussnain Haider 23i-0695, Faez Ahmed 23i-0598", styles.subtitle))
+    story.append(Spacer(1, 0.2*inch))
+    story.append(Paragraph("<b>Section:</b> SE-B", styles.subtitle))
+    story.append(Spacer(1, 1*inch))
+    story.append(Paragraph(f"<b>{schema.report_title}</b>", styles.subtitle))
+    story.append(PageBreak())
+
+    # --- Summary ---
+    story += build_summary(summary, styles)
+    story.append(PageBreak())
+
+    # --- Index/Table of Contents ---
+    story.append(Paragraph("Index of Test Files", styles.heading))
+    story.append(Spacer(1, 0.2*inch))
+
+    index_data = []
+    for i, (filename, test_count) in enumerate(summary.files):
+        filename = escape(filename)
+        if link_rects is None:
+            # Link to the anchor of the file's heading
+            entry = Paragraph(f'<a href="#FILE_{i}" color="blue">{filename}</a>', styles.table_cell)
+        else:
+            entry = IndexEntry(f'<font color="blue">{filename}</font>', styles.table_cell, i, link_rects)
+        index_data.append([Paragraph(f"{i+1}.", styles.table_cell), entry, Paragraph(str(test_count), styles.table_cell)])
+
+    if index_data:
+        # Third column: number of test cases in the file
+        t_index = Table(index_data, colWidths=[0.5*inch, 4.9*inch, 0.6*inch])
+        t_index.setStyle(styles.index_table)
+        story.append(t_index)
+
+    story.append(PageBreak())
+    return story
+
+
+def iter_file_sections(schema: ReportSchema, files, styles: ReportStyles, start_index: int = 0, anchors=True):
+    """
+    Yield one heading (anchored FILE_<n>) plus one grid per test case for each
+    file, pulling the files from `files` only as the flowables are consumed.
+    Cached fragments are rendered without anchors so they do not depend on the
+    file's position in the report.
+    """
+    for i, file_data in enumerate(files, start_index):
+        # Note: reportlab Paragraph anchor definition is <a name="..."/>
+        anchor = f'<a name="FILE_{i}"/>' if anchors else ""
+        heading = Paragraph(f'{anchor}File: {escape(file_data["filename"])}', styles.heading)
+        heading.file_index = i
+        yield heading
+        yield Spacer(1, 0.1*inch)
+
+        for tc in file_data['test_cases']:
+            # Key | Value rows, in the schema's display order
+            rows = [(key, tc.get(key, "N/A")) for key in schema.fields]
+            yield TestCaseGrid(rows, styles.test_case_grid)
+            yield Spacer(1, 0.2*inch)
+
+        yield PageBreak()
+
+
+def build_file_sections(schema: ReportSchema, files, styles: ReportStyles, start_index: int = 0, anchors=True):
+    return list(iter_file_sections(schema, files, styles, start_index, anchors))
+
+
+def build_story(schema: ReportSchema, parsed_data, styles: ReportStyles, summary: ReportSummary = None):
+    summary = summary or ReportSummary.from_results(parsed_data)
+    return build_front_matter(schema, summary, styles) + build_file_sections(schema, parsed_data, styles)
+
+
+# ------------------ STREAMING RENDERING ------------------
+class _StreamingDocTemplate(SimpleDocTemplate):
+    """
+    Builds from an iterator of flowables instead of a list. Only STREAM_WINDOW
+    flowables are queued at a time: the queue is topped up before each one is
+    laid out, and finished flowables are dropped as their pages are drawn.
+    """
+
+    def build_stream(self, flowables):
+        self._pending = iter(flowables)
+        self._story = []
+        self._refill()
+        self.build(self._story)
+
+    def _refill(self):
+        while len(self._story) < STREAM_WINDOW:
+            flowable = next(self._pending, None)
+            if flowable is None:
+                break
+            self._story.append(flowable)
+
+    def filterFlowables(self, flowables):
+        # Called by handle_flowable() before it takes flowables[0]; the
+        # template's own queue of pending page actions goes through here too
+        if flowables is self._story:
+            self._refill()
+
+
+def _create_pdf_streaming(schema: ReportSchema, output_filename: str, file_path: str = None):
+    """
+    Two passes over the results, neither of which keeps them: the first only
+    fills the ReportSummary the title, summary and index pages are made of,
+    the second feeds the file sections to the document one file at a time.
+    Index links are named destinations, resolved when the PDF is saved.
+    """
+    summary = summarize_results(schema, file_path)
+    if not summary.files:
+        print("No data found to generate PDF.")
+        return
+
+    print(f"Streaming PDF: {output_filename} ({len(summary.files)} files, {summary.total_tests} test cases)...")
+    styles = get_styles()
+    story = chain(build_front_matter(schema, summary, styles),
+                  iter_file_sections(schema, iter_test_results(schema, file_path), styles))
+    try:
+        _new_doc(output_filename, _StreamingDocTemplate).build_stream(story)
+        print("PDF generation complete.")
+    except Exception as e:
+        print(f"Error building PDF: {e}")
+
+
+# ------------------ PARALLEL RENDERING ------------------
+class IndexEntry(Paragraph):
+    """Index paragraph that records where it was drawn (page, absolute rect)."""
+
+    def __init__(self, text: str, style, target: int, link_rects: list):
+        super().__init__(text, style)
+        self.target = target
+        self.link_rects = link_rects
+
+    def draw(self):
+        super().draw()
+        x0, y0 = self.canv.absolutePosition(0, 0)
+        x1, y1 = self.canv.absolutePosition(self.width, self.height)
+        self.link_rects.append((self.target, self.canv.getPageNumber() - 1, (x0, y0, x1, y1)))
+
+
+class _PartDocTemplate(SimpleDocTemplate):
+    """Records the (0-based) page each file heading lands on."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.file_pages = {}
+
+    def afterFlowable(self, flowable):
+        file_index = getattr(flowable, "file_index", None)
+        if file_index is not None:
+            self.file_pages[file_index] = self.page - 1
+
+
+def _new_doc(output_filename: str, doc_class=SimpleDocTemplate):
+    return doc_class(output_filename, pagesize=A4, rightMargin=40, leftMargin=40, topMargin=40, bottomMargin=40)
+
+
+def _render_part(schema_name: str, output_filename: str, parsed_data, start_index: int, front: bool):
+    """
+    Worker: render the front matter (`parsed_data` is then the ReportSummary)
+    or one batch of file sections to its own PDF.
+    Returns (page_count, {file_index: page_in_part}, [(file_index, page_in_part, rect)]).
+    """
+    schema, styles = SCHEMAS[schema_name], get_styles()
+    doc = _new_doc(output_filename, _PartDocTemplate)
+    link_rects = []
+    if front:
+        story = build_front_matter(schema, parsed_data, styles, link_rects)
+    else:
+        story = build_file_sections(schema, parsed_data, styles, start_index)
+    doc.build(story)
+    return doc.page, doc.file_pages, link_rects
+
+
+def _merge_parts(front, parts, output_filename: str):
+    """
+    Concatenate the rendered front matter and section parts with pypdf and
+    link each index entry to its file heading.
+
+    `front` is (path, link_rects) and `parts` a list of
+    (path, {file_index: page_in_part}), in report order.
+    """
+    front_path, link_rects = front
+    writer = PdfWriter()
+    writer.append(front_path)
+
+    # Page offset of every file heading in the merged document
+    file_pages = {}
+    for path, pages in parts:
+        offset = len(writer.pages)
+        writer.append(path)
+        file_pages.update({i: offset + page for i, page in pages.items()})
+
+    for file_index, page, rect in link_rects:
+        target = file_pages.get(file_index)
+        if target is None:
+            continue
+        top = float(writer.pages[target].mediabox.top)
+        writer.add_annotation(page, Link(rect=rect, border=[0, 0, 0], target_page_index=target, fit=Fit.xyz(top=top)))
+
+    tmp_path = output_filename + ".tmp"
+    with open(tmp_path, "wb") as f:
+        writer.write(f)
+    os.replace(tmp_path, output_filename)
+
+
+def _create_pdf_parallel(schema: ReportSchema, parsed_data, output_filename: str, workers: int,
+                         summary: ReportSummary):
+    batches = [(start, parsed_data[start:start + SECTION_BATCH_SIZE])
+               for start in range(0, len(parsed_data), SECTION_BATCH_SIZE)]
+
+    with tempfile.TemporaryDirectory() as tmp_dir, ProcessPoolExecutor(max_workers=workers) as pool:
+        front_path = os.path.join(tmp_dir, "front.pdf")
+        front = pool.submit(_render_part, schema.name, front_path, summary, 0, True)
+        futures = []
+        for n, (start, batch) in enumerate(batches):
+            path = os.path.join(tmp_dir, f"part-{n:05d}.pdf")
+            futures.append((path, pool.submit(_render_part, schema.name, path, batch, start, False)))
+
+        parts = [(path, future.result()[1]) for path, future in futures]
+        _merge_parts((front_path, front.result()[2]), parts, output_filename)
+
+
+# ------------------ INCREMENTAL RENDERING ------------------
+def section_key(schema: ReportSchema, file_data) -> str:
+    """Hash of everything that goes into a file's rendered section."""
+    payload = json.dumps(
+        [FRAGMENT_VERSION, schema.name, schema.fields, file_data["filename"], file_data["test_cases"]],
+        sort_keys=True, ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _render_fragments(schema_name: str, jobs):
+    """Worker: render each (path, file_data) job to its own fragment PDF."""
+    schema, styles = SCHEMAS[schema_name], get_styles()
+    for path, file_data in jobs:
+        tmp_path = path + ".tmp"
+        _new_doc(tmp_path).build(build_file_sections(schema, [file_data], styles, anchors=False))
+        os.replace(tmp_path, path)
+
+
+def _create_pdf_incremental(schema: ReportSchema, parsed_data, output_filename: str, workers: int,
+                            summary: ReportSummary):
+    """
+    Reassemble the report from per-file fragments cached under
+    FRAGMENT_CACHE_DIR/<schema>, keyed by the hash of each file's parsed test
+    cases. Only new or changed sections are rendered; the title page, summary
+    and index are always rebuilt.
+    """
+    fragment_dir = os.path.join(FRAGMENT_CACHE_DIR, schema.name)
+    os.makedirs(fragment_dir, exist_ok=True)
+
+    paths = [os.path.join(fragment_dir, section_key(schema, file_data) + ".pdf") for file_data in parsed_data]
+    jobs = [(path, file_data) for path, file_data in zip(paths, parsed_data) if not os.path.exists(path)]
+    print(f"Reusing {len(paths) - len(jobs)} cached sections, rendering {len(jobs)}.")
+
+    batches = [jobs[start:start + SECTION_BATCH_SIZE] for start in range(0, len(jobs), SECTION_BATCH_SIZE)]
+    if workers > 1 and len(batches) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for future in [pool.submit(_render_fragments, schema.name, batch) for batch in batches]:
+                future.result()
+    else:
+        for batch in batches:
+            _render_fragments(schema.name, batch)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        front_path = os.path.join(tmp_dir, "front.pdf")
+        _, _, link_rects = _render_part(schema.name, front_path, summary, 0, True)
+        # Every fragment starts with its file heading
+        parts = [(path, {i: 0}) for i, path in enumerate(paths)]
+        _merge_parts((front_path, link_rects), parts, output_filename)
+
+    # Drop fragments of sections that no longer exist
+    used = {os.path.basename(path) for path in paths}
+    for entry in os.scandir(fragment_dir):
+        if entry.name.endswith(".pdf") and entry.name not in used:
+            os.remove(entry.path)
+
+
+def create_pdf(schema: ReportSchema, parsed_data, output_filename: str = None, workers: int = None,
+               incremental: bool = None, summary: ReportSummary = None):
+    """
+    Render the report.
+
+    - incremental (default): per-file fragments are cached by content hash and
+      only changed sections are re-rendered before reassembly.
+    - parallel: with more than one worker and more than one batch of files,
+      sections are rendered to separate PDFs in a process pool and merged.
+    - otherwise a single SimpleDocTemplate build.
+
+    The first two merge with pypdf and re-create index links from the recorded
+    page offsets.
+    """
+    output_filename = output_filename or schema.output_file
+    workers = workers or RENDER_WORKERS
+    incremental = INCREMENTAL_REPORTS if incremental is None else incremental
+    summary = summary or ReportSummary.from_results(parsed_data)
+    if (workers > 1 or incremental) and PdfWriter is None:
+        print("⚠️ pypdf not installed; rendering in a single process without the fragment cache.")
+        workers, incremental = 1, False
+
+    print(f"Building PDF: {output_filename}...")
+    try:
+        if incremental:
+            _create_pdf_incremental(schema, parsed_data, output_filename, workers, summary)
+        elif workers > 1 and len(parsed_data) > SECTION_BATCH_SIZE:
+            _create_pdf_parallel(schema, parsed_data, output_filename, workers, summary)
+        else:
+            doc = _new_doc(output_filename)
+            doc.build(build_story(schema, parsed_data, get_styles(), summary))
+        print("PDF generation complete.")
+    except Exception as e:
+        print(f"Error building PDF: {e}")
+
+
+def create_text_report(schema: ReportSchema, fmt: str, output: str = None, file_path: str = None):
+    """
+    HTML or Markdown report (report_formats.py): a summary pass, then the
+    results are streamed straight to the output, one file at a time.
+    """
+    summary = summarize_results(schema, file_path)
+    if not summary.files:
+        print("No data found to generate the report.")
+        return
+    output = write_report(schema, fmt, summary, iter_test_results(schema, file_path), output)
+    print(f"Wrote {fmt} report: {output} ({len(summary.files)} files, {summary.total_tests} test cases)")
+
+
+def build_report(schema: ReportSchema, workers: int = None, incremental: bool = None, streaming: bool = None,
+                 fmt: str = None):
+    fmt = fmt or OUTPUT_FORMAT
+    if fmt != "pdf":
+        create_text_report(schema, fmt)
+        return
+    if STREAMING_REPORTS if streaming is None else streaming:
+        _create_pdf_streaming(schema, schema.output_file)
+        return
+
+    print(f"Parsing {schema.name} test results...")
+    summary = ReportSummary()
+    data = parse_test_results(schema, summary=summary)
+    print(f"Parsed {len(data)} files.")
+    if data:
+        create_pdf(schema, data, workers=workers, incremental=incremental, summary=summary)
+    else:
+        print("No data found to generate PDF.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the SQE PDF test reports.")
+    parser.add_argument("reports", nargs="*", choices=list(SCHEMAS), default=list(SCHEMAS),
+                        help="Reports to build (default: all)")
+    parser.add_argument("--workers", type=int, default=RENDER_WORKERS,
+                        help="Processes rendering file sections in parallel (1 = single build)")
+    parser.add_argument("--full", action="store_true",
+                        help="Ignore the fragment cache and render every section")
+    parser.add_argument("--stream", action="store_true",
+                        help="Single process, memory-bounded build that never holds all results at once")
+    parser.add_argument("--format", choices=["pdf"] + list(WRITERS), default=OUTPUT_FORMAT,
+                        help="pdf for hand-in; html (paginated, searchable) or md for quick local reports")
+    args = parser.parse_args()
+    for name in args.reports:
+        build_report(SCHEMAS[name], workers=args.workers, incremental=False if args.full else None,
+                     streaming=True if args.stream else None, fmt=args.format)
@@ -0,0 +1,200 @@
+import html
+import json
+import os
+
+from report_summary import ReportSummary
+
+HTML_FILES_PER_PAGE = 25                                  # Files per generated HTML page
+SEARCH_COLUMNS = ("test_id", "title", "status", "severity")  # Test case columns in the HTML search index
+
+HTML_STYLE = """body { font-family: Helvetica, Arial, sans-serif; font-size: 14px; max-width: 960px; margin: 2em auto; padding: 0 1em; }
+h1, .subtitle { text-align: center; }
+table { border-collapse: collapse; margin: 0.5em 0 1.2em; }
+th, td { border: 1px solid #999; padding: 3px 6px; vertical-align: top; text-align: left; }
+table.tc { width: 100%; }
+table.tc th { background: #d3d3d3; width: 20%; }
+table.tc td { white-space: pre-wrap; }
+td.num { text-align: right; }
+nav { margin: 1em 0; }
+#search { width: 100%; padding: 6px; font-size: 14px; }
+#hits li { margin: 2px 0; }
+"""
+
+HTML_SEARCH = """var box = document.getElementById("search"), hits = document.getElementById("hits");
+box.addEventListener("input", function () {
+  var terms = box.value.toLowerCase().split(/\\s+/).filter(Boolean), out = [];
+  hits.innerHTML = "";
+  if (!terms.length) return;
+  for (var i = 0; i < SEARCH_INDEX.length && out.length < 200; i++) {
+    var entry = SEARCH_INDEX[i], text = entry[2].toLowerCase();
+    if (terms.every(function (t) { return text.indexOf(t) >= 0; })) out.push(entry);
+  }
+  out.forEach(function (entry) {
+    var li = document.createElement("li"), a = document.createElement("a");
+    a.href = entry[0] + "#" + entry[1];
+    a.textContent = entry[3];
+    li.appendChild(a);
+    hits.appendChild(li);
+  });
+});
+"""
+
+
+def output_path(schema, fmt: str) -> str:
+    """Markdown file, or directory of HTML pages, next to the schema's PDF."""
+    base = os.path.splitext(schema.output_file)[0]
+    return base + ".md" if fmt == "md" else base + "_html"
+
+
+def _share(count: int, total: int) -> str:
+    return f"{100.0 * count / total:.1f}%" if total else "-"
+
+
+def _summary_tables(summary: ReportSummary):
+    """(title, header, rows) of every table on the summary page, shared by both backends."""
+    tables = [("Totals", ["Files", "Test cases"], [[len(summary.files), summary.total_tests]])]
+    for title, counter in (("Status", summary.status), ("Severity", summary.severity)):
+        if counter:
+            tables.append((title, [title, "Test cases", "Share"],
+                           [[name, count, _share(count, summary.total_tests)] for name, count in counter.most_common()]))
+    if summary.area_tests:
+        tables.append(("Areas", ["Area", "Files", "Test cases"],
+                       [[area, summary.area_files[area], count] for area, count in summary.area_tests.most_common()]))
+    tables.append(("Largest files by test cases", ["File", "Test cases"], summary.largest_by_tests()))
+    tables.append(("Largest files by documentation size", ["File", "Characters"], summary.largest_by_size()))
+    return [table for table in tables if table[2]]
+
+
+# ------------------ MARKDOWN ------------------
+def _md_cell(value) -> str:
+    return html.escape(str(value), quote=False).replace("|", "\\|").replace("\n", "<br>")
+
+
+def _md_table(header, rows) -> str:
+    lines = ["| " + " | ".join(header) + " |", "|" + "---|" * len(header)]
+    lines += ["| " + " | ".join(_md_cell(cell) for cell in row) + " |" for row in rows]
+    return "\n".join(lines) + "\n\n"
+
+
+def write_markdown(schema, summary: ReportSummary, results, output: str):
+    """Stream the report into one Markdown file; `results` is consumed once."""
+    tmp_path = output + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(f"# {schema.report_title}\n\n")
+        f.write("## Summary\n\n")
+        for title, header, rows in _summary_tables(summary):
+            f.write(f"**{title}**\n\n{_md_table(header, rows)}")
+
+        f.write("## Index of Test Files\n\n")
+        for i, (filename, test_count) in enumerate(summary.files):
+            f.write(f"{i+1}. [{_md_cell(filename)}](#file-{i}) ({test_count})\n")
+        f.write("\n")
+
+        for i, file_data in enumerate(results):
+            f.write(f'<a id="file-{i}"></a>\n\n## File: {_md_cell(file_data["filename"])}\n\n')
+            for tc in file_data["test_cases"]:
+                f.write(_md_table(["Field", "Value"], [(key, tc.get(key, "N/A")) for key in schema.fields]))
+    os.replace(tmp_path, output)
+
+
+# ------------------ HTML ------------------
+def _page_name(page: int) -> str:
+    return f"page-{page:04d}.html"
+
+
+def _html_page(title: str, body: str, scripts=()) -> str:
+    tags = "".join(f'<script src="{src}"></script>' for src in scripts)
+    return (f'<!DOCTYPE html>\n<html><head><meta charset="utf-8"><title>{html.escape(title)}</title>'
+            f'<link rel="stylesheet" href="style.css"></head>\n<body>\n{body}\n{tags}</body></html>\n')
+
+
+def _html_table(header, rows) -> str:
+    head = "".join(f"<th>{html.escape(str(cell))}</th>" for cell in header)
+    body = "".join(
+        "<tr>" + "".join(f'<td class="num">{cell}</td>' if isinstance(cell, int) else f"<td>{html.escape(str(cell))}</td>"
+                         for cell in row) + "</tr>"
+        for row in rows
+    )
+    return f"<table><tr>{head}</tr>{body}</table>\n"
+
+
+def _html_nav(page: int, pages: int) -> str:
+    links = ['<a href="index.html">Index</a>']
+    if page > 1:
+        links.append(f'<a href="{_page_name(page - 1)}">&larr; Previous</a>')
+    if page < pages:
+        links.append(f'<a href="{_page_name(page + 1)}">Next &rarr;</a>')
+    return f"<nav>{' | '.join(links)} &middot; page {page} of {pages}</nav>"
+
+
+def write_html(schema, summary: ReportSummary, results, output: str):
+    """
+    Stream the report into a directory of static pages: index.html (title,
+    summary, index and search box) plus one page per HTML_FILES_PER_PAGE
+    files. Each page is written as soon as its files are read, so only one
+    page is held in memory. search-index.js lists every test case's ID,
+    title, status and severity for the client-side search.
+    """
+    os.makedirs(output, exist_ok=True)
+    pages = max(1, -(-len(summary.files) // HTML_FILES_PER_PAGE))
+    search_fields = [field for field in schema.fields if schema.columns[field] in SEARCH_COLUMNS]
+    search_index = []
+
+    def flush(page: int, sections: list):
+        body = _html_nav(page, pages) + "\n" + "".join(sections) + _html_nav(page, pages)
+        with open(os.path.join(output, _page_name(page)), "w", encoding="utf-8") as f:
+            f.write(_html_page(f"{schema.report_title}: page {page}", body))
+
+    page, sections = 1, []
+    for i, file_data in enumerate(results):
+        if i // HTML_FILES_PER_PAGE + 1 != page:
+            flush(page, sections)
+            page, sections = i // HTML_FILES_PER_PAGE + 1, []
+        filename = file_data["filename"]
+        sections.append(f'<h2 id="file-{i}">File: {html.escape(filename)}</h2>\n')
+        for n, tc in enumerate(file_data["test_cases"]):
+            anchor = f"file-{i}-{n}"
+            sections.append(f'<table class="tc" id="{anchor}">' + "".join(
+                f"<tr><th>{html.escape(key)}</th><td>{html.escape(tc.get(key, 'N/A'))}</td></tr>"
+                for key in schema.fields) + "</table>\n")
+            # [page, anchor, searchable text, link label]
+            values = [tc.get(field, "") for field in search_fields]
+            label = f"{values[0]}: {values[1]} ({filename})"
+            search_index.append([_page_name(page), anchor, " ".join([filename] + values), label])
+    flush(page, sections)
+
+    # Pages left over from a larger previous report
+    for entry in os.scandir(output):
+        if entry.name.startswith("page-") and entry.name > _page_name(pages):
+            os.remove(entry.path)
+
+    with open(os.path.join(output, "search-index.js"), "w", encoding="utf-8") as f:
+        f.write("var SEARCH_INDEX = " + json.dumps(search_index, ensure_ascii=False) + ";\n")
+    with open(os.path.join(output, "search.js"), "w", encoding="utf-8") as f:
+        f.write(HTML_SEARCH)
+    with open(os.path.join(output, "style.css"), "w", encoding="utf-8") as f:
+        f.write(HTML_STYLE)
+
+    body = [f"<h1>SQE Final Project</h1>\n<p class=\"subtitle\"><b>{html.escape(schema.report_title)}</b></p>\n",
+            '<input id="search" type="search" placeholder="Search test cases by ID, title, status, severity or file">\n'
+            '<ul id="hits"></ul>\n<h2>Summary</h2>\n']
+    for title, header, rows in _summary_tables(summary):
+        body.append(f"<h3>{html.escape(title)}</h3>\n" + _html_table(header, rows))
+    body.append("<h2>Index of Test Files</h2>\n<table><tr><th>#</th><th>File</th><th>Test cases</th></tr>")
+    for i, (filename, test_count) in enumerate(summary.files):
+        href = f"{_page_name(i // HTML_FILES_PER_PAGE + 1)}#file-{i}"
+        body.append(f'<tr><td>{i+1}.</td><td><a href="{href}">{html.escape(filename)}</a></td>'
+                    f'<td class="num">{test_count}</td></tr>')
+    body.append("</table>\n")
+    with open(os.path.join(output, "index.html"), "w", encoding="utf-8") as f:
+        f.write(_html_page(schema.report_title, "".join(body), ["search-index.js", "search.js"]))
+
+
+WRITERS = {"html": write_html, "md": write_markdown}
+
+
+def write_report(schema, fmt: str, summary: ReportSummary, results, output: str = None) -> str:
+    """Write the `fmt` report of `schema` and return where it went."""
+    output = output or output_path(schema, fmt)
+    WRITERS[fmt](schema, summary, results, output)
+    return output
@@ -0,0 +1,110 @@
+from reportlab.lib import colors
+from reportlab.lib.units import inch
+from reportlab.lib.utils import simpleSplit
+from reportlab.platypus import Flowable
+
+
+class GridStyle:
+    """
+    Fonts, sizes and colours of the test case grid, created once per report
+    process. Wrapped label lines are cached here since every grid repeats the
+    same field names.
+    """
+
+    def __init__(self, label_width=1.5*inch, value_width=4.5*inch, font="Helvetica",
+                 label_font="Helvetica-Bold", font_size=9, leading=11, padding_x=6, padding_y=3,
+                 label_background=colors.lightgrey, grid_color=colors.grey, grid_width=0.5):
+        self.label_width = label_width
+        self.value_width = value_width
+        self.font = font
+        self.label_font = label_font
+        self.font_size = font_size
+        self.leading = leading
+        self.padding_x = padding_x
+        self.padding_y = padding_y
+        self.label_background = label_background
+        self.grid_color = grid_color
+        self.grid_width = grid_width
+        self._label_lines = {}
+
+    def label_lines(self, label: str):
+        if label not in self._label_lines:
+            self._label_lines[label] = self._split(label, self.label_font, self.label_width)
+        return self._label_lines[label]
+
+    def value_lines(self, value: str):
+        return self._split(value, self.font, self.value_width)
+
+    def _split(self, text: str, font: str, width: float):
+        # Explicit newlines are kept as line breaks, blank ones included
+        lines = []
+        for paragraph in text.split("\n"):
+            lines.extend(simpleSplit(paragraph, font, self.font_size, width - 2 * self.padding_x) or [""])
+        return lines
+
+
+class TestCaseGrid(Flowable):
+    """
+    One test case as a two-column key/value grid, drawn straight onto the
+    canvas. Values are plain text (never parsed as markup), so no escaping or
+    Paragraph/Table objects are needed per cell. Splits across pages between
+    rows, like the Table it replaces.
+    """
+
+    def __init__(self, rows, style: GridStyle):
+        super().__init__()
+        self.rows = rows  # [(label, value)]
+        self.style = style
+        self.hAlign = "CENTER"
+        self._cells = None
+
+    def _layout(self):
+        if self._cells is None:
+            style = self.style
+            self._cells = []
+            for label, value in self.rows:
+                label_lines = style.label_lines(label)
+                value_lines = style.value_lines(value)
+                height = max(len(label_lines), len(value_lines)) * style.leading + 2 * style.padding_y
+                self._cells.append((label_lines, value_lines, height))
+        return self._cells
+
+    def wrap(self, availWidth, availHeight):
+        self.width = self.style.label_width + self.style.value_width
+        self.height = sum(height for _, _, height in self._layout())
+        return self.width, self.height
+
+    def split(self, availWidth, availHeight):
+        used, fits = 0, 0
+        for _, _, height in self._layout():
+            if used + height > availHeight:
+                break
+            used += height
+            fits += 1
+        if fits == 0 or fits == len(self.rows):
+            return []
+        return [TestCaseGrid(self.rows[:fits], self.style), TestCaseGrid(self.rows[fits:], self.style)]
+
+    def draw(self):
+        style, canv = self.style, self.canv
+        label_center = style.label_width / 2
+        value_center = style.label_width + style.value_width / 2
+        top = self.height
+
+        canv.setLineWidth(style.grid_width)
+        canv.setStrokeColor(style.grid_color)
+        for label_lines, value_lines, height in self._layout():
+            bottom = top - height
+            canv.setFillColor(style.label_background)
+            canv.rect(0, bottom, style.label_width, height, stroke=1, fill=1)
+            canv.rect(style.label_width, bottom, style.value_width, height, stroke=1, fill=0)
+
+            canv.setFillColor(colors.black)
+            for center, font, lines in ((label_center, style.label_font, label_lines),
+                                        (value_center, style.font, value_lines)):
+                canv.setFont(font, style.font_size)
+                y = top - style.padding_y - style.font_size
+                for line in lines:
+                    canv.drawCentredString(center, y, line)
+                    y -= style.leading
+            top = bottom
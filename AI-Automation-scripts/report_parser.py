@@ -0,0 +1,239 @@
+import re
+from collections import Counter
+
+FILE_SEPARATOR = "=" * 50   # Written by the merge scripts around each "FILE: <name>" line
+FILE_MARKER = "FILE: "
+
+
+def heading_keys(keys, key_format: str = "colon", aliases: dict = None):
+    """
+    Matcher for field headings as the models actually write them, built as one
+    compiled alternation. Both 'Key: value' and a bare 'Key' line (value on the
+    lines below) are recognised, as are 'Key - value', Markdown emphasis or
+    heading marks ('**Key:**', '## Key'), other letter case and spacing
+    ('Test id', 'TestID'), a plural 's' and `aliases` ({"Test Case ID": "Test ID"}).
+
+    Returns (key, value on the same line, exact) or None, where `exact` is
+    False when the heading deviates from the canonical `key_format`
+    ("colon": 'Key: value', "line": 'Key' on its own line). ResultParser only
+    takes a non-exact heading where it is the next field expected, since
+    values often contain 'Word: value' lines or a bare heading word.
+    """
+    names = {key: key for key in keys}
+    names.update(aliases or {})
+    # Longest first so 'Test Case ID' is not read as a shorter key
+    spellings = sorted(names, key=len, reverse=True)
+    groups = {f"k{n}": names[name] for n, name in enumerate(spellings)}
+    alternation = "|".join(
+        f"(?P<k{n}>" + r"[\s_-]*".join(re.escape(word) for word in name.split()) + ")"
+        for n, name in enumerate(spellings)
+    )
+    pattern = re.compile(
+        r"(?:#+\s*)?(?P<open>[*_]{0,3})(?:" + alternation + r")s?(?P=open)?\s*"
+        r"(?:(?P<sep>:|[-\u2013\u2014](?=\s|$))(?P=open)?\s*(?P<value>.*))?$",
+        re.IGNORECASE,
+    )
+
+    def match(line: str):
+        m = pattern.match(line)
+        if not m:
+            return None
+        group = next(g for g in groups if m.group(g) is not None)
+        spelled, key = m.group(group), groups[group]
+        # Case-insensitive, but a lowercase start ('status: ok' inside an
+        # Expected Result) is content, not a heading
+        if not spelled[0].isupper():
+            return None
+        value = (m.group("value") or "").strip()
+        sep = m.group("sep")
+        exact = spelled == key and not m.group("open") and (
+            line.startswith(key + ":") if key_format == "colon" else sep is None and line == key)
+        return key, value, exact
+    return match
+
+
+class ParseQuality:
+    """
+    How well one result file parsed: test cases found, fields missing from
+    them, headings only recognised by the tolerant matcher, fields written
+    twice in one test case (the second silently replaces the first) and
+    chunks with fields but no test case marker (dropped from the report).
+    """
+
+    def __init__(self, fields):
+        self.fields = fields
+        self.test_cases = 0
+        self.missing = Counter()
+        self.fuzzy = 0
+        self.duplicates = 0
+        self.unmarked = 0
+
+    def add_case(self, case):
+        self.test_cases += 1
+        self.fuzzy += case.fuzzy
+        self.duplicates += case.duplicates
+        for field in self.fields:
+            if field not in case.data:
+                self.missing[field] += 1
+
+    def update(self, other: "ParseQuality"):
+        """Add the counts of `other` (another section of the same file)."""
+        self.test_cases += other.test_cases
+        self.missing.update(other.missing)
+        self.fuzzy += other.fuzzy
+        self.duplicates += other.duplicates
+        self.unmarked += other.unmarked
+
+    @property
+    def malformed(self) -> bool:
+        """Worth regenerating: content was lost or never recognised. Fuzzy headings alone are fine."""
+        return not self.test_cases or bool(self.missing) or self.duplicates > 0 or self.unmarked > 0
+
+    def problems(self) -> list:
+        problems = []
+        if not self.test_cases:
+            problems.append("no test cases")
+        if self.missing:
+            problems.append("missing " + ", ".join(f"{field} x{n}" for field, n in self.missing.items()))
+        if self.duplicates:
+            problems.append(f"{self.duplicates} repeated field(s)")
+        if self.unmarked:
+            problems.append(f"{self.unmarked} chunk(s) without a test ID")
+        return problems
+
+
+class _TestCase:
+    def __init__(self):
+        self.data = {}
+        self.key = None
+        self.buffer = []
+        self.marked = False
+        self.fuzzy = 0
+        self.duplicates = 0
+
+    def flush(self):
+        if self.key:
+            if self.key in self.data:
+                self.duplicates += 1
+            self.data[self.key] = "\n".join(self.buffer).strip()
+
+
+class ResultParser:
+    """
+    Single-pass, line-at-a-time parser for combined results files.
+
+    Files are delimited by the merge scripts' FILE: headers, test cases by
+    `test_separator`. Only chunks containing one of `markers`, or a heading of
+    the first (ID) field, count as test cases; inside them, heading_keys()
+    recognises the start of each field. A heading in any but the canonical
+    form ('Key: value' or a bare 'Key' line, per key_format) only counts when
+    it is the next field in `fields` order and not seen yet in the test case;
+    otherwise the line is content ('Title: Mr' under Test Data, a bare
+    'Status' line under Expected Result). The whole file is never held in
+    memory: `parse()` yields one {"filename", "test_cases"} record per file as
+    soon as it ends.
+
+    With `quality=True` every file is yielded, even without test cases, and
+    its record carries a ParseQuality under "quality".
+    """
+
+    def __init__(self, test_separator: str, markers, fields, key_format: str = "colon", aliases: dict = None):
+        self.test_separator = test_separator
+        self.markers = tuple(markers)
+        self.fields = fields
+        self.id_field = fields[0]
+        self.match_key = heading_keys(fields, key_format, aliases)
+
+    def parse(self, file_path: str, quality: bool = False):
+        with open(file_path, "r", encoding="utf-8") as f:
+            yield from self.parse_lines(f, quality)
+
+    def parse_lines(self, lines, quality: bool = False):
+        new_quality = (lambda: ParseQuality(self.fields)) if quality else (lambda: None)
+        filename, test_cases, case, stats = None, [], _TestCase(), new_quality()
+        held = None  # A line ending in FILE_SEPARATOR: either a file header or plain content
+
+        def feed(line):
+            nonlocal filename, case
+            if filename is None:
+                filename = line.strip()
+            if self.test_separator not in line:
+                self._feed_part(case, line)
+                return
+            parts = line.split(self.test_separator)
+            self._feed_part(case, parts[0])
+            for part in parts[1:]:
+                self._end_case(case, test_cases, stats)
+                case = _TestCase()
+                self._feed_part(case, part)
+
+        for line in lines:
+            line = line.rstrip("\n")
+            if held is not None:
+                if line.startswith(FILE_MARKER):
+                    feed(held[:-len(FILE_SEPARATOR)])
+                    self._end_case(case, test_cases, stats)
+                    if test_cases or (stats and filename):
+                        yield self._record(filename, test_cases, stats)
+                    filename, test_cases, case, stats = None, [], _TestCase(), new_quality()
+                    line = line[len(FILE_MARKER):]
+                else:
+                    feed(held)
+                held = None
+            if line.endswith(FILE_SEPARATOR):
+                held = line
+                continue
+            feed(line)
+
+        if held is not None:
+            feed(held)
+        self._end_case(case, test_cases, stats)
+        if test_cases or (stats and filename):
+            yield self._record(filename, test_cases, stats)
+
+    @staticmethod
+    def _record(filename, test_cases, stats):
+        record = {"filename": filename, "test_cases": test_cases}
+        if stats:
+            record["quality"] = stats
+        return record
+
+    def _feed_part(self, case: _TestCase, part: str):
+        if not case.marked and any(marker in part for marker in self.markers):
+            case.marked = True
+        line = part.strip()
+        if not line:
+            return
+        found = self.match_key(line)
+        if found and not found[2] and not self._expected(case, found[0]):
+            found = None
+        if found:
+            case.flush()
+            case.key, value, exact = found
+            case.buffer = [value] if value else []
+            case.fuzzy += not exact
+            if case.key == self.id_field:
+                case.marked = True
+        elif case.key:
+            case.buffer.append(line)
+
+    def _expected(self, case: _TestCase, key: str) -> bool:
+        """Whether `key` is the field that should follow the current one."""
+        if key in case.data or key == case.key:
+            return False
+        if case.key is None:
+            return key == self.id_field
+        position = self.fields.index(case.key) + 1
+        return position < len(self.fields) and self.fields[position] == key
+
+    @staticmethod
+    def _end_case(case: _TestCase, test_cases: list, stats: ParseQuality = None):
+        if not case.marked:
+            if stats and case.key:
+                stats.unmarked += 1
+            return
+        case.flush()
+        if case.data:
+            test_cases.append(case.data)
+            if stats:
+                stats.add_case(case)
@@ -0,0 +1,76 @@
+import os
+
+from report_parser import ResultParser
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Fields that are named differently in the unit and integration formats
+COLUMN_ALIASES = {"Test Case ID": "test_id", "Test ID": "test_id", "Test Steps": "steps", "Steps": "steps"}
+
+
+def column_name(field: str) -> str:
+    """Record column for a field heading, e.g. 'Expected Result' -> 'expected_result'."""
+    return COLUMN_ALIASES.get(field, field.lower().replace(" ", "_"))
+
+
+class ReportSchema:
+    """
+    Declarative description of one report: where its results come from, how
+    test cases are delimited and which fields they have (in display order).
+
+    `key_format` is "colon" for "Key: value" lines (unit format) or "line"
+    for headings on their own line followed by the value (integration format).
+    """
+
+    def __init__(self, name, report_title, input_file, output_file, store_file,
+                 test_separator, markers, fields, key_format):
+        self.name = name
+        self.report_title = report_title
+        self.input_file = input_file
+        self.output_file = output_file
+        self.store_file = store_file
+        self.fields = fields
+        # Schema-independent column names used by the JSONL / SQLite records
+        self.columns = {field: column_name(field) for field in fields}
+        # The other format's name for a field ('Test Case ID' in an integration result)
+        aliases = {alias: field for field in fields for alias, column in COLUMN_ALIASES.items()
+                   if column == self.columns[field] and alias != field}
+        self.parser = ResultParser(test_separator, markers, fields, key_format, aliases)
+
+
+UNIT_SCHEMA = ReportSchema(
+    name="unit",
+    report_title="Unit Testing Report (IEEE 829-2008 Standard)",
+    input_file=os.path.join(PROJECT_ROOT, "combined_unit_test_results.txt"),
+    output_file=os.path.join(PROJECT_ROOT, "SQE_Final_Project_Report.pdf"),
+    store_file=os.path.join(PROJECT_ROOT, "combined_unit_test_results.sqlite3"),
+    test_separator="=" * 80,
+    markers=["Test Case ID:"],
+    fields=[
+        "Test Case ID", "Title", "Objective", "Preconditions",
+        "Test Steps", "Test Data", "Expected Result",
+        "Actual Result", "Status", "Severity"
+    ],
+    key_format="colon",
+)
+
+# Integration tests use 40 '=' in the generation script and bare headings:
+# Test ID
+# TC-AT-001
+INTEGRATION_SCHEMA = ReportSchema(
+    name="integration",
+    report_title="Integration Testing Report (IEEE 829-2008 Standard)",
+    input_file=os.path.join(PROJECT_ROOT, "combined_integration_test_results.txt"),
+    output_file=os.path.join(PROJECT_ROOT, "SQE_Integration_Project_Report.pdf"),
+    store_file=os.path.join(PROJECT_ROOT, "combined_integration_test_results.sqlite3"),
+    test_separator="=" * 40,
+    markers=["Test ID", "Integration-Testing:"],
+    fields=[
+        "Test ID", "Title", "Objective", "Preconditions",
+        "Steps", "Test Data", "Expected Result",  # "Steps" in integration, not "Test Steps"
+        "Actual Result", "Status", "Severity"
+    ],
+    key_format="line",
+)
+
+SCHEMAS = {schema.name: schema for schema in (UNIT_SCHEMA, INTEGRATION_SCHEMA)}
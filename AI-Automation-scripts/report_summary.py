@@ -0,0 +1,69 @@
+import heapq
+from collections import Counter
+
+AREAS = ("Admin", "Customer")  # Sub-folders the integration generator prefixes as Adm-/Cust-
+TOP_FILES = 10                 # Rows in the "largest files" tables
+
+
+def area_of(filename: str) -> str:
+    parts = filename.replace("\\", "/").split("/")[:-1]
+    for area in AREAS:
+        if area in parts:
+            return area
+    return "General"
+
+
+def first_line(value: str) -> str:
+    """Status/Severity values are sometimes followed by a remark; count the first line."""
+    return value.strip().split("\n", 1)[0].strip() if value else "N/A"
+
+
+class ReportSummary:
+    """
+    Aggregates for the report's summary page, collected in a single pass
+    while the results are parsed: counts per Status, per Severity, per area
+    (Admin/Customer) and per file, plus the largest files.
+    """
+
+    def __init__(self):
+        self.files = []  # (filename, test case count), in report order
+        self.status = Counter()
+        self.severity = Counter()
+        self.area_files = Counter()
+        self.area_tests = Counter()
+        self.sizes = []  # (characters of documentation, filename)
+        self.total_tests = 0
+
+    def add(self, file_data):
+        filename, test_cases = file_data["filename"], file_data["test_cases"]
+        area = area_of(filename)
+        self.files.append((filename, len(test_cases)))
+        self.area_files[area] += 1
+        self.area_tests[area] += len(test_cases)
+        self.total_tests += len(test_cases)
+
+        size = 0
+        for test_case in test_cases:
+            self.status[first_line(test_case.get("Status"))] += 1
+            self.severity[first_line(test_case.get("Severity"))] += 1
+            size += sum(len(value) for value in test_case.values())
+        self.sizes.append((size, filename))
+        return file_data
+
+    def track(self, results):
+        """Pass `results` through, adding each file record on the way."""
+        for file_data in results:
+            yield self.add(file_data)
+
+    @classmethod
+    def from_results(cls, parsed_data):
+        summary = cls()
+        for file_data in parsed_data:
+            summary.add(file_data)
+        return summary
+
+    def largest_by_tests(self, n: int = TOP_FILES):
+        return heapq.nlargest(n, self.files, key=lambda item: item[1])
+
+    def largest_by_size(self, n: int = TOP_FILES):
+        return [(filename, size) for size, filename in heapq.nlargest(n, self.sizes)]
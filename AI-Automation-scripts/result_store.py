@@ -0,0 +1,160 @@
+import argparse
+import json
+import os
+import sqlite3
+
+from report_schemas import SCHEMAS, column_name
+
+# Every record has the same columns whichever report it belongs to
+COLUMNS = list(dict.fromkeys(column_name(field) for schema in SCHEMAS.values() for field in schema.fields))
+INDEXED_COLUMNS = ["severity", "status"]
+
+
+def jsonl_path_for(result_path: str) -> str:
+    """Structured sidecar written next to a generated .txt result."""
+    return os.path.splitext(result_path)[0] + ".jsonl"
+
+
+def records_from_text(schema, text: str) -> list:
+    """Parse one generated result text into column-keyed test case records."""
+    records = []
+    for file_data in schema.parser.parse_lines(text.splitlines()):
+        for test_case in file_data["test_cases"]:
+            records.append({schema.columns[field]: value for field, value in test_case.items()})
+    return records
+
+
+def write_jsonl(path: str, records: list, source: str = None):
+    """Write one JSON object per test case, atomically."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for record in records:
+            if source:
+                record = dict(record, source=source)
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    os.replace(tmp_path, path)
+
+
+def read_records(schema, result_path: str) -> list:
+    """
+    Records of one result file: from its JSONL sidecar when that is at least
+    as new as the text, else parsed from the text (results generated before
+    sidecars existed, or edited by hand).
+    """
+    sidecar = jsonl_path_for(result_path)
+    try:
+        if os.path.getmtime(sidecar) >= os.path.getmtime(result_path):
+            with open(sidecar, "r", encoding="utf-8") as f:
+                return [json.loads(line) for line in f if line.strip()]
+    except OSError:
+        pass
+    with open(result_path, "r", encoding="utf-8") as f:
+        return records_from_text(schema, f.read())
+
+
+def build_store(schema, input_dir: str, rel_paths: list, store_file: str = None) -> int:
+    """
+    Build the SQLite store of `schema` from the result files `rel_paths`
+    (the same list, in the same order, as the combined text file). Returns
+    the number of test cases stored.
+    """
+    store_file = store_file or schema.store_file
+    tmp_path = store_file + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    conn = sqlite3.connect(tmp_path)
+    count = 0
+    try:
+        conn.execute(
+            "CREATE TABLE test_cases (file TEXT NOT NULL, file_order INTEGER NOT NULL, "
+            "position INTEGER NOT NULL, source TEXT, "
+            + ", ".join(f"{column} TEXT" for column in COLUMNS) + ")"
+        )
+        insert = (f"INSERT INTO test_cases (file, file_order, position, source, {', '.join(COLUMNS)}) "
+                  f"VALUES ({', '.join('?' * (len(COLUMNS) + 4))})")
+        for file_order, rel_path in enumerate(rel_paths):
+            try:
+                records = read_records(schema, os.path.join(input_dir, rel_path))
+            except (OSError, ValueError) as e:
+                print(f"Error reading {rel_path}: {e}")
+                continue
+            conn.executemany(insert, (
+                (rel_path, file_order, n, record.get("source"), *(record.get(c) for c in COLUMNS))
+                for n, record in enumerate(records)
+            ))
+            count += len(records)
+        conn.execute("CREATE INDEX idx_order ON test_cases (file_order, position)")
+        for column in INDEXED_COLUMNS:
+            conn.execute(f"CREATE INDEX idx_{column} ON test_cases ({column})")
+        conn.commit()
+    finally:
+        conn.close()
+    os.replace(tmp_path, store_file)
+    return count
+
+
+def store_is_current(schema) -> bool:
+    """True when the store exists and is not older than the combined text file."""
+    try:
+        store_mtime = os.path.getmtime(schema.store_file)
+    except OSError:
+        return False
+    try:
+        return store_mtime >= os.path.getmtime(schema.input_file)
+    except OSError:
+        return True
+
+
+def select_test_cases(schema, **filters):
+    """
+    Yield (file, test_case) from the store in report order, where test_case
+    uses the schema's field names and omits fields the result did not have.
+    Filters are column equality tests, e.g. severity="High".
+    """
+    unknown = [column for column in filters if column not in COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown column(s): {', '.join(unknown)}")
+    where = " AND ".join(f"{column} = ?" for column in filters)
+    fields = [(field, schema.columns[field]) for field in schema.fields]
+    conn = sqlite3.connect(f"file:{schema.store_file}?mode=ro", uri=True)
+    try:
+        query = f"SELECT file, {', '.join(c for _, c in fields)} FROM test_cases"
+        if where:
+            query += f" WHERE {where}"
+        for row in conn.execute(query + " ORDER BY file_order, position", list(filters.values())):
+            yield row[0], {field: value for (field, _), value in zip(fields, row[1:]) if value is not None}
+    finally:
+        conn.close()
+
+
+def iter_results(schema, **filters):
+    """Yield the store's contents one {"filename", "test_cases"} record per file."""
+    file_data = None
+    for filename, test_case in select_test_cases(schema, **filters):
+        if file_data is None or file_data["filename"] != filename:
+            if file_data is not None:
+                yield file_data
+            file_data = {"filename": filename, "test_cases": []}
+        file_data["test_cases"].append(test_case)
+    if file_data is not None:
+        yield file_data
+
+
+def load_results(schema, **filters) -> list:
+    """The store's contents in parse_test_results() shape: [{"filename", "test_cases"}]."""
+    return list(iter_results(schema, **filters))
+
+
+if __name__ == "__main__":
+    # e.g. python result_store.py unit --severity High --status Fail
+    parser = argparse.ArgumentParser(description="Query the structured test case store.")
+    parser.add_argument("report", choices=list(SCHEMAS))
+    for column in COLUMNS:
+        parser.add_argument(f"--{column.replace('_', '-')}", dest=column)
+    args = parser.parse_args()
+    schema = SCHEMAS[args.report]
+    filters = {column: getattr(args, column) for column in COLUMNS if getattr(args, column) is not None}
+    id_field = next(field for field in schema.fields if column_name(field) == "test_id")
+    for filename, test_case in select_test_cases(schema, **filters):
+        print(f"{filename}\t{test_case.get(id_field, 'N/A')}\t{test_case.get('Severity', '')}\t{test_case.get('Title', '')}")
@@ -0,0 +1,24 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from filterFiles import PrefixTrie, select_files  # noqa: E402
+
+
+def test_trie_returns_every_matching_prefix():
+    trie = PrefixTrie(["Invoice", "InvoiceItem", "User"])
+    assert trie.match("InvoiceItem-Test.php") == ["Invoice", "InvoiceItem"]
+    assert trie.match("Invoice-Test.php") == ["Invoice"]
+    assert trie.match("Item-Test.php") == []
+
+
+def test_overlapping_prefixes_are_not_reported_unmatched():
+    files = ["InvoiceItem-Test.php", "Invoice-Test.php", "User-Test.php"]
+    selected, unmatched = select_files(files, ["Invoice", "InvoiceItem", "Payment"], globs=["User*"])
+    assert selected == [
+        ("InvoiceItem-Test.php", "Invoice"),
+        ("Invoice-Test.php", "Invoice"),
+        ("User-Test.php", "User*"),
+    ]
+    assert unmatched == ["Payment"]
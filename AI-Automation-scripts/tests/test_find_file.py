@@ -0,0 +1,35 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from findFile import SymbolIndex  # noqa: E402
+
+
+def make_index(tmp_path):
+    sources = {
+        "Models/Invoice.php": "<?php\nnamespace App\\Models;\nclass Invoice {}\n",
+        "Models/InvoiceItem.php": "<?php\nnamespace App\\Models;\nclass InvoiceItem {}\n",
+        "Http/Controllers/InvoicesController.php": "<?php\nnamespace App\\Http\\Controllers;\nclass InvoicesController {}\n",
+    }
+    for rel_path, code in sources.items():
+        path = tmp_path / "app" / rel_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(code)
+    return SymbolIndex(str(tmp_path / "app"), str(tmp_path / "index.json")).refresh()
+
+
+def test_glob_matches_basenames(tmp_path):
+    index = make_index(tmp_path)
+    assert index.find("Invoice*.php") == ["Http/Controllers/InvoicesController.php",
+                                          "Models/Invoice.php", "Models/InvoiceItem.php"]
+    assert index.find("invoice?tem.php") == ["Models/InvoiceItem.php"]
+    assert index.find("Payment*.php") == []
+
+
+def test_glob_parts_match_trailing_directories(tmp_path):
+    index = make_index(tmp_path)
+    assert index.find("Controllers/*Controller.php") == ["Http/Controllers/InvoicesController.php"]
+    assert index.find("Http/*Controller.php") == []  # '*' does not cross directories
+    assert index.find("**/Models/*.php") == ["Models/Invoice.php", "Models/InvoiceItem.php"]
+    assert index.find("**") == sorted(index.files)
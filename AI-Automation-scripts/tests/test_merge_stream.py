@@ -0,0 +1,84 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import merge_stream  # noqa: E402
+from merge_stream import load_index, merge_stream as merge, read_section, SEPARATOR  # noqa: E402
+
+
+def baseline_merge(input_dir, names) -> bytes:
+    """What the original text-mode merge scripts wrote for `names` (with '\\n' newlines)."""
+    out = []
+    for name in names:
+        with open(os.path.join(input_dir, name), "r", encoding="utf-8") as f:
+            content = f.read()
+        out.append("\n" * 3 + SEPARATOR + "\n" + f"FILE: {name}\n" + SEPARATOR + "\n" + "\n" + content + "\n")
+    return "".join(out).encode("utf-8")
+
+
+def write_result(input_dir, name, data: bytes, mtime_ns: int):
+    path = os.path.join(input_dir, name)
+    with open(path, "wb") as f:
+        f.write(data)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def read_bytes(path) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def test_newlines_are_normalized_like_the_text_mode_merge(tmp_path, monkeypatch):
+    # A tiny buffer puts CRLF pairs across block boundaries
+    monkeypatch.setattr(merge_stream, "COPY_BUFFER_SIZE", 3)
+    write_result(tmp_path, "a.txt", b"Test ID\r\nTC-1\r\n\r\nTitle\rX\r", 1_000_000_000)
+    output = str(tmp_path / "combined.txt")
+    merge(str(tmp_path), output, ["a.txt"])
+    assert read_bytes(output) == baseline_merge(str(tmp_path), ["a.txt"])
+    assert read_section(output, "a.txt") == "Test ID\nTC-1\n\nTitle\nX\n"
+
+
+def test_incremental_merge_after_change_add_and_delete(tmp_path):
+    input_dir = tmp_path / "results"
+    input_dir.mkdir()
+    write_result(input_dir, "a.txt", b"alpha\n", 1_000_000_000)
+    write_result(input_dir, "b.txt", b"bravo\r\n", 1_000_000_000)
+    write_result(input_dir, "c.txt", b"charlie\n", 1_000_000_000)
+    output = str(tmp_path / "combined.txt")
+    assert merge(str(input_dir), output, ["a.txt", "b.txt", "c.txt"], incremental=True) == (3, 0)
+
+    write_result(input_dir, "b.txt", b"bravo, changed\n", 2_000_000_000)  # changed
+    write_result(input_dir, "d.txt", b"delta\n", 2_000_000_000)           # added
+    os.remove(input_dir / "c.txt")                                         # deleted
+    names = ["a.txt", "b.txt", "d.txt"]
+    assert merge(str(input_dir), output, names, incremental=True) == (3, 1)
+
+    assert read_bytes(output) == baseline_merge(str(input_dir), names)
+    index = load_index(output)
+    assert list(index) == names
+    assert [read_section(output, name, index) for name in names] == ["alpha\n", "bravo, changed\n", "delta\n"]
+
+    # No changes: the combined file is left alone
+    before = os.stat(output).st_mtime_ns
+    assert merge(str(input_dir), output, names, incremental=True) == (3, 3)
+    assert os.stat(output).st_mtime_ns == before
+
+
+def test_failed_merge_keeps_the_old_file_and_removes_the_temp_file(tmp_path, monkeypatch):
+    write_result(tmp_path, "a.txt", b"alpha\n", 1_000_000_000)
+    output = str(tmp_path / "combined.txt")
+    merge(str(tmp_path), output, ["a.txt"])
+    previous = read_bytes(output)
+
+    def fail(infile, outfile):
+        outfile.write(b"partial")
+        raise RuntimeError("disk full")
+
+    monkeypatch.setattr(merge_stream, "copy_text", fail)
+    with pytest.raises(RuntimeError):
+        merge(str(tmp_path), output, ["a.txt"])
+    assert read_bytes(output) == previous
+    assert not os.path.exists(output + ".tmp")
@@ -0,0 +1,127 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from prompt_batch import file_header, plan_batches, split_batch  # noqa: E402
+
+
+@pytest.mark.parametrize("header", [
+    "##### FILE: UserTest.php #####",
+    "**FILE: UserTest.php**",
+    "=== FILE: `UserTest.php` ===",
+    "### FILE:UserTest.php",
+    "FILE: **UserTest.php**",
+    "  ##### FILE: UserTest.php #####  ",
+])
+def test_split_batch_tolerates_header_decoration(header):
+    response = f"Sure, here you go.\n{header}\nTest ID\nTC-UT-001\n{file_header('InvoiceTest.php')}\nTest ID\nTC-IT-001\n"
+    assert split_batch(response, ["UserTest.php", "InvoiceTest.php"]) == {
+        "UserTest.php": "Test ID\nTC-UT-001",
+        "InvoiceTest.php": "Test ID\nTC-IT-001",
+    }
+
+
+def test_split_batch_keeps_duplicate_basenames_apart():
+    names = ["Admin/UserTest.php", "Customer/UserTest.php", "Admin/InvoiceTest.php"]
+    response = (
+        "##### FILE: Customer/UserTest.php #####\ncustomer user\n"
+        "##### FILE: Admin\\UserTest.php #####\nadmin user\n"
+        "##### FILE: UserTest.php #####\nambiguous\n"       # Two candidates: not guessed
+        "##### FILE: InvoiceTest.php #####\nadmin invoice\n"  # Unique basename: matched
+    )
+    assert split_batch(response, names) == {
+        "Customer/UserTest.php": "customer user",
+        "Admin/UserTest.php": "admin user",
+        "Admin/InvoiceTest.php": "admin invoice",
+    }
+
+
+def test_split_batch_leaves_out_missing_empty_and_repeated_sections():
+    response = (
+        f"{file_header('ATest.php')}\nfirst\n"
+        f"{file_header('BTest.php')}\n\n"
+        f"{file_header('ATest.php')}\nsecond copy\n"
+        f"{file_header('OtherTest.php')}\nnot requested\n"
+    )
+    assert split_batch(response, ["ATest.php", "BTest.php", "CTest.php"]) == {"ATest.php": "first"}
+
+
+def test_plan_batches_sends_batches_before_single_requests():
+    costs = {
+        "UserResource-Test.php": 100, "Huge-Test.php": 5000, "UserRequest-Test.php": 100,
+        "InvoiceResource-Test.php": 100, "InvoiceRequest-Test.php": 100, "TaxResource-Test.php": 100,
+        "Big-Test.php": 2000,
+    }
+    plan = plan_batches(list(costs), costs, max_file_tokens=1000, batch_tokens=10000, max_files=2)
+    assert plan == [
+        ["InvoiceRequest-Test.php", "UserRequest-Test.php"],    # Grouped by class kind
+        ["InvoiceResource-Test.php", "TaxResource-Test.php"],
+        ["UserResource-Test.php"],                              # Batch of one: a single request
+        ["Huge-Test.php"],                                      # Too large to batch, in input order
+        ["Big-Test.php"],
+    ]
+
+
+def test_plan_batches_respects_the_token_budget():
+    costs = {"ATest.php": 600, "BTest.php": 600, "CTest.php": 300}
+    plan = plan_batches(list(costs), costs, max_file_tokens=1000, batch_tokens=1000, max_files=6)
+    assert plan == [["BTest.php", "CTest.php"], ["ATest.php"]]
+
+
+INTEGRATION_RESULT = """Integration-Testing:
+Test ID
+TC-{prefix}-007
+Title
+Lists users
+"""
+
+
+def test_missing_batch_section_falls_back_to_a_single_request(tmp_path, monkeypatch):
+    pytest.importorskip("aiohttp")
+    import generate_integration_tests as gen
+    from regen_manifest import Manifest
+
+    input_dir = tmp_path / "Integration-Testing"
+    for folder in ("Admin", "Customer"):
+        (input_dir / folder).mkdir(parents=True)
+    admin_user, customer_user, admin_invoice = (
+        str(input_dir / "Admin" / "UserTest.php"),
+        str(input_dir / "Customer" / "UserTest.php"),
+        str(input_dir / "Admin" / "InvoiceTest.php"),
+    )
+    for file_path in (admin_user, customer_user, admin_invoice):
+        with open(file_path, "w", encoding="utf-8") as f:
+            f.write("<?php")
+    response = (
+        f"{file_header('Customer/UserTest.php')}\n{INTEGRATION_RESULT.format(prefix='Cust-UT')}\n"
+        f"**FILE: Admin/UserTest.php**\n{INTEGRATION_RESULT.format(prefix='Adm-UT')}\n"
+    )
+    saved, singles = {}, []
+
+    async def request_documentation(label, prompt, refresh=False):
+        return response
+
+    async def save_documentation(file_path, test_cases, output_path):
+        saved[file_path] = test_cases
+
+    async def process_file(file_path):
+        singles.append(file_path)
+        return True
+
+    monkeypatch.setattr(gen, "INPUT_DIR", str(input_dir))
+    monkeypatch.setattr(gen, "OUTPUT_DIR", str(tmp_path / "results"))
+    monkeypatch.setattr(gen, "client", object())
+    monkeypatch.setattr(gen, "manifest", Manifest("batch-test", "1", path=str(tmp_path / "manifest.json")))
+    monkeypatch.setattr(gen, "request_documentation", request_documentation)
+    monkeypatch.setattr(gen, "save_documentation", save_documentation)
+    monkeypatch.setattr(gen, "process_file", process_file)
+
+    files = [(admin_user, "<?php"), (customer_user, "<?php"), (admin_invoice, "<?php")]
+    assert asyncio.run(gen.process_batch(files)) == 3
+    assert singles == [admin_invoice]
+    assert "TC-Adm-UT-001" in saved[admin_user]     # Renumbered from 001
+    assert "TC-Cust-UT-001" in saved[customer_user]
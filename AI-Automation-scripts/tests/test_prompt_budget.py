@@ -0,0 +1,80 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import prompt_budget  # noqa: E402
+from prompt_budget import (  # noqa: E402
+    ApproximateTokenizer, BPETokenizer, KEEP, MIDDLE, Section, TESTS, count_tokens, fit_sections, get_tokenizer,
+)
+
+# Every printable ASCII byte, tab and newline, then the merges
+# in, vo, ic, ice, ' the', test, '();', 4 spaces, st, ore
+VOCAB = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "tiny_bpe.tiktoken")
+
+
+@pytest.fixture
+def bpe(monkeypatch):
+    tokenizer = BPETokenizer(VOCAB)
+    monkeypatch.setattr(prompt_budget, "_tokenizer", tokenizer)
+    return tokenizer
+
+
+@pytest.mark.parametrize("text, tokens", [
+    ("invoice", 3),   # in, vo, ic merge first, then ic + e -> ice: in|vo|ice
+    (" the", 1),      # Whole piece is a token
+    ("store", 4),     # st merges; 'ore' is never reached without an 'or'/'re' pair: st|o|r|e
+    ("test();", 2),   # Two pre-tokenizer pieces, each a token
+    ("é", 2),         # Bytes outside the vocabulary count one each
+    ("", 0),
+])
+def test_bpe_counts(bpe, text, tokens):
+    assert bpe.count(text) == tokens
+    assert count_tokens(text) == tokens
+
+
+def test_get_tokenizer_loads_the_configured_vocabulary(monkeypatch, capsys):
+    monkeypatch.setattr(prompt_budget, "_tokenizer", None)
+    monkeypatch.setenv("PROMPT_TOKENIZER_VOCAB", VOCAB)
+    assert isinstance(get_tokenizer(), BPETokenizer)
+    assert get_tokenizer() is get_tokenizer()
+    assert capsys.readouterr().out.count("BPE vocabulary") == 1  # Logged once
+
+
+def test_get_tokenizer_falls_back_with_a_margin(monkeypatch, capsys):
+    monkeypatch.setattr(prompt_budget, "_tokenizer", None)
+    monkeypatch.setenv("PROMPT_TOKENIZER_VOCAB", VOCAB + ".missing")
+    tokenizer = get_tokenizer()
+    assert isinstance(tokenizer, ApproximateTokenizer)
+    assert tokenizer.count("x" * 70) == round(10 * (1 + prompt_budget.APPROXIMATE_MARGIN))
+    assert "approximate" in capsys.readouterr().out
+
+
+CODE = (
+    "<?php\n\n"
+    "test('stores', function () {\n    expect(1)->toBe(1);\n});\n\n"
+    "test('lists', function () {\n    expect(2)->toBe(2);\n});\n\n"
+    "test('deletes', function () {\n    expect(3)->toBe(3);\n});\n"
+)
+
+
+def test_fit_sections_cuts_tests_at_whole_blocks(bpe):
+    preamble, first, second = "<?php\n\n", CODE.split("\n\n")[1] + "\n\n", CODE.split("\n\n")[2] + "\n\n"
+    head = "Fix the tests:\n"
+    budget = bpe.count(head) + bpe.count(preamble) + bpe.count(first) + bpe.count(second)
+
+    assert fit_sections([Section(head), Section(CODE, TESTS)], budget) == (
+        head + preamble + first + second + "\n// [1 more tests omitted to fit the prompt: deletes]\n")
+    assert fit_sections([Section(head), Section(CODE, TESTS)], budget - 1) == (
+        head + preamble + first + "\n// [2 more tests omitted to fit the prompt: lists; deletes]\n")
+    # Under budget: unchanged
+    assert fit_sections([Section(head), Section(CODE, TESTS)], bpe.count(head + CODE)) == head + CODE
+
+
+def test_fit_sections_keeps_head_and_tail_of_tool_output(bpe):
+    output = "".join(f"invoice{n}\n" for n in range(1, 6))  # 5 tokens a line: in|vo|ice|N|\n
+    assert bpe.count(output) == 25
+    assert fit_sections([Section("Output:\n", KEEP), Section(output, MIDDLE)], bpe.count("Output:\n") + 10) == (
+        "Output:\ninvoice1\n\n[... 3 lines omitted ...]\ninvoice5\n")
@@ -0,0 +1,120 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from report_schemas import INTEGRATION_SCHEMA, UNIT_SCHEMA  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# What the baseline (exact-heading) integration parser produced for
+# integration_word_colon.txt: 'Word: value' lines inside a field are content
+WORD_COLON_BASELINE = [{
+    "filename": "Admin/CustomerTest.txt",
+    "test_cases": [
+        {
+            "Test ID": "TC-Adm-UT-001",
+            "Title": "Create a customer through the admin API",
+            "Objective": "Validate that a posted customer is stored",
+            "Preconditions": "Application running\nDatabase seeded",
+            "Test Data": "Title: Mr\nPayload: name=John\nCurrency: USD",
+            "Steps": "Step 1: send POST /api/v1/customers\nStep 2: verify response",
+            "Expected Result": "HTTP 201 returned\nStatus: 201 Created\nSeverity: none logged",
+            "Actual Result": "Same as Expected Result",
+            "Status": "Pass",
+            "Severity": "High",
+        },
+        {
+            "Test ID": "TC-Adm-UT-002",
+            "Title": "Reject an invalid email",
+            "Objective": "Validate request validation",
+            "Preconditions": "Application running",
+            "Test Data": "Email: not-an-email\nObjective: negative path",
+            "Steps": "Step 1: send POST with invalid email",
+            "Expected Result": "HTTP 422 returned\nTitle: The email must be a valid email address.",
+            "Actual Result": "Same as Expected Result",
+            "Status": "Pass",
+            "Severity": "Medium",
+        },
+    ],
+}]
+
+# The baseline ('Key:' only) unit parser's output for unit_bare_headings.txt:
+# a bare 'Steps' / 'Status' / 'Title' line inside a value is content
+UNIT_BARE_HEADINGS_BASELINE = [{
+    "filename": "Invoice/InvoicesControllerTest.txt",
+    "test_cases": [
+        {
+            "Test Case ID": "UT-Inv-001",
+            "Title": "Store an invoice",
+            "Objective": "Validate InvoicesController::store",
+            "Preconditions": "Database seeded",
+            "Test Steps": "1. POST /invoices\nSteps\n2. check",
+            "Test Data": "customer_id=1",
+            "Expected Result": "Response has\nStatus\ncode 200",
+            "Actual Result": "Same as Expected Result",
+            "Status": "Pass",
+            "Severity": "High",
+        },
+        {
+            "Test Case ID": "UT-Inv-002",
+            "Title": "Reject a missing customer",
+            "Objective": "Validate request validation",
+            "Preconditions": "None",
+            "Test Steps": "1. POST /invoices without customer_id",
+            "Test Data": "customer_id missing",
+            "Expected Result": "HTTP 422 returned\nTitle\nThe customer id field is required.",
+            "Actual Result": "Same as Expected Result",
+            "Status": "Pass",
+            "Severity": "Medium",
+        },
+    ],
+}]
+
+
+def parse_with_quality(schema, lines):
+    records = list(schema.parser.parse_lines(lines, quality=True))
+    return [{"filename": r["filename"], "test_cases": r["test_cases"]} for r in records], records
+
+
+def test_integration_word_colon_values_match_baseline():
+    path = os.path.join(FIXTURES, "integration_word_colon.txt")
+    records = list(INTEGRATION_SCHEMA.parser.parse(path))
+    assert records == WORD_COLON_BASELINE
+
+
+def test_integration_word_colon_values_are_not_flagged():
+    path = os.path.join(FIXTURES, "integration_word_colon.txt")
+    records = list(INTEGRATION_SCHEMA.parser.parse(path, quality=True))
+    assert [r["test_cases"] for r in records] == [WORD_COLON_BASELINE[0]["test_cases"]]
+    quality = records[0]["quality"]
+    assert not quality.malformed
+    assert quality.fuzzy == 0 and quality.duplicates == 0
+
+
+def test_integration_tolerant_heading_in_expected_position():
+    lines = [
+        "Integration-Testing:",
+        "Test ID",
+        "TC-AT-001",
+        "**Title:** Log in",           # Non-canonical, but the next field expected
+        "Objective",
+        "Validate login",
+        "Title: Mr",                   # Title already seen: content of Objective
+    ]
+    cases, records = parse_with_quality(INTEGRATION_SCHEMA, lines)
+    assert cases[0]["test_cases"] == [{
+        "Test ID": "TC-AT-001",
+        "Title": "Log in",
+        "Objective": "Validate login\nTitle: Mr",
+    }]
+    assert records[0]["quality"].fuzzy == 1
+    assert records[0]["quality"].duplicates == 0
+
+
+def test_unit_bare_heading_words_are_content():
+    path = os.path.join(FIXTURES, "unit_bare_headings.txt")
+    records = list(UNIT_SCHEMA.parser.parse(path, quality=True))
+    quality = records[0].pop("quality")
+    assert records == UNIT_BARE_HEADINGS_BASELINE
+    assert quality.fuzzy == 0 and quality.duplicates == 0